@@ -1,8 +1,11 @@
-from flask import Flask, request, render_template_string, jsonify
-from main import run_agent, retrieve_knowledge, store_knowledge, delete_knowledge, chat_history, load_knowledge
+from flask import Flask, Response, request, render_template_string, jsonify, stream_with_context
+from main import run_agent, run_agent_on_loop, run_agent_stream, retrieve_knowledge, store_knowledge, delete_knowledge, chat_history, recent_topics, response_cache, parse_training_stream, train_agent_bulk, dedupe_knowledge, provider_registry
 import time
 import logging
 import os
+import io
+import json
+import threading
 import PyPDF2
 from docx import Document
 from werkzeug.utils import secure_filename
@@ -721,22 +724,67 @@ HTML_TEMPLATE = """
                     }
                 }
 
-                const response = await fetch('/query', {
+                const response = await fetch('/query/stream', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ query, file_content: fileContent, is_image: isImage })
                 });
-                const data = await response.json();
-                
+
+                // Render tokens as they arrive; the done event carries the final answer
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '', text = '', status = null, msgDiv = null, final = null, pending = false;
+                const render = () => {
+                    pending = false;
+                    if (!msgDiv) {
+                        hideTyping();
+                        msgDiv = addMessage('', 'agent');
+                    }
+                    setMessageBody(msgDiv, status ? '*' + status + '*' : text);
+                };
+                const scheduleRender = () => {
+                    if (!pending) { pending = true; requestAnimationFrame(render); }
+                };
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const chunks = buffer.split('\n\n');
+                    buffer = chunks.pop();
+                    for (const chunk of chunks) {
+                        if (!chunk.startsWith('data: ')) continue;
+                        const event = JSON.parse(chunk.slice(6));
+                        if (event.type === 'token') {
+                            text += event.text;
+                            status = null;
+                            scheduleRender();
+                        } else if (event.type === 'status') {
+                            // Tool call or provider switch: what was streamed so far is not the answer
+                            text = '';
+                            status = event.text;
+                            scheduleRender();
+                        } else if (event.type === 'done') {
+                            final = event;
+                        }
+                    }
+                }
+                if (!final) throw new Error('stream ended without an answer');
+
                 hideTyping();
                 clearFile();
-                if (data.model) {
-                    updateModelBadge(data.model);
+                if (final.model) {
+                    updateModelBadge(final.model);
                 }
 
-                addMessage(data.response, 'agent');
+                if (msgDiv) {
+                    text = final.response;
+                    status = null;
+                    render();
+                } else {
+                    addMessage(final.response, 'agent');
+                }
                 if (isTTSEnabled) {
-                    speakText(data.response);
+                    speakText(final.response);
                 }
                 refreshMemory();
             } catch (error) {
@@ -770,6 +818,17 @@ HTML_TEMPLATE = """
 
             const wrapper = document.getElementById('chat-wrapper');
             wrapper.scrollTo({ top: wrapper.scrollHeight, behavior: 'smooth' });
+            return msgDiv;
+        }
+
+        function setMessageBody(msgDiv, text) {
+            const body = msgDiv.querySelector('.msg-body');
+            body.innerHTML = marked.parse(text);
+            body.querySelectorAll('pre code').forEach((el) => {
+                hljs.highlightElement(el);
+            });
+            const wrapper = document.getElementById('chat-wrapper');
+            wrapper.scrollTo({ top: wrapper.scrollHeight });
         }
 
         function showTyping() {
@@ -996,7 +1055,8 @@ def query():
 
     try:
         is_image = data.get('is_image', False)
-        response, _, model_name = run_agent(user_query, chat_history, file_content=file_content, is_image=is_image)
+        # Every request's coroutine runs on main's one shared event loop, not a per-request one
+        response, _, model_name = run_agent_on_loop(user_query, chat_history, file_content=file_content, is_image=is_image)
 
         # Update chat history
         chat_history.append(("human", user_query))
@@ -1007,6 +1067,32 @@ def query():
         logging.error(f"Error for query '{user_query}': {e}")
         return jsonify({'response': f"Error: {str(e)}", 'learned': None})
 
+@app.route('/query/stream', methods=['POST'])
+def query_stream():
+    """Server-Sent Events: token/status events while the answer is generated, then one done event."""
+    # Stays on the sync run_agent_stream: this worker thread relays the provider's token stream
+    data = request.get_json()
+    user_query = data['query']
+    file_content = data.get('file_content')
+    is_image = data.get('is_image', False)
+
+    def events():
+        if user_query.lower() == 'exit':
+            yield f"data: {json.dumps({'type': 'done', 'response': 'Goodbye!', 'model': None})}\n\n"
+            return
+        try:
+            for event in run_agent_stream(user_query, chat_history, file_content=file_content, is_image=is_image):
+                if event['type'] == 'done':
+                    chat_history.append(("human", user_query))
+                    chat_history.append(("assistant", event['response']))
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logging.error(f"Error for query '{user_query}': {e}")
+            yield f"data: {json.dumps({'type': 'done', 'response': f'Error: {e}', 'model': None})}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -1048,13 +1134,20 @@ def upload_file():
 @app.route('/knowledge', methods=['GET'])
 def get_knowledge():
     try:
-        knowledge = load_knowledge()
         # Return top 10 recent topics for UI
-        recent_topics = list(knowledge.keys())[-10:]
-        return jsonify({'topics': recent_topics})
+        return jsonify({'topics': recent_topics(10)})
     except Exception as e:
         return jsonify({'error': str(e)})
 
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/providers', methods=['GET'])
+def providers_status():
+    """Each provider's configuration, cached health probe and circuit breaker state, in priority order."""
+    return jsonify(provider_registry.status())
+
 @app.route('/train', methods=['POST'])
 def train():
     try:
@@ -1065,11 +1158,27 @@ def train():
         if not topic or not content:
             return jsonify({'success': False, 'error': 'Topic and content are required'})
 
-        store_knowledge(topic, content)
+        store_knowledge(topic, content, dedupe=False)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/train/bulk', methods=['POST'])
+def train_bulk():
+    """
+    Streams NDJSON ({"topic": ..., "content": ...} per line) or CSV (topic,content header)
+    from the request body into the knowledge base, committing once per batch.
+    Use ?format=csv or a text/csv Content-Type for CSV and ?batch_size=N to tune batching.
+    """
+    try:
+        fmt = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'ndjson')
+        batch_size = max(1, int(request.args.get('batch_size', 1000)))
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline='')
+        stats = train_agent_bulk(parse_training_stream(lines, fmt), batch_size=batch_size)
+        return jsonify({'success': True, **stats})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/remove', methods=['POST'])
 def remove():
     try:
@@ -1089,4 +1198,8 @@ def remove():
 if __name__ == '__main__':
     print("\n🚀 Starting AI Learning Agent Server...")
     print("📍 Open http://127.0.0.1:5000 in your browser\n")
+    # Merge near-duplicate research reports already in the knowledge base (opt-in: it deletes topics)
+    dedupe_on_start = os.getenv('KNOWLEDGE_DEDUP_ON_START', '0')
+    if dedupe_on_start != '0':
+        threading.Thread(target=dedupe_knowledge, kwargs={'dry_run': dedupe_on_start == 'dry-run'}, daemon=True).start()
     app.run(debug=True, host='127.0.0.1', port=5000)
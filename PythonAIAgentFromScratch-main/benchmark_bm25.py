@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the BM25 knowledge ranker on synthetic knowledge bases.
+Usage: python benchmark_bm25.py [sizes...]   (default: 10000 100000 1000000)
+"""
+
+import sys
+import time
+import random
+import numpy as np
+from knowledge_index import BM25Index
+
+def synthetic_entries(n, seed=42, vocab_size=50000):
+    """Zipf-distributed words, so some terms are common and most are rare like real text."""
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    for i in range(n):
+        topic = " ".join(vocab[j % vocab_size] for j in rng.zipf(1.3, 4))
+        content = " ".join(vocab[j % vocab_size] for j in rng.zipf(1.3, 60))
+        yield f"{topic} {i}", content
+
+def benchmark(size, n_queries=200):
+    start = time.perf_counter()
+    index = BM25Index(synthetic_entries(size))
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(size)
+    topics = index.topics
+    queries = [" ".join(rng.choice(topics).split()[:3]) for _ in range(n_queries)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, n_results=5, threshold=0.0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return build_s, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'entries':>10} {'build (s)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for size in sizes:
+        build_s, p50, p99 = benchmark(size)
+        print(f"{size:>10} {build_s:>10.1f} {p50:>10.2f} {p99:>10.2f}")
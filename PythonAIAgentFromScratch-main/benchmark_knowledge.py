@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for knowledge retrieval and storage.
+
+Every (backend, size) run generates a synthetic knowledge base in a temporary
+directory and measures it in a fresh process, so the real knowledge.json is never
+touched and memory numbers are not polluted by earlier runs.
+
+    python benchmark_knowledge.py                                   # json backend, 1k/10k/100k
+    python benchmark_knowledge.py --sizes 1000 1000000 --backends json sqlite mmap
+    python benchmark_knowledge.py --compare benchmark_results/<old>.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmark_results")
+WORDS = ("python newton law ipl cricket machine learning physics history football india trump election "
+         "quantum energy planet music movie capital france weather recipe health finance crypto market "
+         "language programming data science biology chemistry space rocket ocean climate war empire").split()
+
+
+def synthetic_knowledge(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    kb = {}
+    for i in range(size):
+        topic = " ".join(rng.sample(WORDS, rng.randint(2, 5))) + f" {i}"
+        body = " ".join(rng.choice(WORDS) for _ in range(80))
+        kb[topic] = f"### 🧠 Deep Parallel Intelligence Report: {topic.title()}\n**Core AI Insight:**\n{body}"
+    return kb
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    return {
+        "n": len(samples_ms),
+        "p50_ms": round(samples_ms[len(samples_ms) // 2], 4),
+        "p99_ms": round(samples_ms[max(int(len(samples_ms) * 0.99) - 1, 0)], 4),
+    }
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+        except Exception:
+            return None
+
+
+def read_everything(main):
+    """load_knowledge() plus every content value: the sqlite and mmap backends return a
+    lazy view, so timing only the call would measure creating the view, not the read."""
+    return sum(len(content) for content in main.load_knowledge().values())
+
+
+def run_worker(size: int, n_ops: int):
+    """Runs inside the temp directory: imports main against the synthetic knowledge.json there."""
+    start = time.perf_counter()
+    import main
+    startup_s = time.perf_counter() - start
+
+    rng = random.Random(size)
+    topics = list(main.knowledge_base)
+    queries = []
+    for _ in range(n_ops):
+        topic_words = rng.choice(topics).split()[:-1]
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(" ".join(rng.sample(topic_words, min(2, len(topic_words)))))  # partial overlap
+        elif kind < 0.8:
+            queries.append("what is " + " ".join(topic_words))                          # full topic words
+        else:
+            queries.append(f"unknown question {rng.random()}")                          # miss
+    new_topics = [(f"benchmark topic {i}", f"benchmark content {i} " + " ".join(rng.choice(WORDS) for _ in range(80)))
+                  for i in range(n_ops)]
+
+    result = {
+        "entries": len(topics),
+        "startup_s": round(startup_s, 3),
+        "retrieve_knowledge": timed(main.retrieve_knowledge, [(q,) for q in queries]),
+        "store_knowledge": timed(main.store_knowledge, new_topics),
+        "delete_knowledge": timed(main.delete_knowledge, [(t,) for t, _ in new_topics]),
+        "load_knowledge": timed(read_everything, [(main,)] * max(n_ops // 50, 3)),
+    }
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_case(backend: str, size: int, rankers: str, n_ops: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "knowledge.json"), "w") as f:
+            json.dump(synthetic_knowledge(size), f)
+        env = dict(os.environ, KNOWLEDGE_BACKEND=backend, KNOWLEDGE_RANKERS=rankers,
+                   PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        for key in ("KNOWLEDGE_DB", "KNOWLEDGE_DATA"):
+            env.pop(key, None)  # defaults resolve inside workdir
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", str(size), "--ops", str(n_ops)],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{backend}/{size} failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.update(backend=backend, size=size, rankers=rankers)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def print_table(results, baseline=None):
+    ops = ["retrieve_knowledge", "store_knowledge", "delete_knowledge", "load_knowledge"]
+    old = {(r["backend"], r["size"], r["rankers"]): r for r in (baseline or {}).get("results", [])}
+    print(f"{'backend':>8} {'size':>8} {'startup s':>9} {'rss MB':>7} " + " ".join(f"{op.split('_')[0] + ' p50/p99 ms':>24}" for op in ops))
+    for r in results:
+        cells = []
+        for op in ops:
+            cell = f"{r[op]['p50_ms']:.3f}/{r[op]['p99_ms']:.3f}"
+            prev = old.get((r["backend"], r["size"], r["rankers"]))
+            if prev:
+                cell += f" ({r[op]['p50_ms'] / max(prev[op]['p50_ms'], 1e-9):.2f}x)"
+            cells.append(f"{cell:>24}")
+        print(f"{r['backend']:>8} {r['size']:>8} {r['startup_s']:>9.2f} {str(r['peak_rss_mb']):>7} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["json"], choices=["json", "sqlite", "mmap"])
+    parser.add_argument("--rankers", default="overlap", help="KNOWLEDGE_RANKERS for every run")
+    parser.add_argument("--ops", type=int, default=500, help="operations timed per measurement")
+    parser.add_argument("--out", help="results file (default: benchmark_results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to print p50 ratios against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_worker(args.worker, args.ops)))
+        sys.exit(0)
+
+    results = []
+    for backend in args.backends:
+        for size in args.sizes:
+            print(f"⏱️ {backend} backend, {size} entries...", flush=True)
+            results.append(run_case(backend, size, args.rankers, args.ops))
+
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": sys.version.split()[0], "results": results}
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    print(f"\n📄 Results written to {out}")
@@ -0,0 +1,191 @@
+"""Bounded pools of warm headless browsers shared by the browsing tools."""
+from contextlib import contextmanager
+import atexit
+import os
+import threading
+import time
+
+_pools = {}
+_lock = threading.Lock()
+
+
+# Settings are read on use, not at import, so values loaded later by load_dotenv() apply
+def _env(name, default):
+    return float(os.getenv(name, default))
+
+
+class _Browser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.base_handle = driver.current_window_handle
+        self.uses = 0
+        self.idle_since = time.monotonic()
+
+
+class BrowserPool:
+    """
+    Up to `size` browsers built by `factory()`, started on demand and kept warm
+    between calls. Each lease gets a fresh tab that is closed on return, so pages
+    never see each other's DOM, history or scripts. A browser that fails its health
+    check or its cleanup (crashed, hung) is quit and replaced; one that has served
+    `max_uses` leases is recycled so Chrome's memory growth stays bounded; one idle
+    longer than `idle_timeout` seconds is quit to give the memory back.
+    """
+
+    def __init__(self, factory, size: int = 4, max_uses: int = 50, idle_timeout: float = 300,
+                 lease_timeout: float = 30, clear_cookies: bool = True):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        self.clear_cookies = clear_cookies  # off for a pool whose profile stays logged in
+        self._idle = []  # most recently returned last, reused first
+        self._live = 0
+        self._cond = threading.Condition()
+        self.created = self.recycled = self.leases = 0
+
+    def _healthy(self, browser):
+        try:
+            browser.driver.window_handles  # one round trip to the driver
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    expired += self._reap_idle()
+                    if self._idle:
+                        return self._idle.pop()
+                    if self._live < self.size:
+                        self._live += 1
+                        return None  # caller starts a new browser outside the lock
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"no browser free within {timeout}s (pool size {self.size})")
+                    self._cond.wait(remaining)
+        finally:
+            for browser in expired:
+                self._quit(browser)  # Chrome takes a while to shut down, the lock is released by now
+
+    def _reap_idle(self):
+        """Takes browsers idle too long out of the pool (lock held); the caller quits them."""
+        now = time.monotonic()
+        expired = []
+        while self._idle and now - self._idle[0].idle_since > self.idle_timeout:
+            expired.append(self._idle.pop(0))
+            self._live -= 1
+            self.recycled += 1
+        if expired:
+            self._cond.notify(len(expired))
+        return expired
+
+    def _discard(self, browser):
+        with self._cond:
+            self._live -= 1
+            self.recycled += 1
+            self._cond.notify()
+        self._quit(browser)  # outside the lock: other borrowers don't wait for the shutdown
+
+    def _start(self):
+        try:
+            browser = _Browser(self.factory())
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+        self.created += 1
+        return browser
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """Yields a driver switched to a new tab of its own; blocks while every browser is busy."""
+        browser = None
+        while browser is None:
+            browser = self._acquire(self.lease_timeout if timeout is None else timeout)
+            if browser is None:
+                browser = self._start()
+            elif not self._healthy(browser):
+                print("♻️ Browser failed its health check, replacing it")
+                self._discard(browser)
+                browser = None
+        self.leases += 1
+        browser.uses += 1
+        try:
+            browser.driver.switch_to.new_window("tab")
+            yield browser.driver
+        finally:
+            self._release(browser)
+
+    def _release(self, browser):
+        try:
+            driver = browser.driver
+            for handle in driver.window_handles:
+                if handle != browser.base_handle:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(browser.base_handle)
+            if self.clear_cookies:
+                if hasattr(driver, "execute_cdp_cmd"):
+                    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})  # every domain
+                else:
+                    driver.delete_all_cookies()  # current page's domain only
+        except Exception:
+            self._discard(browser)  # crashed or hung mid-lease
+            return
+        if browser.uses >= self.max_uses:
+            self._discard(browser)
+            return
+        browser.idle_since = time.monotonic()
+        with self._cond:
+            self._idle.append(browser)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            self._discard(browser)
+
+    def stats(self):
+        with self._cond:
+            return {"live": self._live, "idle": len(self._idle), "size": self.size, "created": self.created,
+                    "recycled": self.recycled, "leases": self.leases}
+
+
+def get_pool(name: str, factory, size: int = None, max_uses: int = None, clear_cookies: bool = True):
+    """Process-wide pool for `name`, created on first use; sized by BROWSER_POOL_SIZE / BROWSER_MAX_USES."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = BrowserPool(factory,
+                                   size=int(_env('BROWSER_POOL_SIZE', 4)) if size is None else size,
+                                   max_uses=int(_env('BROWSER_MAX_USES', 50)) if max_uses is None else max_uses,
+                                   idle_timeout=_env('BROWSER_IDLE_TIMEOUT', 300),
+                                   lease_timeout=_env('BROWSER_LEASE_TIMEOUT', 30),
+                                   clear_cookies=clear_cookies)
+                _pools[name] = pool
+    return pool
+
+
+def close_all():
+    with _lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all)  # don't leave Chrome processes behind
@@ -0,0 +1,170 @@
+"""Near-duplicate detection for knowledge base content (MinHash signatures + LSH buckets)."""
+import json
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from knowledge_index import tokenize
+
+_PRIME = 4294967291  # largest prime below 2**32, so a * x + b never overflows uint64
+
+
+def shingles(text: str, size: int = 3):
+    """Hashes of overlapping word `size`-grams (whole text if it is shorter)."""
+    words = re.findall(r"\w+", text.lower())
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHashLSH:
+    """
+    MinHash signature per topic, bucketed by bands so that a lookup only
+    compares against topics sharing at least one band (candidates), never the
+    whole knowledge base. With 16 bands of 4 rows, pairs above ~0.7 Jaccard
+    similarity collide with near certainty.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8, seed: int = 1):
+        assert num_perm % bands == 0
+        self.num_perm, self.bands, self.threshold = num_perm, bands, threshold
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)[:, None]
+        self.signatures = {}  # topic -> signature
+        self.buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def signature(self, content: str):
+        hashes = shingles(content)
+        if not len(hashes):
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        return ((self._a * hashes[None, :] + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, topic: str, content: str):
+        self.remove(topic)
+        sig = self.signature(content)
+        self.signatures[topic] = sig
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            band.setdefault(key, set()).add(topic)
+
+    def remove(self, topic: str):
+        sig = self.signatures.pop(topic, None)
+        if sig is None:
+            return
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(topic)
+                if not bucket:
+                    del band[key]
+
+    def query(self, content: str, exclude: str = None):
+        """Returns [(estimated Jaccard similarity, topic)] at or above the threshold, best first."""
+        sig = self.signature(content)
+        candidates = set()
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            candidates |= band.get(key, set())
+        candidates.discard(exclude)
+        matches = []
+        for topic in candidates:
+            similarity = float(np.mean(self.signatures[topic] == sig))
+            if similarity >= self.threshold:
+                matches.append((similarity, topic))
+        matches.sort(reverse=True)
+        return matches
+
+    def duplicate_groups(self):
+        """Groups of topics whose content is a near-duplicate of each other (transitively)."""
+        parent = {topic: topic for topic in self.signatures}
+
+        def find(topic):
+            while parent[topic] != topic:
+                parent[topic] = parent[parent[topic]]
+                topic = parent[topic]
+            return topic
+
+        for band in self.buckets:
+            for bucket in band.values():
+                if len(bucket) < 2:
+                    continue
+                members = list(bucket)
+                for other in members[1:]:
+                    if float(np.mean(self.signatures[members[0]] == self.signatures[other])) >= self.threshold:
+                        parent[find(other)] = find(members[0])
+        groups = {}
+        for topic in self.signatures:
+            groups.setdefault(find(topic), []).append(topic)
+        return [group for group in groups.values() if len(group) > 1]
+
+
+def topics_overlap(a: str, b: str):
+    """True if two topics share a word (stop words aside); similar content alone is not enough to alias them."""
+    return bool(set(tokenize(a)) & set(tokenize(b)))
+
+
+class TopicAliases:
+    """
+    Topic -> canonical topic for content merged into another topic, so asking the
+    merged query again still finds the knowledge. Kept in an append-only JSON-lines
+    file; a topic merged away later moves its own aliases along with it.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.aliases = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        if "removed" in entry:
+                            self._drop(entry["removed"])
+                        else:
+                            self._apply(entry["alias"], entry["canonical"])
+                    except (ValueError, KeyError):
+                        continue  # torn last line
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def _apply(self, alias, canonical):
+        # Keys are lowercased like retrieve_knowledge's lookups, targets are knowledge base keys
+        if alias == canonical:
+            return
+        for key, target in self.aliases.items():
+            if target == alias:
+                self.aliases[key] = canonical
+        self.aliases[alias.lower()] = canonical
+
+    def _drop(self, topic):
+        self.aliases = {key: target for key, target in self.aliases.items()
+                        if key != topic.lower() and target != topic}
+
+    def _log(self, entry):
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def add(self, alias: str, canonical: str):
+        with self._lock:
+            self._apply(alias, canonical)
+            self._log({"alias": alias, "canonical": canonical})
+
+    def remove(self, topic: str):
+        """Forgets a deleted topic: its own alias and every alias that resolved to it."""
+        with self._lock:
+            if topic.lower() in self.aliases or topic in self.aliases.values():
+                self._drop(topic)
+                self._log({"removed": topic})
+
+    def resolve(self, topic: str):
+        """The canonical topic `topic` was merged into, or None."""
+        return self.aliases.get(topic.lower())
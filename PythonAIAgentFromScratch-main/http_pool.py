@@ -0,0 +1,139 @@
+"""Shared keep-alive HTTP sessions for provider and tool calls."""
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+# Settings are read on use, not at import, so values loaded later by load_dotenv() apply
+def _env(name, default):
+    return float(os.getenv(name, default))
+
+
+def timeout(read: float = None):
+    """(connect, read) timeout tuple for requests."""
+    return (_env('HTTP_CONNECT_TIMEOUT', 5), _env('HTTP_READ_TIMEOUT', 30) if read is None else read)
+
+
+def max_retry_after():
+    """Longest Retry-After worth waiting for; past it the caller fails over instead."""
+    return _env('HTTP_MAX_RETRY_AFTER', 5)
+
+
+class FailoverRetry(Retry):
+    """
+    Retry that waits out a short Retry-After but gives up at once, returning the
+    429/503 response, when the server asks for more than `max_retry_after` seconds
+    (a provider answering "Retry-After: 3600" would otherwise park the request).
+    """
+    max_retry_after = 5.0
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            wait = self.get_retry_after(response)
+            if wait is not None and wait > self.max_retry_after:
+                # Caught by urllib3, which hands back the response as raise_on_status is off
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {wait:.0f}s is over {self.max_retry_after:.0f}s"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _build_session(pool_size, retries, backoff):
+    retry = FailoverRetry(
+        total=retries,
+        connect=retries,
+        read=0,  # a read timeout means the server may have done the work, don't resend
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,  # provider calls are POSTs, retry them on 429/5xx too
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    retry.max_retry_after = max_retry_after()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name: str = "default", pool_size: int = None, retries: int = None, backoff: float = None):
+    """
+    Process-wide session for `name`, created on first use. Connections are kept
+    alive and reused by every caller, so repeated calls to the same host skip the
+    TCP + TLS handshake. urllib3's connection pool is thread-safe.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _build_session(int(_env('HTTP_POOL_SIZE', 10)) if pool_size is None else pool_size,
+                                         int(_env('HTTP_RETRIES', 2)) if retries is None else retries,
+                                         _env('HTTP_BACKOFF', 0.5) if backoff is None else backoff)
+                _sessions[name] = session
+    return session
+
+
+def close_all():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# --- asyncio ---
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def get_async_client():
+    """
+    httpx.AsyncClient for the running event loop, created on first use. An async
+    client's connections belong to one loop, so each loop gets its own pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        connect, read = timeout()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=int(_env('HTTP_ASYNC_MAX_CONNECTIONS', 200)),
+                                max_keepalive_connections=int(_env('HTTP_POOL_SIZE', 10))),
+            transport=httpx.AsyncHTTPTransport(retries=int(_env('HTTP_RETRIES', 2))),  # connect errors only
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def apost(client, url: str, retries: int = None, backoff: float = None, **kwargs):
+    """
+    POST with the sync sessions' policy: 429/5xx retried with exponential backoff, a
+    Retry-After up to max_retry_after() honoured, a longer one returned at once.
+    """
+    retries = int(_env('HTTP_RETRIES', 2)) if retries is None else retries
+    backoff = _env('HTTP_BACKOFF', 0.5) if backoff is None else backoff
+    for attempt in range(retries + 1):
+        response = await client.post(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        retry_after = response.headers.get("Retry-After", "").strip()
+        wait = float(retry_after) if retry_after.isdigit() else backoff * 2 ** attempt
+        if wait > max_retry_after():
+            return response  # fail over rather than hold this task on the shared loop
+        await response.aclose()
+        await asyncio.sleep(wait)
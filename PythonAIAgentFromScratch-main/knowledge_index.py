@@ -0,0 +1,221 @@
+"""In-memory indexes over the knowledge base used by main.retrieve_knowledge."""
+from array import array
+from collections import Counter
+import math
+import re
+import threading
+import numpy as np
+
+STOP_WORDS = {'what', 'is', 'the', 'of', 'and', 'a', 'in', 'to', 'it', 'can', 'you', 'for', 'on', 'with', 'as', 'provide'}
+OVERLAP_THRESHOLD = 0.8
+
+
+def query_terms(query: str):
+    """Distinct lowercase query words with stop words removed."""
+    return set(query.lower().split()) - STOP_WORDS
+
+def tokenize(text: str):
+    """Lowercase word tokens without punctuation or stop words (used by BM25)."""
+    return [w for w in re.findall(r"\w+", text.lower()) if w not in STOP_WORDS]
+
+
+class TopicIndex:
+    """
+    Inverted index from topic word to topics.
+    Scoring only touches topics that share at least one word with the query,
+    instead of splitting every topic in the knowledge base on every call.
+    """
+
+    def __init__(self, topics=()):
+        self.postings = {}  # word -> set of topics
+        self.order = {}     # topic -> insertion sequence, mirrors dict order of knowledge_base
+        self._seq = 0
+        for topic in topics:
+            self.add(topic)
+
+    def add(self, topic: str):
+        # Updating an existing topic keeps its position, exactly like a dict assignment
+        if topic in self.order:
+            return
+        self.order[topic] = self._seq
+        self._seq += 1
+        for word in set(topic.lower().split()):
+            self.postings.setdefault(word, set()).add(topic)
+
+    def remove(self, topic: str):
+        if self.order.pop(topic, None) is None:
+            return
+        for word in set(topic.lower().split()):
+            bucket = self.postings.get(word)
+            if bucket is not None:
+                bucket.discard(topic)
+                if not bucket:
+                    del self.postings[word]
+
+    def candidates(self, words):
+        found = set()
+        for word in words:
+            found |= self.postings.get(word, set())
+        return found
+
+    def search(self, words, n_results: int = 2, threshold: float = OVERLAP_THRESHOLD):
+        """
+        Returns [(score, topic)] best first, where score is the fraction of query
+        words found in the topic. Ties keep knowledge base order.
+        """
+        if not words:
+            return []
+        scored = []
+        for topic in sorted(self.candidates(words), key=self.order.__getitem__):
+            score = len(words.intersection(topic.lower().split())) / len(words)
+            if score >= threshold:
+                scored.append((score, topic))
+        scored.sort(reverse=True, key=lambda x: x[0])
+        return scored[:n_results]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over topic + content. Postings are kept as typed arrays per term
+    and scored with NumPy, so a query only loops over its own terms; summing and
+    top-k selection are vectorized. Doc ids are never reused: deleted docs are
+    masked out and the postings are compacted once most of them are dead.
+    Searches copy the postings they need under a lock, so writers may add and
+    remove docs while queries are being scored.
+    """
+
+    def __init__(self, items=(), k1: float = 1.5, b: float = 0.75, topic_boost: int = 2):
+        self.k1, self.b, self.topic_boost = k1, b, topic_boost
+        self.vocab = {}       # term -> term id
+        self.post_ids = []    # term id -> array('i') of doc ids
+        self.post_tf = []     # term id -> array('f') of term frequencies
+        self.doc_ids = {}     # topic -> doc id
+        self.topics = []      # doc id -> topic (None once deleted)
+        self.doc_len = np.zeros(1024, dtype=np.float32)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.total_len = 0.0
+        self._lock = threading.Lock()
+        for topic, content in items:
+            self.add(topic, content)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _terms(self, topic, content):
+        # Topic words weigh more than words buried in a long research report
+        return tokenize(topic) * self.topic_boost + tokenize(content)
+
+    def add(self, topic: str, content: str):
+        terms = self._terms(topic, content)
+        counts = Counter(terms).items()
+        with self._lock:
+            if topic in self.doc_ids:
+                self._remove(topic)
+            doc = len(self.topics)
+            if doc >= len(self.alive):
+                self.doc_len = np.concatenate([self.doc_len, np.zeros(len(self.doc_len), dtype=np.float32)])
+                self.alive = np.concatenate([self.alive, np.zeros(len(self.alive), dtype=bool)])
+            for term, tf in counts:
+                tid = self.vocab.get(term)
+                if tid is None:
+                    tid = self.vocab[term] = len(self.post_ids)
+                    self.post_ids.append(array('i'))
+                    self.post_tf.append(array('f'))
+                self.post_ids[tid].append(doc)
+                self.post_tf[tid].append(tf)
+            self.doc_ids[topic] = doc
+            self.topics.append(topic)
+            self.doc_len[doc] = len(terms)
+            self.alive[doc] = True
+            self.total_len += len(terms)
+
+    def remove(self, topic: str):
+        with self._lock:
+            self._remove(topic)
+
+    def _remove(self, topic):
+        doc = self.doc_ids.pop(topic, None)
+        if doc is None:
+            return
+        self.alive[doc] = False
+        self.topics[doc] = None
+        self.total_len -= float(self.doc_len[doc])
+        dead = len(self.topics) - len(self.doc_ids)
+        if dead > 1000 and dead > len(self.doc_ids):
+            self._compact()
+
+    def _compact(self):
+        """Drops postings of deleted docs and renumbers the survivors."""
+        n = len(self.topics)
+        keep_docs = np.flatnonzero(self.alive[:n])
+        remap = np.full(n, -1, dtype=np.int32)
+        remap[keep_docs] = np.arange(len(keep_docs), dtype=np.int32)
+        vocab, post_ids, post_tf = {}, [], []
+        for term, tid in self.vocab.items():
+            new_ids = remap[np.frombuffer(self.post_ids[tid], dtype=np.int32)]
+            keep = new_ids >= 0
+            if not keep.any():
+                continue
+            vocab[term] = len(post_ids)
+            post_ids.append(array('i', new_ids[keep].tobytes()))
+            post_tf.append(array('f', np.frombuffer(self.post_tf[tid], dtype=np.float32)[keep].tobytes()))
+        self.vocab, self.post_ids, self.post_tf = vocab, post_ids, post_tf
+        self.topics = [self.topics[d] for d in keep_docs]
+        self.doc_ids = {topic: d for d, topic in enumerate(self.topics)}
+        size = max(1024, len(self.topics) * 2)
+        doc_len = np.zeros(size, dtype=np.float32)
+        doc_len[:len(keep_docs)] = self.doc_len[keep_docs]
+        alive = np.zeros(size, dtype=bool)
+        alive[:len(keep_docs)] = True
+        self.doc_len, self.alive = doc_len, alive
+
+    def _snapshot(self, terms):
+        """Copies of the query terms' postings and the doc stats, taken while no writer runs."""
+        with self._lock:
+            postings = {}
+            for term in terms:
+                tid = self.vocab.get(term)
+                if tid is not None:
+                    postings[term] = (np.array(self.post_ids[tid], dtype=np.int32),
+                                      np.array(self.post_tf[tid], dtype=np.float32))
+            n = len(self.topics)
+            return (postings, len(self.doc_ids), self.total_len, self.alive[:n].copy(),
+                    self.doc_len[:n].copy(), list(self.topics))
+
+    def search(self, query: str, n_results: int = 2, threshold: float = 0.5):
+        """
+        Returns [(score, topic)] best first. Scores are BM25 divided by the most the
+        query's terms could score (each term at most idf * (k1 + 1)), so they lie in
+        [0, 1] and a document matching only part of the query scores only part of it.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        postings, n_docs, total_len, alive, doc_len, topics = self._snapshot(terms)
+        if not n_docs:
+            return []
+        avgdl = max(total_len / n_docs, 1.0)
+        norm = 0.0
+        ids_parts, score_parts = [], []
+        for term in terms:
+            ids, tf = postings.get(term, (np.empty(0, dtype=np.int32), None))
+            if len(ids):
+                live = alive[ids]
+                ids, tf = ids[live], tf[live]
+            df = len(ids)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm += idf * (self.k1 + 1)
+            if df:
+                dl = doc_len[ids]
+                ids_parts.append(ids)
+                score_parts.append(idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl)))
+        if not ids_parts:
+            return []
+        docs, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)) / norm
+        hits = np.flatnonzero(scores >= threshold)
+        if len(hits) > n_results:
+            hits = hits[np.argpartition(-scores[hits], n_results - 1)[:n_results]]
+        # Best score first; ties keep insertion order (docs are sorted by id)
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        return [(float(scores[h]), topics[docs[h]]) for h in hits]
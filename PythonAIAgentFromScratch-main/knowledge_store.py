@@ -0,0 +1,654 @@
+"""Persistent storage backends for the knowledge base used by main.py."""
+from collections.abc import Mapping
+from contextlib import contextmanager
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+from knowledge_index import OVERLAP_THRESHOLD, tokenize
+
+
+class JournalStore:
+    """
+    knowledge.json snapshot plus an append-only journal of put/delete records.
+    Writes append one line instead of rewriting the whole file; the journal is
+    folded back into the snapshot by a background compaction every
+    `compact_every` records. Loading replays snapshot + journal, so a crash at
+    any point loses at most the record that was being written.
+    """
+
+    def __init__(self, path: str, compact_every: int = 500):
+        self.path = path
+        self.journal_path = path + ".journal"
+        # Journal being folded into the snapshot; replayed too if a compaction died midway
+        self.compacting_path = path + ".journal.compacting"
+        self.compact_every = compact_every
+        self.data = {}
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._journal = None
+        self._records = 0
+        self._compacting = False
+        self._compactor = None  # the background compaction thread, if one was started
+        self._paused = 0
+
+    # --- Loading ---
+    def _read_snapshot(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def _replay(self, data, journal_path):
+        """Applies journal records to data. Returns (records applied, bytes of complete lines)."""
+        applied, good_bytes = 0, 0
+        try:
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn write at the tail
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        good_bytes += len(line)
+                        continue
+                    if record.get("op") == "put":
+                        data[record["topic"]] = record["content"]
+                    elif record.get("op") == "del":
+                        data.pop(record["topic"], None)
+                    applied += 1
+                    good_bytes += len(line)
+        except FileNotFoundError:
+            pass
+        return applied, good_bytes
+
+    def read(self):
+        """Fresh copy of the knowledge base as currently persisted on disk."""
+        data = self._read_snapshot()
+        self._replay(data, self.compacting_path)
+        self._replay(data, self.journal_path)
+        return data
+
+    def load(self):
+        """Loads snapshot + journal into self.data and opens the journal for appending."""
+        with self._lock:
+            data = self._read_snapshot()
+            self._replay(data, self.compacting_path)
+            self._records, good_bytes = self._replay(data, self.journal_path)
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > good_bytes:
+                # Drop a torn tail so the next append starts on a fresh line
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good_bytes)
+            self.data = data
+            if os.path.exists(self.compacting_path):
+                # A previous compaction never finished: fold it in before anything else rotates
+                self._write_snapshot(dict(data))
+                os.remove(self.compacting_path)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self.data
+
+    def recent_topics(self, n: int = 10):
+        return list(self.data)[-n:]
+
+    # --- Writing ---
+    def _append(self, record):
+        self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        self._records += 1
+
+    def _maybe_compact(self):
+        if self._records >= self.compact_every and not self._compacting and not self._paused:
+            self._compacting = True
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+
+    @contextmanager
+    def pause_compaction(self):
+        """
+        No background compaction while the block runs (a bulk load would otherwise
+        rewrite the whole snapshot every `compact_every` records); one runs after it if due.
+        """
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                self._maybe_compact()
+
+    def put(self, topic: str, content: str):
+        with self._lock:
+            self.data[topic] = content
+            self._append({"op": "put", "topic": topic, "content": content})
+            self._maybe_compact()
+
+    def put_many(self, items):
+        """Journals a batch of (topic, content) with a single write + flush."""
+        items = list(items)
+        with self._lock:
+            lines = []
+            for topic, content in items:
+                self.data[topic] = content
+                lines.append(json.dumps({"op": "put", "topic": topic, "content": content}) + "\n")
+            self._journal.write("".join(lines))
+            self._journal.flush()
+            self._records += len(items)
+            self._maybe_compact()
+
+    def delete(self, topic: str):
+        with self._lock:
+            if topic not in self.data:
+                return False
+            del self.data[topic]
+            self._append({"op": "del", "topic": topic})
+            self._maybe_compact()
+            return True
+
+    # --- Compaction ---
+    def _write_snapshot(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def compact(self):
+        """Writes the current data as the new snapshot and discards the folded journal."""
+        with self._compact_lock:
+            try:
+                with self._lock:
+                    self._compacting = True
+                    if self._journal is not None:
+                        self._journal.close()
+                    if os.path.exists(self.journal_path):
+                        if os.path.exists(self.compacting_path):
+                            # An earlier compaction failed: its records stay, this journal goes after them
+                            with open(self.journal_path, "rb") as src, open(self.compacting_path, "ab") as dst:
+                                shutil.copyfileobj(src, dst)
+                            os.remove(self.journal_path)
+                        else:
+                            os.replace(self.journal_path, self.compacting_path)
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                    self._records = 0
+                    snapshot = dict(self.data)
+                # Slow part runs outside the lock; new writes go to the fresh journal meanwhile
+                self._write_snapshot(snapshot)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+            except Exception as e:
+                print(f"❌ Knowledge compaction failed: {e}")
+            finally:
+                self._compacting = False
+
+
+# --- SQLite / FTS5 backend ---
+# Statements are module constants so sqlite3's per-connection statement cache
+# reuses the compiled (prepared) statement on every call.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge (id INTEGER PRIMARY KEY, topic TEXT UNIQUE NOT NULL, content TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(topic, content, content='knowledge', content_rowid='id');
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_terms USING fts5vocab(knowledge_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS knowledge_ai AFTER INSERT ON knowledge BEGIN
+    INSERT INTO knowledge_fts(rowid, topic, content) VALUES (new.id, new.topic, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS knowledge_ad AFTER DELETE ON knowledge BEGIN
+    INSERT INTO knowledge_fts(knowledge_fts, rowid, topic, content) VALUES ('delete', old.id, old.topic, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS knowledge_au AFTER UPDATE ON knowledge BEGIN
+    INSERT INTO knowledge_fts(knowledge_fts, rowid, topic, content) VALUES ('delete', old.id, old.topic, old.content);
+    INSERT INTO knowledge_fts(rowid, topic, content) VALUES (new.id, new.topic, new.content);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+SQL_GET = "SELECT content FROM knowledge WHERE topic = ?"
+SQL_COUNT = "SELECT COUNT(*) FROM knowledge"
+SQL_TOPICS = "SELECT topic FROM knowledge ORDER BY id"
+SQL_RECENT = "SELECT topic FROM knowledge ORDER BY id DESC LIMIT ?"
+# Upsert keeps the row id, so an updated topic keeps its position like a dict assignment
+SQL_PUT = "INSERT INTO knowledge(topic, content) VALUES (?, ?) ON CONFLICT(topic) DO UPDATE SET content = excluded.content"
+SQL_DELETE = "DELETE FROM knowledge WHERE topic = ?"
+SQL_MATCH_TOPICS = "SELECT knowledge.topic FROM knowledge_fts JOIN knowledge ON knowledge.id = knowledge_fts.rowid WHERE knowledge_fts MATCH ? ORDER BY knowledge.id"
+SQL_BM25 = ("SELECT knowledge.topic, -bm25(knowledge_fts, 2.0, 1.0) AS score FROM knowledge_fts "
+            "JOIN knowledge ON knowledge.id = knowledge_fts.rowid WHERE knowledge_fts MATCH ? ORDER BY score DESC LIMIT ?")
+SQL_DOC_FREQ = "SELECT doc FROM knowledge_terms WHERE term = ?"
+FTS_K1 = 1.2
+
+
+def _fts_phrase(text: str):
+    """FTS5 phrase for the word characters of `text`, or None if it has none."""
+    tokens = re.findall(r"\w+", text.lower())
+    return '"' + " ".join(tokens) + '"' if tokens else None
+
+
+class SQLiteKnowledge(Mapping):
+    """Read-only dict view over the knowledge table; nothing is held in memory."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, topic):
+        row = self._store.conn().execute(SQL_GET, (topic,)).fetchone()
+        if row is None:
+            raise KeyError(topic)
+        return row[0]
+
+    def __iter__(self):
+        for (topic,) in self._store.conn().execute(SQL_TOPICS):
+            yield topic
+
+    def __len__(self):
+        return self._store.conn().execute(SQL_COUNT).fetchone()[0]
+
+
+class SQLiteStore:
+    """
+    Knowledge base in SQLite with an FTS5 index over topic and content.
+    WAL mode lets any number of server processes read while one writes, and
+    memory stays flat because content is only fetched for the rows a query needs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = SQLiteKnowledge(self)
+        self._local = threading.local()
+
+    def conn(self):
+        # sqlite3 connections are per thread; each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, migrate_from: str = None):
+        """Creates the schema and, once, imports an existing knowledge.json (+ journal)."""
+        conn = self.conn()
+        with conn:
+            conn.executescript(SCHEMA)
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+        return self.data
+
+    def read(self):
+        return self.data
+
+    def migrate_from_json(self, json_path: str):
+        conn = self.conn()
+        with conn:
+            done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+            source = JournalStore(json_path)
+            if done or not (os.path.exists(source.path) or os.path.exists(source.journal_path)):
+                return 0
+            data = source.read()
+            conn.executemany(SQL_PUT, data.items())
+            conn.execute("INSERT INTO meta(key, value) VALUES ('migrated_from', ?)", (os.path.abspath(json_path),))
+        print(f"✅ Migrated {len(data)} topics from {json_path} to {self.path}")
+        return len(data)
+
+    def recent_topics(self, n: int = 10):
+        return [topic for (topic,) in self.conn().execute(SQL_RECENT, (n,))][::-1]
+
+    def put(self, topic: str, content: str):
+        conn = self.conn()
+        with conn:
+            conn.execute(SQL_PUT, (topic, content))
+
+    def put_many(self, items):
+        """Stores a batch of (topic, content) in one transaction."""
+        conn = self.conn()
+        with conn:
+            conn.executemany(SQL_PUT, items)
+
+    def delete(self, topic: str):
+        conn = self.conn()
+        with conn:
+            return conn.execute(SQL_DELETE, (topic,)).rowcount > 0
+
+    def compact(self):
+        self.conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @contextmanager
+    def pause_compaction(self):
+        yield  # SQLite checkpoints the WAL on its own
+
+
+class FTSTopicIndex:
+    """TopicIndex for SQLiteStore: FTS5 finds candidate topics, scoring is the same word overlap."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, topic):
+        pass  # kept in sync by the knowledge table triggers
+
+    def remove(self, topic):
+        pass
+
+    def search(self, words, n_results: int = 2, threshold: float = OVERLAP_THRESHOLD):
+        phrases = [p for p in map(_fts_phrase, words) if p]
+        if not phrases:
+            return []
+        scored = []
+        for (topic,) in self.store.conn().execute(SQL_MATCH_TOPICS, ("topic : (" + " OR ".join(phrases) + ")",)):
+            score = len(words.intersection(topic.lower().split())) / len(words)
+            if score >= threshold:
+                scored.append((score, topic))
+        scored.sort(reverse=True, key=lambda x: x[0])
+        return scored[:n_results]
+
+
+class FTSBM25Index:
+    """BM25Index for SQLiteStore, ranked by FTS5's bm25() and normalised the same way."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, topic, content):
+        pass
+
+    def remove(self, topic):
+        pass
+
+    def search(self, query: str, n_results: int = 2, threshold: float = 0.5):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        conn = self.store.conn()
+        n_docs = conn.execute(SQL_COUNT).fetchone()[0]
+        norm = 0.0
+        for term in terms:
+            row = conn.execute(SQL_DOC_FREQ, (term,)).fetchone()
+            df = row[0] if row else 0
+            # FTS5's own IDF, floored the same way as sqlite's bm25(), times the most one
+            # term can score (k1 + 1, FTS5 uses k1 = 1.2)
+            norm += max(math.log((n_docs - df + 0.5) / (df + 0.5)), 1e-6) * (FTS_K1 + 1)
+        match = " OR ".join('"' + term + '"' for term in terms)
+        hits = []
+        for topic, score in conn.execute(SQL_BM25, (match, n_results)):
+            score = score / norm
+            if score >= threshold:
+                hits.append((score, topic))
+        return hits
+
+
+# --- Memory-mapped backend ---
+DATA_MAGIC = b"KBDAT1"
+DATA_HEADER = struct.Struct("<6sQ")    # magic, generation (changes when the file is rewritten)
+DATA_RECORD = struct.Struct("<BII")    # op, topic bytes, content bytes
+OP_DEL, OP_PUT = 0, 1
+
+
+class MmapKnowledge(Mapping):
+    """Read-only dict view: topics are in memory, content is decoded from the mapped file on access."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, topic):
+        return self._store.content(topic)
+
+    def __contains__(self, topic):
+        return topic in self._store.index
+
+    def __iter__(self):
+        return iter(list(self._store.index))
+
+    def __len__(self):
+        return len(self._store.index)
+
+
+class MmapStore:
+    """
+    Only topics and (offset, length) pairs stay resident; content lives in an
+    append-only data file that is memory-mapped and decoded per lookup, so
+    retrieval touches content only for the top-k hits it returns.
+
+    The data file is a log of put/delete records and is the source of truth.
+    `<data>.idx` caches the topic offsets up to a known file position, so a
+    restart only scans records written after the last compaction.
+    """
+
+    def __init__(self, path: str, compact_every: int = 5000):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.compact_every = compact_every
+        self.index = {}           # topic -> (content offset, content length)
+        self.data = MmapKnowledge(self)
+        self._lock = threading.RLock()
+        self._writer = None
+        self._reader = None
+        self._mm = None
+        self._generation = 0
+        self._live_bytes = 0
+        self._records = 0         # records written since the index cache was saved
+        self._compacting = False
+        self._compact_lock = threading.Lock()  # one compaction at a time; _lock is only held to swap files
+        self._paused = 0
+
+    # --- Loading ---
+    def _scan(self, start: int, end: int):
+        """Applies records in [start, end) to self.index; returns where the last complete record ends."""
+        pos = start
+        with open(self.path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                while pos + DATA_RECORD.size <= end:
+                    op, topic_len, content_len = DATA_RECORD.unpack_from(buf, pos)
+                    body = pos + DATA_RECORD.size
+                    if body + topic_len + content_len > end:
+                        break  # torn write at the tail
+                    topic = buf[body:body + topic_len].decode("utf-8")
+                    if op == OP_PUT:
+                        self.index[topic] = (body + topic_len, content_len)
+                    else:
+                        self.index.pop(topic, None)
+                    pos = body + topic_len + content_len
+            finally:
+                buf.close()
+        return pos
+
+    def load(self, migrate_from: str = None):
+        """Opens the data file, restores the index and, once, imports an existing knowledge.json."""
+        with self._lock:
+            created = not os.path.exists(self.path)
+            if created:
+                with open(self.path, "wb") as f:
+                    f.write(DATA_HEADER.pack(DATA_MAGIC, int.from_bytes(os.urandom(8), "little")))
+            with open(self.path, "rb") as f:
+                magic, self._generation = DATA_HEADER.unpack(f.read(DATA_HEADER.size))
+            if magic != DATA_MAGIC:
+                raise ValueError(f"{self.path} is not a knowledge data file")
+
+            start = DATA_HEADER.size
+            try:
+                with open(self.index_path, "r") as f:
+                    cached = json.load(f)
+                if cached["generation"] == self._generation:
+                    index = {topic: tuple(loc) for topic, loc in cached["index"].items()}
+                    self.index, start = index, cached["end"]
+            except:
+                self.index = {}
+            size = os.path.getsize(self.path)
+            end = self._scan(start, size)
+            if end < size:
+                with open(self.path, "r+b") as f:
+                    f.truncate(end)
+            self._live_bytes = sum(length for _, length in self.index.values())
+            self._writer = open(self.path, "ab")
+            self._reader = open(self.path, "rb")
+            self._remap()
+
+        if created and migrate_from:
+            source = JournalStore(migrate_from)
+            data = source.read()
+            if data:
+                for topic, content in data.items():
+                    self.put(topic, content)
+                self.compact()
+                print(f"✅ Migrated {len(data)} topics from {migrate_from} to {self.path}")
+        return self.data
+
+    def read(self):
+        return self.data
+
+    def recent_topics(self, n: int = 10):
+        return list(self.index)[-n:]
+
+    # --- Reading ---
+    def _remap(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def content(self, topic: str):
+        with self._lock:
+            offset, length = self.index[topic]
+            if offset + length > len(self._mm):
+                self._remap()  # the file grew since it was mapped
+            return self._mm[offset:offset + length].decode("utf-8")
+
+    # --- Writing ---
+    def _append(self, op, topic, content=b"", flush=True):
+        topic_bytes = topic.encode("utf-8")
+        offset = self._writer.tell() + DATA_RECORD.size + len(topic_bytes)
+        self._writer.write(DATA_RECORD.pack(op, len(topic_bytes), len(content)) + topic_bytes + content)
+        if flush:
+            self._writer.flush()
+        self._records += 1
+        return offset
+
+    def _maybe_compact(self):
+        if self._records >= self.compact_every and not self._compacting and not self._paused:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    @contextmanager
+    def pause_compaction(self):
+        """As JournalStore.pause_compaction: the index cache is saved once, after the block."""
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                self._maybe_compact()
+
+    def put(self, topic: str, content: str):
+        self.put_many([(topic, content)])
+
+    def put_many(self, items):
+        """Appends a batch of (topic, content) with a single flush."""
+        with self._lock:
+            for topic, content in items:
+                content_bytes = content.encode("utf-8")
+                old = self.index.get(topic)
+                offset = self._append(OP_PUT, topic, content_bytes, flush=False)
+                self.index[topic] = (offset, len(content_bytes))
+                self._live_bytes += len(content_bytes) - (old[1] if old else 0)
+            self._writer.flush()
+            self._maybe_compact()
+
+    def delete(self, topic: str):
+        with self._lock:
+            old = self.index.pop(topic, None)
+            if old is None:
+                return False
+            self._append(OP_DEL, topic)
+            self._live_bytes -= old[1]
+            self._maybe_compact()
+            return True
+
+    # --- Compaction ---
+    def compact(self):
+        """Rewrites the data file without dead records when they dominate, then saves the index cache."""
+        try:
+            with self._compact_lock:
+                self._compacting = True
+                with self._lock:
+                    size = self._writer.tell()
+                    rewrite = size - DATA_HEADER.size > 2 * self._live_bytes + (1 << 20)
+                if rewrite:
+                    self._rewrite()
+                with self._lock:
+                    cache = {"generation": self._generation, "end": self._writer.tell(),
+                             "index": {topic: list(loc) for topic, loc in self.index.items()}}
+                    self._records = 0
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(cache, f)
+                os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"❌ Knowledge compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def _rewrite(self):
+        """
+        Copies the live records to a new file without holding the lock, so reads and
+        writes go on meanwhile; records appended during the copy are carried over
+        as they are while the files are swapped under the lock.
+        """
+        generation = int.from_bytes(os.urandom(8), "little")
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            self._writer.flush()
+            end = self._writer.tell()
+            snapshot = dict(self.index)
+        moved = self._copy_live(snapshot, end, generation, tmp_path)
+        with self._lock:
+            self._writer.flush()
+            with open(self.path, "rb") as src, open(tmp_path, "ab") as out:
+                tail_start = out.tell()
+                src.seek(end)
+                shutil.copyfileobj(src, out)  # puts and deletes since the snapshot
+                out.flush()
+                os.fsync(out.fileno())
+            # Entries before `end` are unchanged since the snapshot; later ones moved with the tail
+            index = {topic: (moved[topic] if offset < end else offset - end + tail_start, length)
+                     for topic, (offset, length) in self.index.items()}
+            # Nothing may keep the old file mapped or open while it is replaced (Windows)
+            self._mm.close()
+            self._mm = None
+            self._writer.close()
+            self._reader.close()
+            os.replace(tmp_path, self.path)
+            self.index, self._generation = index, generation
+            self._writer = open(self.path, "ab")
+            self._reader = open(self.path, "rb")
+            self._remap()
+
+    def _copy_live(self, snapshot, end, generation, tmp_path):
+        """Writes the records in `snapshot` to tmp_path; returns topic -> new content offset."""
+        moved = {}
+        with open(self.path, "rb") as f, open(tmp_path, "wb") as out:
+            src = mmap.mmap(f.fileno(), end, access=mmap.ACCESS_READ)
+            try:
+                out.write(DATA_HEADER.pack(DATA_MAGIC, generation))
+                for topic, (offset, length) in snapshot.items():
+                    topic_bytes = topic.encode("utf-8")
+                    out.write(DATA_RECORD.pack(OP_PUT, len(topic_bytes), length) + topic_bytes)
+                    moved[topic] = out.tell()
+                    out.write(src[offset:offset + length])
+            finally:
+                src.close()
+        return moved
+
+
+if __name__ == "__main__":
+    # One-shot migration: python knowledge_store.py knowledge.json knowledge.db
+    if len(sys.argv) != 3:
+        print("Usage: python knowledge_store.py <knowledge.json> <knowledge.db>")
+        sys.exit(1)
+    SQLiteStore(sys.argv[2]).load(migrate_from=sys.argv[1])
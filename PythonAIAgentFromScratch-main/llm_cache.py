@@ -0,0 +1,73 @@
+"""Reuses LLM client objects and compiled ReAct agent graphs across requests."""
+import hashlib
+import os
+import threading
+
+
+def env_fingerprint(env_keys):
+    """Hash of the current values of `env_keys`, so a rotated API key is noticed without storing it."""
+    values = "\0".join(os.getenv(key, "") for key in env_keys)
+    return hashlib.sha256(values.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMCache:
+    """
+    One client per provider and one compiled agent per (provider, tool set, prompt).
+    Entries are tied to the fingerprint of the provider's env keys: when a key
+    changes, the old client and every agent built on it are dropped and rebuilt.
+    """
+
+    def __init__(self):
+        self._clients = {}  # provider name -> (fingerprint, client)
+        self._agents = {}   # (provider name, fingerprint, tool names, prompt hash) -> agent
+        self._lock = threading.Lock()
+        self.client_builds = self.agent_builds = 0
+
+    def client(self, name: str, factory, env_keys=()):
+        fingerprint = env_fingerprint(env_keys)
+        entry = self._clients.get(name)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        with self._lock:
+            entry = self._clients.get(name)
+            if entry is None or entry[0] != fingerprint:
+                if entry is not None:
+                    self._drop_agents(name)
+                entry = (fingerprint, factory())
+                self._clients[name] = entry
+                self.client_builds += 1
+            return entry[1]
+
+    def agent(self, name: str, llm, tools, prompt: str, build):
+        """Compiled agent for `llm`, built with `build()` on first use."""
+        entry = self._clients.get(name)
+        if entry is None or entry[1] is not llm:
+            return build()  # llm didn't come from this cache, nothing to key on
+        key = (name, entry[0], tuple(sorted(t.name for t in tools)),
+               hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        agent = self._agents.get(key)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(key)
+                if agent is None:
+                    agent = build()
+                    self._agents[key] = agent
+                    self.agent_builds += 1
+        return agent
+
+    def _drop_agents(self, name):
+        for key in [k for k in self._agents if k[0] == name]:
+            del self._agents[key]
+
+    def invalidate(self, name: str = None):
+        with self._lock:
+            if name is None:
+                self._clients.clear()
+                self._agents.clear()
+            else:
+                self._clients.pop(name, None)
+                self._drop_agents(name)
+
+    def stats(self):
+        return {"clients": len(self._clients), "agents": len(self._agents),
+                "client_builds": self.client_builds, "agent_builds": self.agent_builds}
@@ -7,6 +7,18 @@ from langchain_community.llms import Ollama
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
 from tools import search_tool, wiki_tool, save_tool, browse_tool, ai_chat_tool
+from knowledge_index import TopicIndex, BM25Index, query_terms
+from knowledge_store import JournalStore, SQLiteStore, MmapStore, FTSTopicIndex, FTSBM25Index
+from semantic_index import SemanticIndex
+from response_cache import ResponseCache
+from dedup import MinHashLSH, TopicAliases, topics_overlap
+import http_pool
+from provider_health import ProviderRegistry, HealthProbe, hedged_call, ahedged_call
+from llm_cache import LLMCache
+from spelling import SpellingCorrector
+from micro_batch import MicroBatcher
+from prompt_budget import PromptBudget
+from research_scheduler import ResearchBudget, AsyncResearchBudget
 import google.generativeai as genai
 import time
 import logging
@@ -14,38 +26,95 @@ import os
 import re
 import requests
 import math
-
+import csv
+import concurrent.futures
+import asyncio
+import threading
 import json
 
 load_dotenv()
 
 DISCOVERED_MODEL = "gemini-2.0-flash"
 DB_FILE = "knowledge.json"
+SQLITE_DB_FILE = os.getenv('KNOWLEDGE_DB', "knowledge.db")
+MMAP_DATA_FILE = os.getenv('KNOWLEDGE_DATA', "knowledge.dat")
+# "json": knowledge.json snapshot + append-only journal, held in memory
+# "sqlite": SQLite + FTS5, shared by every server process
+# "mmap": topics in memory, content paged in from a memory-mapped data file
+# (sqlite and mmap migrate knowledge.json on first use)
+KNOWLEDGE_BACKEND = os.getenv('KNOWLEDGE_BACKEND', 'json')
 
 # --- Knowledge Base ---
+if KNOWLEDGE_BACKEND == 'sqlite':
+    _store = SQLiteStore(SQLITE_DB_FILE)
+    knowledge_base = _store.load(migrate_from=DB_FILE)
+elif KNOWLEDGE_BACKEND == 'mmap':
+    _store = MmapStore(MMAP_DATA_FILE)
+    knowledge_base = _store.load(migrate_from=DB_FILE)
+else:
+    _store = JournalStore(DB_FILE)
+    knowledge_base = _store.load()
+
 def load_knowledge():
-    try:
-        with open(DB_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return {}
+    return _store.read()
+
+def recent_topics(n: int = 10):
+    return _store.recent_topics(n)
 
-knowledge_base = load_knowledge()
+# Rankers tried in order until one finds a match: "overlap" (topic words), "bm25" (topic + content)
+# and "semantic" (character n-gram similarity, catches paraphrases)
+KNOWLEDGE_RANKERS = [r.strip() for r in os.getenv('KNOWLEDGE_RANKERS', 'overlap').split(',') if r.strip()]
+if KNOWLEDGE_BACKEND == 'sqlite':
+    # Both are served by the FTS5 table, nothing to build in memory
+    topic_index = FTSTopicIndex(_store)
+    bm25_index = FTSBM25Index(_store)
+else:
+    topic_index = TopicIndex(knowledge_base)
+    bm25_index = BM25Index(knowledge_base.items()) if 'bm25' in KNOWLEDGE_RANKERS else None
+# The semantic and dedup indexes hold a vector / signature per topic in memory, built from
+# every content row; the sqlite backend goes without them so its memory stays flat
+semantic_index = None
+if 'semantic' in KNOWLEDGE_RANKERS:
+    if KNOWLEDGE_BACKEND == 'sqlite':
+        print("⚠️ The semantic ranker is not available with KNOWLEDGE_BACKEND=sqlite, skipping it")
+    else:
+        semantic_index = SemanticIndex(knowledge_base.items())
+
+# Near-duplicate research answers stored under different keys are merged into one topic.
+# Building the LSH reads every content row, which would undo mmap's lazy loading
+dedup_index = None
+if os.getenv('KNOWLEDGE_DEDUP', '1') != '0' and KNOWLEDGE_BACKEND not in ('sqlite', 'mmap'):
+    dedup_index = MinHashLSH(threshold=float(os.getenv('KNOWLEDGE_DEDUP_THRESHOLD', '0.8')))
+    for _topic, _content in knowledge_base.items(): dedup_index.add(_topic, _content)
+# Queries whose answer was merged into another topic, so asking them again still hits
+topic_aliases = TopicAliases(os.getenv('KNOWLEDGE_ALIASES', "knowledge_aliases.jsonl"))
+# Writers (requests, bulk training, the background dedupe) update the in-memory indexes
+# one at a time; the indexes themselves have no lock
+knowledge_lock = threading.RLock()
+# Character n-gram cosines run higher than normalized BM25 for loosely related text
+# ("who won 2019 ipl" vs "who is winner of 2016 ipl" is 0.51), so the semantic ranker
+# gets its own cut-off
+SEMANTIC_THRESHOLD = float(os.getenv('KNOWLEDGE_SEMANTIC_THRESHOLD', '0.6'))
 
 def save_knowledge():
-    try:
-        with open(DB_FILE, "w") as f:
-            json.dump(knowledge_base, f, indent=4)
-    except:
-        pass
+    """Folds the journal into a fresh snapshot (checkpoints the WAL for sqlite, drops dead records for mmap)."""
+    _store.compact()
 
 collection = None
 
-def retrieve_knowledge(query: str, n_results: int = 2, threshold: float = 0.5):
+def retrieve_knowledge(query: str, n_results: int = 2, threshold: float = 0.5, semantic_threshold: float = None):
+    """
+    Returns (joined content of the top n_results topics, best score in [0, 1]).
+    `threshold` is the minimum BM25 score and `semantic_threshold` the minimum semantic
+    one (SEMANTIC_THRESHOLD); the overlap ranker keeps its fixed 0.8 word overlap.
+    """
     query_lower = query.lower()
     # Prioritize exact matches
     if query_lower in knowledge_base:
         return knowledge_base[query_lower], 1.0
+    canonical = topic_aliases.resolve(query_lower)
+    if canonical is not None and canonical in knowledge_base:
+        return knowledge_base[canonical], 1.0
 
     # Special handling for "full form of" queries
     if query_lower.startswith("what is full form of "):
@@ -53,42 +122,187 @@ def retrieve_knowledge(query: str, n_results: int = 2, threshold: float = 0.5):
         if acronym in knowledge_base:
             return knowledge_base[acronym], 1.0
 
-    stop_words = {'what', 'is', 'the', 'of', 'and', 'a', 'in', 'to', 'it', 'can', 'you', 'for', 'on', 'with', 'as', 'provide'}
-    query_words = set(query_lower.split()) - stop_words
-    if not query_words: return "", 0.0
+    top_matches = []
+    for ranker in KNOWLEDGE_RANKERS:
+        if ranker == 'bm25':
+            top_matches = bm25_index.search(query_lower, n_results, threshold)
+        elif ranker == 'semantic':
+            if semantic_index is None: continue
+            top_matches = semantic_index.search(query_lower, n_results,
+                                                SEMANTIC_THRESHOLD if semantic_threshold is None else semantic_threshold)
+        else:
+            # Only topics sharing a word with the query are scored (inverted index)
+            top_matches = topic_index.search(query_terms(query_lower), n_results)
+        if top_matches: break
 
-    scored_matches = []
-    for topic, content in knowledge_base.items():
-        topic_words = set(topic.lower().split())
-        intersection = query_words.intersection(topic_words)
-        if intersection:
-            score = len(intersection) / len(query_words)
-            # Increase threshold for scored matches to avoid false positives
-            if score >= 0.8:
-                scored_matches.append((score, content))
-
-    scored_matches.sort(reverse=True, key=lambda x: x[0])
-    top_matches = scored_matches[:n_results]
     max_score = top_matches[0][0] if top_matches else 0.0
-    knowledge = "\n---\n".join([content for _, content in top_matches]) if top_matches else ""
+    knowledge = "\n---\n".join([knowledge_base[topic] for _, topic in top_matches]) if top_matches else ""
     return knowledge, max_score
 
-def store_knowledge(topic: str, content: str):
-    knowledge_base[topic] = content
-    save_knowledge()
+def _knowledge_changed(topics, learned: bool = False):
+    """
+    Drops cached answers that may quote outdated knowledge. Trained or corrected topics
+    can feed any query's answer, so the whole cache goes; an answer the agent just
+    learned only replaces the cached answers to its own query.
+    """
+    if learned:
+        for topic in topics: response_cache.invalidate(topic)
+    else:
+        response_cache.clear()
+
+def store_knowledge(topic: str, content: str, dedupe: bool = True, learned: bool = False):
+    """
+    Stores content under topic and returns the topic it ended up under. With dedupe,
+    content that nearly duplicates another topic sharing a word with this one is merged
+    into that (canonical) topic instead of creating a new key; the longer version is kept.
+    `learned` marks answers the agent stored on its own (see _knowledge_changed).
+    """
+    with knowledge_lock:
+        if dedupe and dedup_index is not None and topic not in knowledge_base:
+            matches = [m for m in dedup_index.query(content) if topics_overlap(topic, m[1])]
+            if matches:
+                canonical = matches[0][1]
+                print(f"♻️ '{topic}' duplicates '{canonical}' ({matches[0][0]:.0%} similar), merged")
+                topic_aliases.add(topic, canonical)
+                if len(content) > len(knowledge_base[canonical]):
+                    store_knowledge(canonical, content, dedupe=False, learned=learned)
+                return canonical
+        _store.put(topic, content)
+        _knowledge_changed([topic], learned)
+        topic_index.add(topic)
+        speller.add_text(topic, KB_WORD_COUNT)
+        if bm25_index is not None: bm25_index.add(topic, content)
+        if semantic_index is not None: semantic_index.add(topic, content)
+        if dedup_index is not None: dedup_index.add(topic, content)
+        return topic
+
+def store_knowledge_many(items):
+    """Stores a batch of (topic, content) with one commit to the backend."""
+    with knowledge_lock:
+        _store.put_many(items)
+        _knowledge_changed([topic for topic, _ in items])
+        for topic, content in items:
+            topic_index.add(topic)
+            speller.add_text(topic, KB_WORD_COUNT)
+            if bm25_index is not None: bm25_index.add(topic, content)
+            if semantic_index is not None: semantic_index.add(topic, content)
+            if dedup_index is not None: dedup_index.add(topic, content)
 
-def delete_knowledge(topic: str):
-    if topic in knowledge_base:
-        del knowledge_base[topic]
-        save_knowledge()
-        return True
-    return False
+def delete_knowledge(topic: str, alias_to: str = None):
+    """
+    Deletes topic and forgets the aliases to and from it, or, with `alias_to`
+    (a merge), points them at that topic instead.
+    """
+    with knowledge_lock:
+        if _store.delete(topic):
+            if alias_to is None:
+                topic_aliases.remove(topic)
+            else:
+                topic_aliases.add(topic, alias_to)
+            topic_index.remove(topic)
+            _knowledge_changed([topic])
+            if bm25_index is not None: bm25_index.remove(topic)
+            if semantic_index is not None: semantic_index.remove(topic)
+            if dedup_index is not None: dedup_index.remove(topic)
+            return True
+        return False
+
+def dedupe_knowledge(dry_run: bool = False):
+    """
+    Background job: collapses groups of near-duplicate topics already in the knowledge
+    base into the oldest topic of each group, keeping the longest content. Only topics
+    sharing a word with that oldest one are merged. Returns how many topics were (or,
+    with dry_run, would be) removed; a dry run only prints the merges.
+    The lock is taken per group, so requests storing knowledge meanwhile only wait for one merge.
+    """
+    if dedup_index is None: return 0
+    removed = 0
+    with knowledge_lock:
+        order = {topic: i for i, topic in enumerate(knowledge_base)}
+        groups = dedup_index.duplicate_groups()
+    for group in groups:
+        with knowledge_lock:
+            group = sorted((t for t in group if t in knowledge_base), key=lambda t: order.get(t, len(order)))  # oldest first
+            if len(group) < 2: continue  # changed since the groups were computed
+            canonical = group[0]
+            group = [canonical] + [t for t in group[1:] if topics_overlap(t, canonical)]
+            if len(group) < 2: continue
+            removed += len(group) - 1
+            if dry_run:
+                print(f"♻️ Would merge {group[1:]} into '{canonical}'")
+                continue
+            best = max(group, key=lambda t: len(knowledge_base[t]))
+            if best != canonical:
+                store_knowledge(canonical, knowledge_base[best], dedupe=False)
+            for topic in group[1:]:
+                delete_knowledge(topic, alias_to=canonical)
+        print(f"♻️ Merged {group[1:]} into '{canonical}'")
+    return removed
 
 def train_agent(topic: str, content: str):
     """Manual training function to add or update knowledge."""
-    store_knowledge(topic, content)
+    store_knowledge(topic, content, dedupe=False)
     print(f"✅ Trained on: {topic}")
 
+def parse_training_stream(lines, fmt: str = "ndjson"):
+    """
+    Yields (line_no, record) from NDJSON lines or CSV rows with topic/content columns.
+    Lines that cannot be parsed are yielded as (line_no, None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip(): continue
+        try: yield line_no, json.loads(line)
+        except ValueError: yield line_no, None
+
+def train_agent_bulk(records, batch_size: int = 1000, progress=None):
+    """
+    Bulk training: validates (line_no, record) pairs from parse_training_stream and
+    stores them in batches, one backend commit per batch. Returns counts and throughput.
+    """
+    start = time.perf_counter()
+    stored, skipped, batches = 0, 0, 0
+    errors = []
+    batch = []
+
+    def commit():
+        nonlocal stored, batches
+        store_knowledge_many(batch)
+        stored += len(batch)
+        batches += 1
+        batch.clear()
+        rate = stored / max(time.perf_counter() - start, 1e-9)
+        print(f"📚 Bulk training: {stored} records stored ({rate:.0f}/s)")
+        if progress: progress(stored, skipped)
+
+    # One compaction at the end instead of a full snapshot rewrite every few hundred records
+    with _store.pause_compaction():
+        for line_no, record in records:
+            topic = record.get('topic') if isinstance(record, dict) else None
+            content = record.get('content') if isinstance(record, dict) else None
+            if not isinstance(topic, str) or not isinstance(content, str) or not topic.strip() or not content.strip():
+                skipped += 1
+                if len(errors) < 20:
+                    errors.append(f"line {line_no}: " + ("could not be parsed" if record is None else "expected non-empty 'topic' and 'content'"))
+                continue
+            batch.append((topic.strip(), content.strip()))
+            if len(batch) >= batch_size: commit()
+        if batch: commit()
+
+    seconds = time.perf_counter() - start
+    return {
+        'stored': stored,
+        'skipped': skipped,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'records_per_sec': round(stored / seconds, 1) if seconds else 0.0,
+        'errors': errors,
+    }
+
 def review_knowledge():
     """Review and potentially correct knowledge entries."""
     print("Current Knowledge Base:")
@@ -99,12 +313,18 @@ def review_knowledge():
 # --- The "Universal Brain" Priority ---
 # --- Custom Robust Gemini Client (Bypasses gRPC hangs) ---
 class GeminiRequestsLLM:
+    # Overridable so the client can be pointed at a local stub server
+    API_BASE = os.getenv('GEMINI_API_BASE', "https://generativelanguage.googleapis.com")
+
     def __init__(self, model="gemini-2.0-flash"):
         self.model = model
         self.api_key = os.getenv('GOOGLE_API_KEY')
-        self.url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
+        self.url = f"{self.API_BASE}/v1beta/models/{self.model}:generateContent?key={self.api_key}"
+        # Shared keep-alive pool: no new TCP+TLS handshake per call or per instance
+        self.session = http_pool.get_session("gemini")
 
-    def invoke(self, messages):
+    @staticmethod
+    def _payload(messages):
         # Convert LangChain messages to Gemini format
         gemini_msgs = []
         for m in messages:
@@ -115,120 +335,426 @@ class GeminiRequestsLLM:
             else:
                 parts = [{"text": m["content"]}]
             gemini_msgs.append({"role": role, "parts": parts})
-        
-        payload = {"contents": gemini_msgs}
-        try:
-            response = requests.post(self.url, json=payload, timeout=30)
-            data = response.json()
-            if 'candidates' in data:
-                text = data['candidates'][0]['content']['parts'][0]['text']
-                # Mock a LangChain response object
-                class Response:
-                    def __init__(self, content): self.content = content
-                return Response(text)
-            else:
-                raise Exception(f"Gemini Error: {data}")
-        except Exception as e:
-            raise e
+        return {"contents": gemini_msgs}
+
+    @staticmethod
+    def _parse(data):
+        if 'candidates' in data:
+            text = data['candidates'][0]['content']['parts'][0]['text']
+            # Mock a LangChain response object
+            class Response:
+                def __init__(self, content): self.content = content
+            return Response(text)
+        else:
+            raise Exception(f"Gemini Error: {data}")
+
+    def invoke(self, messages):
+        payload = self._payload(messages)
+        response = self.session.post(self.url, json=payload, timeout=http_pool.timeout())
+        return self._parse(response.json())
+
+    async def ainvoke(self, messages):
+        """Same as invoke on the event loop's pooled httpx client; no thread is held while waiting."""
+        response = await http_pool.apost(http_pool.get_async_client(), self.url, json=self._payload(messages))
+        return self._parse(response.json())
+
+    def stream(self, messages):
+        """Yields text chunks as Gemini generates them (streamGenerateContent, server-sent events)."""
+        url = f"{self.API_BASE}/v1beta/models/{self.model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        with self.session.post(url, json=self._payload(messages), timeout=http_pool.timeout(), stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Gemini Error: {response.text[:500]}")
+            response.encoding = "utf-8"
+            # chunk_size=None: hand over each chunk as it arrives instead of waiting for 512 bytes
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[5:])
+                for part in (data.get('candidates') or [{}])[0].get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
 
 # --- The "Universal Brain" Priority ---
-def get_providers():
-    providers = []
-    # 1. Gemini (Custom Request Based - Most Reliable on Windows)
-    if os.getenv('GOOGLE_API_KEY'):
-        providers.append((lambda: GeminiRequestsLLM(model="gemini-2.0-flash"), "Gemini (Cloud)"))
+def ollama_alive():
+    # No retries: a stopped Ollama should fail the probe at once, not after the backoff
+    response = http_pool.get_session("ollama", retries=0).get("http://localhost:11434/api/tags", timeout=(0.5, 0.5))
+    return response.status_code == 200
 
-    # 2. Anthropic (Very reliable)
-    if os.getenv('ANTHROPIC_API_KEY'):
-        providers.append((lambda: ChatAnthropic(model="claude-3-5-sonnet-20240620", api_key=os.getenv('ANTHROPIC_API_KEY')), "Anthropic (Claude)"))
+# Registration order is the priority order. Ollama's probe runs in the background so a
+# stopped Ollama no longer costs every request a 500 ms connect timeout.
+# Clients and compiled agents are built once and reused until their API key changes
+llm_cache = LLMCache()
+provider_registry = ProviderRegistry(
+    failure_threshold=int(os.getenv('PROVIDER_FAILURE_THRESHOLD', '3')),
+    reset_timeout=float(os.getenv('PROVIDER_RESET_TIMEOUT', '30')),
+    cache=llm_cache,
+)
+# 1. Gemini (Custom Request Based - Most Reliable on Windows)
+provider_registry.register("Gemini (Cloud)", lambda: GeminiRequestsLLM(model="gemini-2.0-flash"),
+                           env_keys=('GOOGLE_API_KEY',))
+# 2. Anthropic (Very reliable)
+provider_registry.register("Anthropic (Claude)", lambda: ChatAnthropic(model="claude-3-5-sonnet-20240620", api_key=os.getenv('ANTHROPIC_API_KEY')),
+                           env_keys=('ANTHROPIC_API_KEY',))
+# 3. Groq
+provider_registry.register("Groq", lambda: ChatGroq(model="llama-3.1-70b-versatile", groq_api_key=os.getenv('GROQ_API_KEY')),
+                           env_keys=('GROQ_API_KEY',))
+# 4. Ollama
+provider_registry.register("Ollama (Unlimited Local)", lambda: Ollama(model="llama3.2"),
+                           probe=HealthProbe(ollama_alive, interval=float(os.getenv('PROVIDER_PROBE_INTERVAL', '30'))))
+# 5. OpenAI
+provider_registry.register("OpenAI", lambda: ChatOpenAI(model="gpt-4o-mini", api_key=os.getenv('OPENAI_API_KEY')),
+                           env_keys=('OPENAI_API_KEY',))
+provider_registry.start()
 
-    # 3. Groq
-    if os.getenv('GROQ_API_KEY'):
-        providers.append((lambda: ChatGroq(model="llama-3.1-70b-versatile", groq_api_key=os.getenv('GROQ_API_KEY')), "Groq"))
+# Input token budget per provider (history, file and context are trimmed to fit)
+PROMPT_BUDGETS = {"Gemini (Cloud)": 16000, "Anthropic (Claude)": 16000, "Groq": 6000,
+                  "Ollama (Unlimited Local)": 3000, "OpenAI": 16000}
+PROMPT_BUDGET = int(os.getenv('PROMPT_BUDGET', '0'))  # caps every provider when set
+PROMPT_TURN_TOKENS = int(os.getenv('PROMPT_TURN_TOKENS', '400'))
+PROMPT_FILE_SHARE = float(os.getenv('PROMPT_FILE_SHARE', '0.6'))
 
-    # 4. Ollama
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=0.5)
-        if response.status_code == 200:
-            providers.append((lambda: Ollama(model="llama3.2"), "Ollama (Unlimited Local)"))
-    except: pass
+def prompt_budget_for(name: str):
+    budget = PROMPT_BUDGETS.get(name, 8000)
+    return min(budget, PROMPT_BUDGET) if PROMPT_BUDGET else budget
 
-    # 5. OpenAI
-    if os.getenv('OPENAI_API_KEY'):
-        providers.append((lambda: ChatOpenAI(model="gpt-4o-mini", api_key=os.getenv('OPENAI_API_KEY')), "OpenAI"))
+def get_providers():
+    """[(factory, name)] in priority order, skipping unconfigured, unhealthy and tripped providers."""
+    return provider_registry.available()
 
-    return providers
+# --- Spelling: local symmetric-delete corrector, the LLM only for what it can't settle ---
+SPELLING_LLM_FALLBACK = os.getenv('SPELLING_LLM_FALLBACK', '1') != '0'
+SPELLING_MIN_CONFIDENCE = float(os.getenv('SPELLING_MIN_CONFIDENCE', '0.8'))
+# Knowledge base topics are stored user queries, typos included: their words are known
+# (never rewritten) but never preferred over a dictionary word, and a rewrite to one is
+# never confident on its own (see SpellingCorrector)
+KB_WORD_COUNT = 1
 
-def correct_spelling(query: str):
-    """
-    Checks for spelling errors and corrects them using the LLM.
-    Returns (corrected_query, was_corrected)
-    """
+speller = SpellingCorrector(history_path=os.getenv('SPELLING_HISTORY', "spelling_history.jsonl"))
+speller_ready = threading.Event()
+
+def _build_speller():
+    speller.load_words()
+    for topic in list(knowledge_base): speller.add_text(topic, KB_WORD_COUNT)
+    speller_ready.set()
+
+threading.Thread(target=_build_speller, daemon=True).start()  # ~1 s, off the import path
+
+def _needs_spelling_check(query: str):
     # Skip correction for very short queries or math expressions
-    if len(query) < 4 or (re.search(r'\d', query) and re.search(r'[\+\-\*\/]', query)):
-        return query, False
+    return not (len(query) < 4 or (re.search(r'\d', query) and re.search(r'[\+\-\*\/]', query)))
+
+def _local_correction(query: str):
+    """(corrected_query, was_corrected, confident)"""
+    if not speller_ready.wait(timeout=5):
+        return query, False, False
+    if not SPELLING_LLM_FALLBACK:
+        # Nobody to confirm unsure rewrites: only the confident ones are applied
+        corrected, was_corrected, _ = speller.correct(query, SPELLING_MIN_CONFIDENCE)
+        return corrected, was_corrected, True
+    corrected, was_corrected, confidence = speller.correct(query)
+    return corrected, was_corrected, confidence >= SPELLING_MIN_CONFIDENCE
+
+# Past results by exact query, so a repeated typo never reaches the corrector (or an LLM) twice
+correction_memo = ResponseCache(max_entries=int(os.getenv('SPELLING_MEMO_SIZE', '4096')), ttls={}, default_ttl=7 * 24 * 3600)
 
-    providers = get_providers()
-    if not providers: return query, False
+def _remember_correction(query: str, correction: tuple):
+    correction_memo.put(query, correction, source="spelling")
+    return correction
 
-    prompt = f"Check this query for spelling errors: '{query}'. If it has typos (e.g. 'diramon' -> 'Doraemon'), return ONLY the corrected query. If it is correct, return 'OK'."
+def _accept_correction(query: str, correction: tuple):
+    _remember_correction(query, correction)
+    corrected, was_corrected = correction
+    if was_corrected:
+        speller.learn(query, corrected)  # the same typo is fixed locally next time
+    else:
+        speller.add_text(query, 1)  # the LLM vouched for these words
+
+def _one_line(query: str):
+    # Other users' queries share the batch prompt: a newline or a "2. ..." line in one
+    # query must not be able to add or replace a numbered line
+    return " ".join(query.split())
+
+def _spelling_prompt(query: str):
+    return f"Check this query for spelling errors: '{_one_line(query)}'. If it has typos (e.g. 'diramon' -> 'Doraemon'), return ONLY the corrected query. If it is correct, return 'OK'."
+
+def _batch_spelling_prompt(queries: list):
+    numbered = "\n".join(f"{i}. {_one_line(query)}" for i, query in enumerate(queries, 1))
+    return ("Check each numbered query below for spelling errors (e.g. 'diramon' -> 'Doraemon'). "
+            "Reply with exactly one line per query, in the same order, formatted as '<number>. <corrected query>', "
+            "or '<number>. OK' if it is already correct. Nothing else.\n" + numbered)
+
+def _parse_correction(query: str, response: str):
+    """(corrected_query, was_corrected), or None when the reply is unusable and the next provider should be asked."""
+    response = response.strip().replace('"', '').replace("'", "")
+    if response.upper() == "OK": return query, False
+    if response and response.lower() != _one_line(query).lower() and len(response) < len(query) * 2:
+        return response, True
+    return None
+
+BATCH_LINE_RE = re.compile(r"^\s*(\d+)\s*[.):-]\s*(.*)$")
+
+def _parse_batch_corrections(queries: list, response: str):
+    """
+    [correction or None] per query, from the '<number>. <answer>' lines of a batch reply.
+    A reply without exactly one line per query is not trusted at all (every entry None).
+    """
+    answers = [BATCH_LINE_RE.match(line) for line in response.splitlines()]
+    numbers = [int(match.group(1)) for match in answers if match]
+    if sorted(numbers) != list(range(1, len(queries) + 1)):
+        return [None] * len(queries)
+    return [_parse_correction(queries[int(match.group(1)) - 1], match.group(2))
+            for match in sorted((m for m in answers if m), key=lambda m: int(m.group(1)))]
 
-    for llm_factory, name in providers:
+def _llm_correct_batch(queries: list):
+    """
+    One prompt for the whole batch; queries a provider skipped or garbled go to the next one.
+    Returns a correction per query, None where no provider answered (so it isn't memoized).
+    """
+    unique = list(dict.fromkeys(queries))  # two requests with the same typo share a line
+    answers = {}
+    for llm_factory, name in get_providers():
+        todo = [q for q in unique if q not in answers]
+        if not todo: break
         try:
             llm = llm_factory()
-            response = ""
+            prompt = _spelling_prompt(todo[0]) if len(todo) == 1 else _batch_spelling_prompt(todo)
             if isinstance(llm, GeminiRequestsLLM):
-                response = llm.invoke([{"role": "user", "content": prompt}]).content
+                res = llm.invoke([{"role": "user", "content": prompt}])
             else:
                 # LangChain models usually accept string prompts
                 res = llm.invoke(prompt)
-                response = res.content if hasattr(res, 'content') else str(res)
+            response = res.content if hasattr(res, 'content') else str(res)
+            provider_registry.record_success(name)
+        except Exception as e:
+            provider_registry.record_failure(name, e)
+            continue
+        parsed = [_parse_correction(todo[0], response)] if len(todo) == 1 else _parse_batch_corrections(todo, response)
+        for query, correction in zip(todo, parsed):
+            if correction:
+                _accept_correction(query, correction)
+                answers[query] = correction
+    return [answers.get(query) for query in queries]
+
+# Concurrent requests the local corrector can't settle share one LLM prompt per window
+SPELLING_TIMEOUT = float(os.getenv('SPELLING_TIMEOUT', '10'))
+spelling_batcher = MicroBatcher(_llm_correct_batch,
+                                window=float(os.getenv('SPELLING_BATCH_WINDOW_MS', '5')) / 1000,
+                                max_batch=int(os.getenv('SPELLING_BATCH_SIZE', '16')))
 
-            response = response.strip().replace('"', '').replace("'", "")
-            if response.upper() == "OK": return query, False
-            if response and response.lower() != query.lower() and len(response) < len(query) * 2:
-                return response, True
-        except: continue
-    return query, False
+def correct_spelling(query: str):
+    """
+    Corrects typos with the local corrector; an LLM is asked only when it is unsure
+    (SPELLING_MIN_CONFIDENCE) and SPELLING_LLM_FALLBACK is on.
+    Returns (corrected_query, was_corrected)
+    """
+    if not _needs_spelling_check(query):
+        return query, False
+    memo = correction_memo.get(query)
+    if memo is not None:
+        return memo
+
+    corrected, was_corrected, confident = _local_correction(query)
+    if confident:
+        return _remember_correction(query, (corrected, was_corrected))
+
+    future = spelling_batcher.submit(query)
+    try:
+        correction = future.result(timeout=SPELLING_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        correction = None
+    return correction or (query, False)  # not remembered: ask again once a provider is back
 
 chat_history = []
 system_prompt = "You are a learning AI Agent. Prioritize using stored knowledge for accurate responses. Use tools only when necessary and knowledge is insufficient. Start your response with 'Learning...' if you found new info."
 tools = [search_tool, wiki_tool, save_tool, browse_tool, ai_chat_tool]
+follow_up_keywords = {' it ', ' its ', ' that ', ' this ', ' him ', ' her ', ' them ', ' those ', ' it\'s '}
+
+# --- Response Cache ---
+response_cache = ResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '512')))
+
+# Hedging: when set, the next provider is started if the current one has not answered
+# within this many seconds (empty = strict sequential failover)
+PROVIDER_HEDGE_DELAY = float(os.getenv('PROVIDER_HEDGE_DELAY')) if os.getenv('PROVIDER_HEDGE_DELAY') else None
+provider_executor = concurrent.futures.ThreadPoolExecutor(max_workers=int(os.getenv('PROVIDER_WORKERS', '16')),
+                                                          thread_name_prefix="provider")
+
+def ask_provider(llm_factory, name: str, messages: list):
+    """
+    One provider attempt, run on provider_executor. Returns (response, used_tools) and
+    feeds the provider's circuit breaker; raises on failure or an empty answer.
+    """
+    try:
+        llm = llm_factory()
+        used_tools = False
+        if isinstance(llm, GeminiRequestsLLM):
+            response = llm.invoke(messages).content
+        else:
+            try:
+                agent = llm_cache.agent(name, llm, tools, system_prompt,
+                                        lambda: create_react_agent(model=llm, tools=tools, prompt=system_prompt))
+                result = agent.invoke({"messages": messages})
+                if isinstance(result, dict) and 'messages' in result:
+                    response = result["messages"][-1].content
+                    used_tools = any(getattr(msg, 'tool_calls', None) for msg in result["messages"])
+                else: response = str(result)
+            except:
+                result = llm.invoke(messages)
+                response = result.content if hasattr(result, 'content') else str(result)
+        if not response or not str(response).strip():
+            raise ValueError("empty response")
+        provider_registry.record_success(name)
+        return response, used_tools
+    except Exception as e:
+        provider_registry.record_failure(name, e)
+        print(f"❌ {name} failed: {e}")
+        raise
+
+def _chunk_text(chunk):
+    content = chunk.content if hasattr(chunk, 'content') else chunk
+    if isinstance(content, list):  # Anthropic-style content blocks
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content if isinstance(content, str) else ""
+
+def stream_provider(llm_factory, name: str, messages: list):
+    """
+    Streaming counterpart of ask_provider. Yields ("token", text) as the model generates,
+    ("status", text) when the agent calls a tool (text streamed so far was thinking aloud,
+    not the answer) and finally ("end", used_tools).
+    """
+    llm = llm_factory()
+    used_tools = False
+    if isinstance(llm, GeminiRequestsLLM):
+        for text in llm.stream(messages):
+            yield "token", text
+        yield "end", used_tools
+        return
+    emitted = False
+    try:
+        agent = llm_cache.agent(name, llm, tools, system_prompt,
+                                lambda: create_react_agent(model=llm, tools=tools, prompt=system_prompt))
+        for chunk, metadata in agent.stream({"messages": messages}, stream_mode="messages"):
+            if metadata.get("langgraph_node") == "tools":
+                used_tools = True
+                yield "status", f"🔎 Used {getattr(chunk, 'name', None) or 'a tool'}, writing the answer..."
+                continue
+            text = _chunk_text(chunk)
+            if text:
+                emitted = True
+                yield "token", text
+    except Exception:
+        if emitted: raise
+        # No agent (e.g. a model without tool calling): stream the plain model instead
+        for chunk in llm.stream(messages):
+            text = _chunk_text(chunk)
+            if text:
+                yield "token", text
+    yield "end", used_tools
+
+def is_follow_up(query: str, history: list = None):
+    return bool(history) and any(kw in f" {query.lower()} " for kw in follow_up_keywords)
 
 def run_agent(query: str, history: list = None, file_content: str = None, is_image: bool = False):
+    # Follow-ups ("what is its equation") depend on the conversation, not just the query
+    if is_follow_up(query, history):
+        return _run_agent(query, history, file_content, is_image)
+    key = response_cache.key(query, file_content, is_image)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    result = _run_agent(query, history, file_content, is_image)
+    response_cache.put(key, result, source=result[2])
+    return result
+
+def run_agent_stream(query: str, history: list = None, file_content: str = None, is_image: bool = False):
+    """
+    Streaming run_agent. Yields {"type": "token", "text"} while a provider generates,
+    {"type": "status", "text"} when the text so far should be replaced (tool call, provider
+    switch, research) and finally {"type": "done", "response", "model"} with the full answer.
+    Cached and local answers (logic, FAQ, math, knowledge base) arrive as a single done event.
+    """
     if history is None: history = []
-    
-    # --- File Context Injection ---
-    file_context = ""
-    image_part = None
-    if file_content:
-        if is_image:
-            image_part = {
-                "inline_data": {
-                    "mime_type": "image/png", # Defaulting to PNG, Gemini handles others too
-                    "data": file_content
-                }
-            }
-            print(f"🖼️ Analyzing image content")
-        else:
-            file_context = f"\n\n[FILE CONTEXT]:\n{file_content}\n"
-            print(f"📁 Analyzing file content ({len(file_content)} chars)")
+    follow_up = is_follow_up(query, history)
+    key = response_cache.key(query, file_content, is_image)
+    cached = None if follow_up else response_cache.get(key)
+    if cached is not None:
+        yield {"type": "done", "response": cached[0], "model": cached[2]}
+        return
+    result, ctx = prepare_query(query, history, file_content, is_image)
+    if result is None:
+        for llm_factory, name in get_providers():
+            parts, used_tools = [], False
+            try:
+                for kind, value in stream_provider(llm_factory, name, provider_messages(ctx, name)):
+                    if kind == "token":
+                        if not parts and ctx["correction_note"]:
+                            yield {"type": "token", "text": ctx["correction_note"]}
+                        parts.append(value)
+                        yield {"type": "token", "text": value}
+                    elif kind == "status":
+                        parts = []
+                        yield {"type": "status", "text": value}
+                    else:
+                        used_tools = value
+                response = "".join(parts)
+                if not response.strip():
+                    raise ValueError("empty response")
+            except Exception as e:
+                provider_registry.record_failure(name, e)
+                print(f"❌ {name} failed: {e}")
+                if parts:
+                    yield {"type": "status", "text": f"⚠️ {name} failed mid-answer, switching provider..."}
+                continue
+            provider_registry.record_success(name)
+            learn_from_answer(ctx, name, response, used_tools)
+            result = (ctx["correction_note"] + response, ctx["relevant_knowledge"], name)
+            break
+    if result is None:
+        yield {"type": "status", "text": "🚀 Researching the web..."}
+        result = research_fallback(ctx, history)
+    if not follow_up:
+        response_cache.put(key, result, source=result[2])
+    yield {"type": "done", "response": result[0], "model": result[2]}
 
-    # --- Auto-Correction ---
-    correction_note = ""
-    corrected_query, was_corrected = correct_spelling(query)
-    if was_corrected:
-        correction_note = f"**Did you mean: {corrected_query}?**\n\n"
-        query = corrected_query
+def _run_agent(query: str, history: list = None, file_content: str = None, is_image: bool = False):
+    if history is None: history = []
+    answer, ctx = prepare_query(query, history, file_content, is_image)
+    if answer is not None:
+        return answer
+
+    # Only the winning provider's answer is stored, losers of a hedge race are dropped
+    result, name, launched = hedged_call(provider_executor, get_providers(),
+                                         lambda llm_factory, name: ask_provider(llm_factory, name, provider_messages(ctx, name)),
+                                         PROVIDER_HEDGE_DELAY)
+    if result is not None:
+        response, used_tools = result
+        learn_from_answer(ctx, name, response, used_tools)
+        if len(launched) > 1:
+            name = f"{name} (hedged)"
+        return ctx["correction_note"] + response, ctx["relevant_knowledge"], name
+
+    return research_fallback(ctx, history)
+
+def learn_from_answer(ctx: dict, name: str, response: str, used_tools: bool):
+    if name == "Gemini (Cloud)":
+        if len(response) > 50: store_knowledge(ctx["query"][:30] if not ctx["image_part"] else "Image Analysis", response[:500], learned=True)
+    elif used_tools:
+        store_knowledge(ctx["query"], response, learned=True)
 
+def local_answer(query: str, has_file: bool = False):
+    """
+    The instant answerers: arithmetic, greetings, FAQ, opinions, math and a confident
+    knowledge base hit. Returns ((response, knowledge, source) or None, relevant knowledge).
+    """
     q_low = query.lower()
-    if re.search(r'(\d+)\s*([\+\-\*\/])\s*(\d+)', query):
-        try: return correction_note + f"The answer is {eval(re.search(r'(\d+)\s*([\+\-\*\/])\s*(\d+)', query).group(0))}.", "", "Local Logic"
+    arithmetic = re.search(r'(\d+)\s*([\+\-\*\/])\s*(\d+)', query)
+    if arithmetic:
+        try: return (f"The answer is {eval(arithmetic.group(0))}.", "", "Local Logic"), ""
         except: pass
     
-    if not file_content and not image_part:
+    if not has_file:
         if "hello" in q_low or "hi" in q_low:
-            return correction_note + "Hello! I'm your AI agent. I can learn from you and the web. What's on your mind?", "", "Local Logic"
+            return ("Hello! I'm your AI agent. I can learn from you and the web. What's on your mind?", "", "Local Logic"), ""
 
     # --- AGENT FAQ SYSTEM (Local & Instant) ---
     faq = {
@@ -239,7 +765,7 @@ def run_agent(query: str, history: list = None, file_content: str = None, is_ima
     }
     for key, val in faq.items():
         if key in q_low:
-            return correction_note + val, "", "Local System FAQ"
+            return (val, "", "Local System FAQ"), ""
 
     # --- OPINION DETECTION ---
     opinion_keywords = ["do you like", "what do you think", "your opinion", "how do you feel"]
@@ -258,7 +784,7 @@ def run_agent(query: str, history: list = None, file_content: str = None, is_ima
             opinions = ["interesting", "controversial", "complex", "fascinating", "challenging"]
             opinion = opinions[hash(topic) % len(opinions)]
             response = f"As an AI, I find {topic} {opinion}, but opinions vary greatly among individuals."
-        return correction_note + response, "", "AI Opinion"
+        return (response, "", "AI Opinion"), ""
 
     # --- MATH COMPUTATION ---
     math_functions = {
@@ -285,148 +811,347 @@ def run_agent(query: str, history: list = None, file_content: str = None, is_ima
         expr = expr.replace('^', '**')
         try:
             result = eval(expr, {"__builtins__": None}, {"math": math, "pi": math.pi, "e": math.e})
-            return correction_note + f"The result is {result}.", "", "Math Computation"
+            return (f"The result is {result}.", "", "Math Computation"), ""
         except Exception as e:
             pass  # Fall through to normal processing
 
     relevant_knowledge, knowledge_score = retrieve_knowledge(query)
-    messages = []
-    for role, content in history[-5:]:
-        messages.append({"role": "user" if role == "human" else "assistant", "content": content})
-
     # If we have high-confidence knowledge, use it directly without searching
     if knowledge_score >= 0.5 and relevant_knowledge:
-        return correction_note + relevant_knowledge, relevant_knowledge, "Knowledge Base"
+        return (relevant_knowledge, relevant_knowledge, "Knowledge Base"), relevant_knowledge
+    return None, relevant_knowledge
+
+def prepare_query(query: str, history: list, file_content: str = None, is_image: bool = False, correction: tuple = None,
+                  knowledge: str = None):
+    """
+    Everything before the providers. The local answerers run on the raw query first; spelling
+    is corrected only when they miss (then they get a second try on the corrected query).
+    Returns (answer, None) when a local path answers, else (None, ctx) with what the later
+    steps need; provider_messages(ctx, name) turns it into a prompt within that provider's
+    budget. `correction` is a precomputed correct_spelling() result from a caller that
+    already ran local_answer on the raw query (the async path), and `knowledge` the
+    knowledge local_answer retrieved for it, so it is not searched again.
+    """
+    # --- File Context Injection ---
+    image_part = None
+    if file_content:
+        if is_image:
+            image_part = {
+                "inline_data": {
+                    "mime_type": "image/png", # Defaulting to PNG, Gemini handles others too
+                    "data": file_content
+                }
+            }
+            print(f"🖼️ Analyzing image content")
+        else:
+            print(f"📁 Analyzing file content ({len(file_content)} chars)")
+
+    relevant_knowledge = knowledge
+    if correction is None:
+        answer, relevant_knowledge = local_answer(query, bool(file_content))
+        if answer is not None:
+            return answer, None
+        correction = correct_spelling(query)
+
+    # --- Auto-Correction ---
+    correction_note = ""
+    corrected_query, was_corrected = correction
+    if was_corrected:
+        correction_note = f"**Did you mean: {corrected_query}?**\n\n"
+        query = corrected_query
+        answer, relevant_knowledge = local_answer(query, bool(file_content))
+        if answer is not None:
+            return (correction_note + answer[0],) + answer[1:], None
+    elif relevant_knowledge is None:
+        relevant_knowledge, _ = retrieve_knowledge(query)
+
+    # Provider messages are built per token budget, see provider_messages()
+    return None, {"query": query, "correction_note": correction_note, "relevant_knowledge": relevant_knowledge,
+                  "history": list(history), "image_part": image_part, "file_content": file_content,
+                  "is_image": is_image, "messages_by_budget": {}}
+
+def provider_messages(ctx: dict, name: str):
+    """ctx's messages fitted to `name`'s prompt budget, built once per distinct budget."""
+    budget = prompt_budget_for(name)
+    cached = ctx["messages_by_budget"].get(budget)
+    if cached is not None:
+        return cached
+    file_text = ctx["file_content"] if ctx["file_content"] and not ctx["is_image"] else None
+    fitted = PromptBudget(budget, turn_tokens=PROMPT_TURN_TOKENS, file_share=PROMPT_FILE_SHARE).fit(
+        ctx["query"], ctx["history"], ctx["relevant_knowledge"], file_text, images=1 if ctx["image_part"] else 0)
+    if fitted["dropped"]:
+        print(f"✂️ Prompt for {name} fitted to {budget} tokens, dropped: {', '.join(fitted['dropped'])}")
+
+    messages = []
+    for role, content in fitted["history"]:
+        messages.append({"role": "user" if role == "human" else "assistant", "content": content})
 
     full_query_content = []
-    if image_part:
-        full_query_content.append(image_part)
-    
+    if ctx["image_part"]:
+        full_query_content.append(ctx["image_part"])
+
+    query, relevant_knowledge = ctx["query"], fitted["context"]
     text_content = f"Learned Context: {relevant_knowledge}\n\nUser: {query}" if relevant_knowledge else query
-    if file_context:
-        text_content = f"{file_context}\n\n{text_content}"
-    
+    if fitted["file_text"]:
+        text_content = f"\n\n[FILE CONTEXT]:\n{fitted['file_text']}\n\n\n{text_content}"
+
     full_query_content.append({"text": text_content})
-    
+
     messages.append({"role": "user", "content": full_query_content})
+    ctx["messages_by_budget"][budget] = messages
+    return messages
 
-    providers = get_providers()
-    last_error = ""
-    for llm_factory, name in providers:
-        try:
-            llm = llm_factory()
-            if isinstance(llm, GeminiRequestsLLM):
-                result = llm.invoke(messages)
-                response = result.content
-                if len(response) > 50: store_knowledge(query[:30] if not image_part else "Image Analysis", response[:500])
-                return correction_note + response, relevant_knowledge, name
+def _file_shortcut(ctx: dict):
+    """If it's a "read file" command and we have file content, handle it locally for max speed."""
+    query, file_content, image_part = ctx["query"], ctx["file_content"], ctx["image_part"]
+    if any(kw in query.lower() for kw in ["read the file", "analyze file", "what is in this file"]) and (file_content or image_part):
+        if image_part:
+            synthesized = "### 🖼️ Image Analysis (Local Intelligence)\nI have received your image. Since my primary cloud connection is experiencing delays, I can confirm it's an image file ready for analysis. Please ensure my API keys are active for deep vision insights."
+        else:
+            synthesized = f"### 📁 File Analysis (Local Intelligence)\n**File Content Snapshot:**\n{file_content[:2000]}..."
+        return ctx["correction_note"] + synthesized, ctx["relevant_knowledge"], "Local Speed Engine"
+    return None
 
-            try:
-                agent = create_react_agent(model=llm, tools=tools, prompt=system_prompt)
-                result = agent.invoke({"messages": messages})
-                if isinstance(result, dict) and 'messages' in result:
-                    response = result["messages"][-1].content
-                    for msg in result["messages"]:
-                        if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                            store_knowledge(query, response)
-                            break
-                else: response = str(result)
-            except:
-                result = llm.invoke(messages)
-                response = result.content if hasattr(result, 'content') else str(result)
-            
-            return correction_note + response, relevant_knowledge, name
-        except Exception as e:
-            last_error = str(e)
-            print(f"❌ {name} failed: {e}")
-            continue
+def _research_query(ctx: dict, history: list):
+    # --- Context Injection for follow-ups ---
+    query = ctx["query"]
+    if is_follow_up(query, history):
+        last_human_msg = next((msg[1] for msg in reversed(history) if msg[0] == "human"), "")
+        if last_human_msg:
+            print(f"🔍 Context-aware search: {query} {last_human_msg}")
+            return f"{query} {last_human_msg}"
+    return query
+
+def _synthesize_research(ctx: dict, search_results: str, wiki_res: str, ai_res: str, browsed_content: list, budget=None):
+    # --- Advanced Synthesizer ---
+    query, file_content, image_part = ctx["query"], ctx["file_content"], ctx["image_part"]
+    synthesized = f"### 🧠 Deep Parallel Intelligence Report: {query.title()}\n"
+
+    # Add Local File Context if it exists
+    if file_content:
+        synthesized += f"**Detected File Context:**\n> {file_content[:500]}...\n\n"
+    elif image_part:
+        synthesized += "**Detected Image Input:** [Image analysis requires active Cloud API for full vision]\n\n"
+
+    if ai_res and "Error" not in ai_res and "timed out" not in ai_res:
+        synthesized += f"**Core AI Insight:**\n{ai_res}\n\n"
+
+    if "No results found" not in search_results:
+        synthesized += f"**Web Intelligence:**\n{search_results[:600]}...\n\n"
+
+    if browsed_content:
+        synthesized += "**Deep Web Analysis:**\n" + "\n\n".join([f"- {c[:400]}..." for c in browsed_content]) + "\n\n"
+
+    if wiki_res and "Page not found" not in wiki_res:
+        synthesized += f"**Structured Context:**\n{wiki_res}"
+
+    store_knowledge(query, synthesized, learned=True)
+    if budget is not None:
+        # Logged, not added to the answer: it describes this run only and the answer is cached
+        print(f"⏱️ Research sources: {budget.summary()}")
+    return ctx["correction_note"] + synthesized, ctx["relevant_knowledge"], "Extreme Research Engine"
+
+def _research_failed(ctx: dict, error):
+    print(f"❌ Research Engine failed: {error}")
+    relevant_knowledge = ctx["relevant_knowledge"]
+    return ctx["correction_note"] + f"I have processed your request locally. I remember: {relevant_knowledge if relevant_knowledge else 'nothing yet.'}", relevant_knowledge, "Local Intelligence"
 
+# One time budget per research query; each source also has its own deadline (seconds)
+RESEARCH_BUDGET = float(os.getenv('RESEARCH_BUDGET', '12'))
+RESEARCH_DEADLINES = {"web": 7, "wikipedia": 5, "ai chat": 10, "browse": 8}
+# Shared and never joined: a hung tool keeps a worker busy, not the response
+research_executor = concurrent.futures.ThreadPoolExecutor(max_workers=int(os.getenv('RESEARCH_WORKERS', '16')),
+                                                          thread_name_prefix="research")
+
+def _browse_urls(search_results: str):
+    if "No results found" in search_results:
+        return []
+    return list(set(re.findall(r'https?://[^\s]+', search_results)))[:2]
+
+def research_fallback(ctx: dict, history: list):
+    """Last resort when no provider answered: parallel web/wiki/AI-chat research, synthesized locally."""
     # --- FINAL UNLIMITED FALLBACK: Parallel Autonomous Research Engine ---
     try:
-        import concurrent.futures
-        print(f"🚀 Engaging Parallel Autonomous Research Engine for: {query}")
+        print(f"🚀 Engaging Parallel Autonomous Research Engine for: {ctx['query']}")
+        shortcut = _file_shortcut(ctx)
+        if shortcut: return shortcut
+        search_query = _research_query(ctx, history)
 
-        # If it's a "read file" command and we have file content, handle it locally for max speed
-        if any(kw in query.lower() for kw in ["read the file", "analyze file", "what is in this file"]) and (file_content or image_part):
-            if image_part:
-                synthesized = "### 🖼️ Image Analysis (Local Intelligence)\nI have received your image. Since my primary cloud connection is experiencing delays, I can confirm it's an image file ready for analysis. Please ensure my API keys are active for deep vision insights."
-            else:
-                synthesized = f"### 📁 File Analysis (Local Intelligence)\n**File Content Snapshot:**\n{file_content[:2000]}..."
-            return correction_note + synthesized, relevant_knowledge, "Local Speed Engine"
-
-        # --- Context Injection for follow-ups ---
-        search_query = query
-        follow_up_keywords = {' it ', ' its ', ' that ', ' this ', ' him ', ' her ', ' them ', ' those ', ' it\'s '}
-        if any(kw in f" {query.lower()} " for kw in follow_up_keywords) and history:
-            last_human_msg = next((msg[1] for msg in reversed(history) if msg[0] == "human"), "")
-            if last_human_msg:
-                search_query = f"{query} {last_human_msg}"
-                print(f"🔍 Context-aware search: {search_query}")
-
-        # --- Concurrent Execution for High Speed ---
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # 1. Start core searches immediately
-            future_search = executor.submit(search_tool.invoke, {"query": search_query})
-            future_wiki = executor.submit(wiki_tool.invoke, {"query": search_query})
-            
-            # AI chat is often slow, give it a tighter timeout
-            future_ai = executor.submit(ai_chat_tool.invoke, {"query": search_query, "site": "gemini"})
-            
-            # Wait for search results to get URLs for deep browsing
-            try:
-                search_results = future_search.result(timeout=7)
-            except:
-                search_results = "No results found."
-            
-            # Start browsing in parallel while wiki/AI finish
-            future_browsing = []
-            if "No results found" not in search_results:
-                urls = re.findall(r'https?://[^\s]+', search_results)
-                unique_urls = list(set(urls))[:2]
-                for url in unique_urls:
-                    future_browsing.append(executor.submit(browse_tool.invoke, {"url": url}))
-            
-            # Collect all results with timeouts to ensure speed
-            try: wiki_res = future_wiki.result(timeout=5)
-            except: wiki_res = "Wikipedia search timed out."
-            
-            try: ai_res = future_ai.result(timeout=10) # Gemini web is slow
-            except: ai_res = "AI Chat lookup timed out."
-            
-            browsed_content = []
-            for f in future_browsing:
-                try:
-                    res = f.result(timeout=8)
-                    if res and len(res) > 100:
-                        browsed_content.append(res)
-                except: continue
-
-        # --- Advanced Synthesizer ---
-        synthesized = f"### 🧠 Deep Parallel Intelligence Report: {query.title()}\n"
-        
-        # Add Local File Context if it exists
-        if file_content:
-            synthesized += f"**Detected File Context:**\n> {file_content[:500]}...\n\n"
-        elif image_part:
-            synthesized += "**Detected Image Input:** [Image analysis requires active Cloud API for full vision]\n\n"
-
-        if ai_res and "Error" not in ai_res and "timed out" not in ai_res:
-            synthesized += f"**Core AI Insight:**\n{ai_res}\n\n"
-        
-        if "No results found" not in search_results:
-            synthesized += f"**Web Intelligence:**\n{search_results[:600]}...\n\n"
-
-        if browsed_content:
-            synthesized += "**Deep Web Analysis:**\n" + "\n\n".join([f"- {c[:400]}..." for c in browsed_content]) + "\n\n"
-
-        if wiki_res and "Page not found" not in wiki_res:
-            synthesized += f"**Structured Context:**\n{wiki_res}"
-
-        store_knowledge(query, synthesized)
-        return correction_note + synthesized, relevant_knowledge, "Extreme Research Engine"
+        # --- Concurrent Execution under one budget ---
+        budget = ResearchBudget(research_executor, RESEARCH_BUDGET)
+        budget.submit("web", search_tool.invoke, {"query": search_query}, timeout=RESEARCH_DEADLINES["web"])
+        budget.submit("wikipedia", wiki_tool.invoke, {"query": search_query}, timeout=RESEARCH_DEADLINES["wikipedia"])
+        # AI chat is slow (Gemini web), it gets the longest deadline
+        budget.submit("ai chat", ai_chat_tool.invoke, {"query": search_query, "site": "gemini"}, timeout=RESEARCH_DEADLINES["ai chat"])
+
+        # Search results give the URLs for deep browsing, which runs while wiki/AI finish
+        search_results = budget.result("web", "No results found.")
+        urls = _browse_urls(search_results)
+        for i, url in enumerate(urls):
+            budget.submit(f"browse {i + 1}", browse_tool.invoke, {"url": url}, timeout=RESEARCH_DEADLINES["browse"])
+
+        wiki_res = budget.result("wikipedia", "Wikipedia search timed out.")
+        ai_res = budget.result("ai chat", "AI Chat lookup timed out.")
+        browsed = [budget.result(f"browse {i + 1}", "") for i in range(len(urls))]
+        budget.abandon()
+        browsed_content = [res for res in browsed if res and len(res) > 100]
+        return _synthesize_research(ctx, search_results, wiki_res, ai_res, browsed_content, budget)
     except Exception as fallback_err:
-        print(f"❌ Research Engine failed: {fallback_err}")
-        return correction_note + f"I have processed your request locally. I remember: {relevant_knowledge if relevant_knowledge else 'nothing yet.'}", relevant_knowledge, "Local Intelligence"
+        return _research_failed(ctx, fallback_err)
+
+# --- asyncio core: one event loop holds many in-flight LLM/search calls without a thread each ---
+PROVIDER_TIMEOUT = float(os.getenv('PROVIDER_TIMEOUT', '60'))
+
+async def acorrect_spelling(query: str):
+    """correct_spelling on the event loop: the batched LLM fallback is awaited, not blocked on."""
+    if not _needs_spelling_check(query):
+        return query, False
+    memo = correction_memo.get(query)
+    if memo is not None:
+        return memo
+    if not speller_ready.is_set():
+        await asyncio.to_thread(speller_ready.wait, 5)  # only right after startup
+    corrected, was_corrected, confident = _local_correction(query)
+    if confident:
+        return _remember_correction(query, (corrected, was_corrected))
+    try:
+        correction = await asyncio.wait_for(asyncio.wrap_future(spelling_batcher.submit(query)), SPELLING_TIMEOUT)
+    except asyncio.TimeoutError:
+        correction = None
+    return correction or (query, False)
+
+async def _aask(llm, name: str, messages: list):
+    if isinstance(llm, GeminiRequestsLLM):
+        return (await llm.ainvoke(messages)).content, False
+    try:
+        agent = llm_cache.agent(name, llm, tools, system_prompt,
+                                lambda: create_react_agent(model=llm, tools=tools, prompt=system_prompt))
+        result = await agent.ainvoke({"messages": messages})
+        if isinstance(result, dict) and 'messages' in result:
+            return result["messages"][-1].content, any(getattr(msg, 'tool_calls', None) for msg in result["messages"])
+        return str(result), False
+    except Exception:
+        result = await llm.ainvoke(messages)
+        return (result.content if hasattr(result, 'content') else str(result)), False
+
+async def aask_provider(llm_factory, name: str, messages: list):
+    """Async ask_provider with a PROVIDER_TIMEOUT deadline. A hedge cancellation is not counted as a failure."""
+    try:
+        response, used_tools = await asyncio.wait_for(_aask(llm_factory(), name, messages), PROVIDER_TIMEOUT)
+        if not response or not str(response).strip():
+            raise ValueError("empty response")
+        provider_registry.record_success(name)
+        return response, used_tools
+    except Exception as e:
+        provider_registry.record_failure(name, e)
+        print(f"❌ {name} failed: {e!r}")
+        raise
+
+async def _in_research_thread(fn, *args):
+    # On the shared research pool, not the loop's default executor: asyncio.run() joins
+    # that one on exit, which would wait out every hung tool again
+    return await asyncio.get_running_loop().run_in_executor(research_executor, fn, *args)
+
+async def aresearch_fallback(ctx: dict, history: list):
+    """research_fallback on the event loop, under the same budget; late tasks are cancelled."""
+    try:
+        print(f"🚀 Engaging Parallel Autonomous Research Engine for: {ctx['query']}")
+        shortcut = _file_shortcut(ctx)
+        if shortcut: return shortcut
+        search_query = _research_query(ctx, history)
+
+        budget = AsyncResearchBudget(RESEARCH_BUDGET)
+        budget.submit("web", _in_research_thread, search_tool.invoke, {"query": search_query}, timeout=RESEARCH_DEADLINES["web"])
+        budget.submit("wikipedia", _in_research_thread, wiki_tool.invoke, {"query": search_query}, timeout=RESEARCH_DEADLINES["wikipedia"])
+        budget.submit("ai chat", _in_research_thread, ai_chat_tool.invoke, {"query": search_query, "site": "gemini"}, timeout=RESEARCH_DEADLINES["ai chat"])
+
+        search_results = await budget.result("web", "No results found.")
+        urls = _browse_urls(search_results)
+        for i, url in enumerate(urls):
+            budget.submit(f"browse {i + 1}", _in_research_thread, browse_tool.invoke, {"url": url}, timeout=RESEARCH_DEADLINES["browse"])
+
+        wiki_res, ai_res, *browsed = await asyncio.gather(
+            budget.result("wikipedia", "Wikipedia search timed out."),
+            budget.result("ai chat", "AI Chat lookup timed out."),
+            *(budget.result(f"browse {i + 1}", "") for i in range(len(urls))))
+        budget.abandon()
+        browsed_content = [res for res in browsed if res and len(res) > 100]
+        # Stores the report: disk I/O under knowledge_lock, kept off the loop
+        return await asyncio.to_thread(_synthesize_research, ctx, search_results, wiki_res, ai_res, browsed_content, budget)
+    except Exception as fallback_err:
+        return _research_failed(ctx, fallback_err)
+
+async def arun_agent(query: str, history: list = None, file_content: str = None, is_image: bool = False):
+    """
+    Coroutine version of run_agent (same cache, same pipeline, same return value).
+    Provider and tool calls are awaited, so concurrent queries share one event loop
+    instead of pinning a worker thread each.
+    """
+    if history is None: history = []
+    follow_up = is_follow_up(query, history)
+    key = response_cache.key(query, file_content, is_image)
+    cached = None if follow_up else response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Local answerers on the raw query first; spelling is only awaited when they miss
+    result, knowledge = local_answer(query, bool(file_content))
+    if result is None:
+        result, ctx = prepare_query(query, history, file_content, is_image, correction=await acorrect_spelling(query),
+                                    knowledge=knowledge)
+    if result is None:
+        answer, name, launched = await ahedged_call(get_providers(),
+                                                    lambda llm_factory, name: aask_provider(llm_factory, name, provider_messages(ctx, name)),
+                                                    PROVIDER_HEDGE_DELAY)
+        if answer is not None:
+            response, used_tools = answer
+            # Writes wait on knowledge_lock, which bulk training and dedupe hold per batch:
+            # on the loop they would stall every other in-flight query
+            await asyncio.to_thread(learn_from_answer, ctx, name, response, used_tools)
+            if len(launched) > 1:
+                name = f"{name} (hedged)"
+            result = (ctx["correction_note"] + response, ctx["relevant_knowledge"], name)
+        else:
+            result = await aresearch_fallback(ctx, history)
+    if not follow_up:
+        response_cache.put(key, result, source=result[2])
+    return result
+
+# One long-lived event loop for arun_agent. Cached LangChain clients and the pooled httpx
+# client are bound to the loop they first ran on; a server that ran each request on a
+# fresh loop (Flask's async views under WSGI) would reuse them on closed loops and open
+# a new, never closed connection pool per request.
+_agent_loop = None
+_agent_loop_lock = threading.Lock()
+
+def agent_loop():
+    """The shared event loop, started on a daemon thread on first use."""
+    global _agent_loop
+    if _agent_loop is None:
+        with _agent_loop_lock:
+            if _agent_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True, name="agent-loop").start()
+                _agent_loop = loop
+    return _agent_loop
+
+# Longest a caller waits for run_agent_on_loop before the query is cancelled
+AGENT_TIMEOUT = float(os.getenv('AGENT_TIMEOUT', '180'))
+
+def run_agent_on_loop(query: str, history: list = None, file_content: str = None, is_image: bool = False,
+                      timeout: float = None):
+    """
+    Runs arun_agent on the shared loop and waits for it, at most `timeout` seconds
+    (AGENT_TIMEOUT); callable from any worker thread. On timeout the coroutine is
+    cancelled and TimeoutError raised, so a hung provider can't pin the caller.
+    """
+    timeout = AGENT_TIMEOUT if timeout is None else timeout
+    future = asyncio.run_coroutine_threadsafe(arun_agent(query, history, file_content, is_image), agent_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"no answer within {timeout}s")
 
 if __name__ == '__main__':
     print("AI Agent Ready.")
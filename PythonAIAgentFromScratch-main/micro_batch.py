@@ -0,0 +1,67 @@
+"""Coalesces concurrent small requests into one batched call."""
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+
+class MicroBatcher:
+    """
+    `submit(item)` returns a Future right away. Items arriving within `window`
+    seconds of the first pending one (or until `max_batch` are waiting) are handed
+    to `handler(items)` in one call, which must return one result per item, in
+    order. Batches are dispatched on a small pool, so a slow call never holds up
+    the next window. A caller that stops waiting should `cancel()` its future.
+    """
+
+    def __init__(self, handler, window: float = 0.005, max_batch: int = 32, max_concurrent: int = 4):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []  # (item, future, arrival time)
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="microbatch")
+        self.batches = self.items = 0
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def submit(self, item):
+        future = Future()
+        with self._cond:
+            self._pending.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][2] + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        # Callers that timed out and cancelled before dispatch aren't sent at all
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = self.handler([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0}
@@ -0,0 +1,87 @@
+"""Fits the question, learned context, file text and chat history into a token budget."""
+
+IMAGE_TOKENS = 258  # what Gemini bills per inline image; close enough for the others
+
+
+def estimate_tokens(text: str):
+    """
+    ~4 characters per token for ASCII text (BPE tokenizers on English), one per
+    non-ASCII character (CJK, emoji). No tokenizer needed, and it errs high.
+    """
+    if not text:
+        return 0
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+def truncate_to_tokens(text: str, max_tokens: int, tail_share: float = 0.0):
+    """
+    (text within max_tokens, tokens dropped). Cuts at whitespace and marks the gap;
+    `tail_share` of the budget goes to the end of the text (a file's conclusion).
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text, 0
+    if max_tokens <= 0:
+        return "", tokens
+    chars = int(max_tokens * len(text) / tokens)  # same density as the text itself
+    tail_chars = int(chars * tail_share)
+    head = text[:chars - tail_chars]
+    if " " in head[-200:]:
+        head = head[:head.rindex(" ")]
+    tail = text[len(text) - tail_chars:] if tail_chars else ""
+    if " " in tail[:200]:
+        tail = tail[tail.index(" ") + 1:]
+    dropped = tokens - estimate_tokens(head) - estimate_tokens(tail)
+    return f"{head} [... {dropped} tokens omitted ...] {tail}".rstrip(), dropped
+
+
+class PromptBudget:
+    """
+    Priority when space runs out: the question is always kept whole, then the
+    file (at most `file_share` of what is left, head and tail kept), then learned
+    context, then history from the newest turn back. Each past turn is cut to
+    `turn_tokens` (old research reports are long), and turns that don't fit are dropped.
+    """
+
+    def __init__(self, max_tokens: int, turn_tokens: int = 400, file_share: float = 0.6, max_turns: int = 5):
+        self.max_tokens = max_tokens
+        self.turn_tokens = turn_tokens
+        self.file_share = file_share
+        self.max_turns = max_turns
+
+    def fit(self, query: str, history=(), context: str = None, file_text: str = None, images: int = 0):
+        """{"history": [(role, content)], "context", "file_text", "tokens", "dropped": [what was cut]}"""
+        dropped = []
+        left = self.max_tokens - estimate_tokens(query) - images * IMAGE_TOKENS
+
+        if file_text:
+            file_text, cut = truncate_to_tokens(file_text, max(int(left * self.file_share), 0), tail_share=0.2)
+            if cut:
+                dropped.append(f"file: {cut} tokens")
+            left -= estimate_tokens(file_text)
+
+        if context:
+            context, cut = truncate_to_tokens(context, max(left // 2, 0))
+            if cut:
+                dropped.append(f"learned context: {cut} tokens")
+            left -= estimate_tokens(context)
+
+        turns = list(history)
+        if len(turns) > self.max_turns:
+            dropped.append(f"{len(turns) - self.max_turns} older turns")
+            turns = turns[-self.max_turns:]
+        kept = []
+        for i, (role, content) in enumerate(reversed(turns)):
+            content, cut = truncate_to_tokens(content, self.turn_tokens)
+            if estimate_tokens(content) > left:
+                dropped.append(f"{len(turns) - i} more turns over budget")
+                break
+            if cut:
+                dropped.append(f"turn {len(turns) - i}: {cut} tokens")
+            kept.append((role, content))
+            left -= estimate_tokens(content)
+        kept.reverse()
+
+        return {"history": kept, "context": context, "file_text": file_text,
+                "tokens": self.max_tokens - left, "dropped": dropped}
@@ -0,0 +1,236 @@
+"""Provider registry with cached health probes and per-provider circuit breakers."""
+from concurrent.futures import wait, FIRST_COMPLETED
+import asyncio
+import os
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. Then one trial call is let through (half-open):
+    success closes the breaker, failure re-opens it for twice as long (capped).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30, max_timeout: float = 600):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.open_for = reset_timeout
+        self.opened_at = 0.0
+        self.last_error = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_for:
+                self.state = HALF_OPEN
+            # One trial at a time; a trial slot that was handed out but never reported
+            # back (provider listed but not called) is released after reset_timeout
+            now = time.monotonic()
+            if self.state == HALF_OPEN and (self._trial_started is None or now - self._trial_started >= self.reset_timeout):
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.open_for = self.reset_timeout
+            self._trial_started = None
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200] if error is not None else None
+            if self.state == HALF_OPEN:
+                self.open_for = min(self.open_for * 2, self.max_timeout)
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._trial_started = None
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = max(self.open_for - (time.monotonic() - self.opened_at), 0) if self.state == OPEN else 0
+            return {"state": self.state, "failures": self.failures,
+                    "retry_in_s": round(retry_in, 1), "last_error": self.last_error}
+
+
+class HealthProbe:
+    """Runs `check()` on a daemon thread every `interval` seconds; callers read the cached result."""
+
+    def __init__(self, check, interval: float = 30):
+        self.check = check
+        self.interval = interval
+        self.healthy = False
+        self.checked_at = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            self.healthy = bool(self.check())
+        except Exception:
+            self.healthy = False
+        self.checked_at = time.time()
+        return self.healthy
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.refresh()  # first answer is synchronous so startup sees the real state
+
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                self.refresh()
+
+        threading.Thread(target=loop, daemon=True).start()
+
+
+class ProviderRegistry:
+    """
+    Ordered provider list. `available()` never blocks on the network: it only
+    reads env keys, the cached probe result and each provider's breaker. With an
+    LLMCache, the factories it hands out return a reused client instead of a new one.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30, cache=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache = cache
+        self._providers = []  # (name, factory, enabled, probe)
+        self.breakers = {}
+
+    def register(self, name: str, factory, enabled=None, probe: HealthProbe = None, env_keys=()):
+        """`env_keys` are the variables the client is built from; by default all must be set."""
+        if enabled is None and env_keys:
+            enabled = lambda: all(os.getenv(key) for key in env_keys)
+        if self.cache is not None:
+            factory = self._cached(name, factory, tuple(env_keys))
+        self._providers.append((name, factory, enabled, probe))
+        self.breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+    def _cached(self, name, factory, env_keys):
+        return lambda: self.cache.client(name, factory, env_keys)
+
+    def start(self):
+        for _, _, _, probe in self._providers:
+            if probe is not None:
+                probe.start()
+
+    def _usable(self, enabled, probe):
+        if enabled is not None and not enabled():
+            return False
+        return probe is None or probe.healthy
+
+    def available(self):
+        """[(factory, name)] of configured, healthy providers whose breaker lets a call through."""
+        return [(factory, name) for name, factory, enabled, probe in self._providers
+                if self._usable(enabled, probe) and self.breakers[name].allow()]
+
+    def record_success(self, name: str):
+        if name in self.breakers:
+            self.breakers[name].record_success()
+
+    def record_failure(self, name: str, error=None):
+        if name in self.breakers:
+            self.breakers[name].record_failure(error)
+
+    def status(self):
+        providers = []
+        for name, _, enabled, probe in self._providers:
+            entry = {"name": name, "configured": enabled is None or bool(enabled())}
+            if probe is not None:
+                entry["healthy"] = probe.healthy
+                entry["checked_at"] = probe.checked_at
+            entry.update(self.breakers[name].snapshot())
+            providers.append(entry)
+        return providers
+
+
+def hedged_call(executor, providers, call, hedge_delay=None):
+    """
+    Races `call(factory, name)` across providers in priority order. The first provider
+    starts at once; the next one starts when `hedge_delay` seconds pass without an
+    answer (None = never, i.e. plain sequential failover) or as soon as a running
+    provider fails. Returns (result, winner name, names launched); (None, None, launched)
+    if every provider failed.
+
+    Losers still queued are cancelled. A loser already talking to its API cannot be
+    interrupted from Python, so it finishes in the background and its result is dropped.
+    """
+    pending = list(providers)
+    running = {}
+    launched = []
+
+    def launch():
+        factory, name = pending.pop(0)
+        running[executor.submit(call, factory, name)] = name
+        launched.append(name)
+
+    if pending:
+        launch()
+    while running:
+        done, _ = wait(running, timeout=hedge_delay if pending else None, return_when=FIRST_COMPLETED)
+        if not done:
+            print(f"⏳ {launched[-1]} slow after {hedge_delay}s, hedging with {pending[0][1]}")
+            launch()
+            continue
+        for future in done:
+            name = running.pop(future)
+            if future.exception() is None:
+                for loser in running:
+                    loser.cancel()
+                return future.result(), name, launched
+            if pending:
+                launch()  # failed, don't wait out the hedge delay
+    return None, None, launched
+
+
+async def ahedged_call(providers, call, hedge_delay=None):
+    """
+    asyncio version of hedged_call: `call(factory, name)` is a coroutine function.
+    Unlike threads, losing calls are really cancelled, including their open requests.
+    """
+    pending = list(providers)
+    running = {}
+    launched = []
+
+    def launch():
+        factory, name = pending.pop(0)
+        running[asyncio.ensure_future(call(factory, name))] = name
+        launched.append(name)
+
+    if pending:
+        launch()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, timeout=hedge_delay if pending else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"⏳ {launched[-1]} slow after {hedge_delay}s, hedging with {pending[0][1]}")
+                launch()
+                continue
+            for task in done:
+                name = running.pop(task)
+                if task.exception() is None:
+                    return task.result(), name, launched
+                if pending:
+                    launch()
+        return None, None, launched
+    finally:
+        for task in running:
+            task.cancel()
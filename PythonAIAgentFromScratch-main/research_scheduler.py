@@ -0,0 +1,102 @@
+"""Per-query time budget for the parallel research engine's tool calls."""
+import asyncio
+import concurrent.futures
+import time
+
+
+class ResearchBudget:
+    """
+    One budget of `budget` seconds per query; every task also has its own
+    deadline, cut to whatever is left of the budget. Tasks run on a shared
+    executor that is never joined, so a straggler (a hung browser) costs a worker
+    thread in the background, not the response. Tasks still queued when they
+    miss their deadline are cancelled. `report` records how each source fared.
+    """
+
+    def __init__(self, executor, budget: float):
+        self.executor = executor
+        self.deadline = time.monotonic() + budget
+        self.tasks = {}     # name -> (future, deadline, started)
+        self.finished = {}  # name -> when the task completed, which may be before it is collected
+        self.report = {}    # name -> seconds taken, or "timed out" / "failed" / "skipped"
+
+    def remaining(self):
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def submit(self, name: str, fn, *args, timeout: float):
+        now = time.monotonic()
+        if now >= self.deadline:
+            self.report[name] = "skipped"
+            return
+        self._track(name, self.executor.submit(fn, *args), min(now + timeout, self.deadline), now)
+
+    def _track(self, name, future, deadline, started):
+        future.add_done_callback(lambda _: self.finished.setdefault(name, time.monotonic()))
+        self.tasks[name] = (future, deadline, started)
+
+    def _took(self, name, started):
+        return round(self.finished.get(name, time.monotonic()) - started, 2)
+
+    def result(self, name: str, default=None):
+        """The task's result, or `default` if it failed, was skipped or missed its deadline."""
+        if name not in self.tasks:
+            return default
+        future, deadline, started = self.tasks.pop(name)
+        try:
+            value = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except concurrent.futures.TimeoutError:
+            future.cancel()  # only stops it if it never started
+            self.report[name] = "timed out"
+            return default
+        except Exception:
+            self.report[name] = "failed"
+            return default
+        self.report[name] = self._took(name, started)
+        return value
+
+    def abandon(self):
+        """Gives up on every task not collected yet."""
+        for name, (future, _, _) in self.tasks.items():
+            future.cancel()
+            self.report.setdefault(name, "abandoned")
+        self.tasks.clear()
+
+    def made_the_cut(self):
+        return [name for name, outcome in self.report.items() if not isinstance(outcome, str)]
+
+    def summary(self):
+        return ", ".join(f"{name} {outcome}s" if not isinstance(outcome, str) else f"{name} {outcome}"
+                         for name, outcome in self.report.items())
+
+
+class AsyncResearchBudget(ResearchBudget):
+    """
+    asyncio version: tasks are coroutines, and the ones that miss their deadline are
+    cancelled. A coroutine stops at its next await; one waiting on a thread stops
+    waiting, and the thread is abandoned as in ResearchBudget.
+    """
+
+    def __init__(self, budget: float):
+        super().__init__(None, budget)
+
+    def submit(self, name: str, coro_fn, *args, timeout: float):
+        now = time.monotonic()
+        if now >= self.deadline:
+            self.report[name] = "skipped"
+            return
+        self._track(name, asyncio.ensure_future(coro_fn(*args)), min(now + timeout, self.deadline), now)
+
+    async def result(self, name: str, default=None):
+        if name not in self.tasks:
+            return default
+        task, deadline, started = self.tasks.pop(name)
+        try:
+            value = await asyncio.wait_for(task, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.report[name] = "timed out"  # wait_for cancelled the task
+            return default
+        except Exception:
+            self.report[name] = "failed"
+            return default
+        self.report[name] = self._took(name, started)
+        return value
@@ -0,0 +1,89 @@
+"""Bounded answer cache in front of main.run_agent."""
+from collections import OrderedDict
+import hashlib
+import re
+import threading
+import time
+
+# Seconds an answer stays fresh, by the source that produced it. 0 = never cached.
+SOURCE_TTLS = {
+    "Local Logic": 24 * 3600,
+    "Local System FAQ": 24 * 3600,
+    "Math Computation": 24 * 3600,
+    "AI Opinion": 3600,
+    "Knowledge Base": 600,
+    "Local Speed Engine": 300,
+    "Extreme Research Engine": 300,
+    "Local Intelligence": 0,  # everything failed, retry next time
+}
+DEFAULT_TTL = 1800  # answers from cloud/local LLM providers
+
+
+def normalize_query(query: str):
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+class ResponseCache:
+    """LRU cache of run_agent results with a per-source TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 512, ttls: dict = None, default_ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttls = SOURCE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @staticmethod
+    def key(query: str, file_content: str = None, is_image: bool = False):
+        file_hash = hashlib.sha256(file_content.encode("utf-8")).hexdigest() if file_content else None
+        return normalize_query(query), file_hash, bool(is_image)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result, source: str):
+        ttl = self.ttls.get(source, self.default_ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, query: str):
+        """Drops every cached answer to `query`, with or without a file."""
+        normalized = normalize_query(query)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == normalized]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,196 @@
+"""Persistent cache of search tool results, shared by every server process."""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sqlite3
+import threading
+import time
+from response_cache import normalize_query
+
+# Seconds a result is fresh, by tool; after that it is served stale for `stale_ttl`
+# more seconds while a background refresh runs, then dropped
+TOOL_TTLS = {"search_web": 3600, "search_wikipedia": 7 * 24 * 3600}
+DEFAULT_TTL = 3600
+REFRESH_LEASE = 60  # seconds one process owns a row's refresh; others keep serving stale
+TOUCH_INTERVAL = 60  # a hit only records its access time when the stored one is older than this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    tool TEXT NOT NULL, query TEXT NOT NULL, max_results INTEGER NOT NULL, value TEXT NOT NULL,
+    fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, refreshing_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (tool, query, max_results));
+CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache(accessed_at);
+"""
+SQL_GET = "SELECT value, fetched_at, accessed_at FROM search_cache WHERE tool = ? AND query = ? AND max_results = ?"
+SQL_TOUCH = "UPDATE search_cache SET accessed_at = ? WHERE tool = ? AND query = ? AND max_results = ?"
+SQL_PUT = ("INSERT INTO search_cache(tool, query, max_results, value, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT(tool, query, max_results) DO UPDATE SET value = excluded.value, "
+           "fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at, refreshing_until = 0")
+# Compare-and-set, so across processes exactly one refreshes a stale row
+SQL_CLAIM = ("UPDATE search_cache SET refreshing_until = ? "
+             "WHERE tool = ? AND query = ? AND max_results = ? AND refreshing_until < ?")
+SQL_RELEASE = "UPDATE search_cache SET refreshing_until = 0 WHERE tool = ? AND query = ? AND max_results = ?"
+SQL_COUNT = "SELECT COUNT(*) FROM search_cache"
+SQL_EVICT = ("DELETE FROM search_cache WHERE rowid IN "
+             "(SELECT rowid FROM search_cache ORDER BY accessed_at LIMIT ?)")
+SQL_EXPIRE = "DELETE FROM search_cache WHERE fetched_at < ? - ? AND tool = ?"
+
+_cache = None
+_lock = threading.Lock()
+
+
+# Settings are read on use, not at import, so values loaded later by load_dotenv() apply
+def _env(name, default):
+    return os.getenv(name, default)
+
+
+class SearchCache:
+    """
+    SQLite (WAL) table keyed by tool, normalized query and max_results. A fresh
+    row is returned as is; a stale one is returned at once and refreshed in the
+    background (stale-while-revalidate); a miss runs the tool. The table keeps
+    at most `max_entries` rows, least recently used (to `touch_interval`) go first.
+    """
+
+    def __init__(self, path: str, ttls: dict = None, default_ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = 24 * 3600, max_entries: int = 5000, touch_interval: float = TOUCH_INTERVAL):
+        self.path = path
+        self.ttls = TOOL_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+        self._puts = 0
+        self.hits = self.stale_hits = self.misses = self.refreshes = 0
+        with self.conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def conn(self):
+        # sqlite3 connections are per thread; each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl(self, tool: str):
+        return self.ttls.get(tool, self.default_ttl)
+
+    def get(self, tool: str, query: str, max_results: int):
+        """(value, is_fresh), or None when missing or past the stale window."""
+        key = (tool, normalize_query(query), max_results)
+        conn = self.conn()
+        row = conn.execute(SQL_GET, key).fetchone()
+        if row is None:
+            return None
+        value, fetched_at, accessed_at = row
+        now = time.time()
+        age = now - fetched_at
+        if age >= self.ttl(tool) + self.stale_ttl:
+            return None
+        # LRU order to the minute is enough; touching on every hit would make reads
+        # contend for the write lock with every other process
+        if now - accessed_at > self.touch_interval:
+            try:
+                with conn:
+                    conn.execute(SQL_TOUCH, (now,) + key)
+            except sqlite3.OperationalError:
+                pass  # locked: the hit still counts, the access time waits for the next one
+        return value, age < self.ttl(tool)
+
+    def put(self, tool: str, query: str, max_results: int, value: str):
+        now = time.time()
+        conn = self.conn()
+        with conn:
+            conn.execute(SQL_PUT, (tool, normalize_query(query), max_results, value, now, now))
+        self._puts += 1
+        if self._puts % 50 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drops rows past their stale window, then the least recently used beyond max_entries."""
+        conn = self.conn()
+        now = time.time()
+        with conn:
+            for tool in set(self.ttls) | {row[0] for row in conn.execute("SELECT DISTINCT tool FROM search_cache")}:
+                conn.execute(SQL_EXPIRE, (now, self.ttl(tool) + self.stale_ttl, tool))
+            excess = conn.execute(SQL_COUNT).fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(SQL_EVICT, (excess,))
+
+    def cached(self, tool: str, query: str, max_results: int, fetch, cacheable=None):
+        """
+        `fetch()`'s result for this query, from the cache when possible. Results
+        for which `cacheable(result)` is false (errors) are returned but not stored.
+        A cache that can't be read or written (locked, corrupt, read-only) is skipped.
+        """
+        try:
+            entry = self.get(tool, query, max_results)
+        except sqlite3.Error as e:
+            print(f"⚠️ Search cache read failed, searching directly: {e}")
+            entry = None
+        if entry is not None:
+            value, fresh = entry
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                try:
+                    self._revalidate(tool, query, max_results, fetch, cacheable)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Search cache refresh of {tool} '{query}' not started: {e}")
+            return value
+        self.misses += 1
+        value = fetch()
+        if cacheable is None or cacheable(value):
+            try:
+                self.put(tool, query, max_results, value)
+            except sqlite3.Error as e:
+                print(f"⚠️ Search cache write failed: {e}")
+        return value
+
+    def _revalidate(self, tool, query, max_results, fetch, cacheable):
+        key = (tool, normalize_query(query), max_results)
+        now = time.time()
+        conn = self.conn()
+        with conn:
+            claimed = conn.execute(SQL_CLAIM, (now + REFRESH_LEASE,) + key + (now,)).rowcount == 1
+        if not claimed:
+            return  # another thread or process is on it
+
+        def refresh():
+            try:
+                value = fetch()
+                if cacheable is None or cacheable(value):
+                    self.put(tool, query, max_results, value)
+                    self.refreshes += 1
+                    return
+            except Exception as e:
+                print(f"⚠️ Background refresh of {tool} '{query}' failed: {e}")
+            with self.conn() as refresh_conn:
+                refresh_conn.execute(SQL_RELEASE, key)  # keep serving stale, retry on the next hit
+
+        self._refresher.submit(refresh)
+
+    def stats(self):
+        rows = self.conn().execute(SQL_COUNT).fetchone()[0]
+        return {"entries": rows, "hits": self.hits, "stale_hits": self.stale_hits,
+                "misses": self.misses, "refreshes": self.refreshes}
+
+
+def get_cache():
+    """Process-wide SearchCache configured from SEARCH_CACHE_* variables, opened on first use."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                ttls = dict(TOOL_TTLS)
+                ttls["search_web"] = float(_env('SEARCH_CACHE_TTL_WEB', ttls["search_web"]))
+                ttls["search_wikipedia"] = float(_env('SEARCH_CACHE_TTL_WIKI', ttls["search_wikipedia"]))
+                _cache = SearchCache(_env('SEARCH_CACHE_DB', "search_cache.db"), ttls=ttls,
+                                     stale_ttl=float(_env('SEARCH_CACHE_STALE', 24 * 3600)),
+                                     max_entries=int(_env('SEARCH_CACHE_MAX_ENTRIES', 5000)))
+    return _cache
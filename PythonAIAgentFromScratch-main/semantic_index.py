@@ -0,0 +1,89 @@
+"""Offline semantic retrieval over the knowledge base (no model download, no network)."""
+import re
+import zlib
+import numpy as np
+from knowledge_index import STOP_WORDS
+
+
+def ngram_vector(text: str, dim: int = 512, n_sizes=(3, 4)):
+    """
+    Hashed character n-gram vector of `text`, L2 normalised. Words are padded
+    with spaces so prefixes/suffixes get their own grams, which is what lets
+    "newtons laws" land next to "newton law".
+    """
+    ids, signs = [], []
+    for word in re.findall(r"\w+", text.lower()):
+        if word in STOP_WORDS:
+            continue
+        padded = f" {word} "
+        for n in n_sizes:
+            for i in range(max(len(padded) - n + 1, 1)):
+                h = zlib.crc32(padded[i:i + n].encode("utf-8"))
+                ids.append(h % dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+    if not ids:
+        return np.zeros(dim, dtype=np.float32)
+    vec = np.bincount(ids, weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SemanticIndex:
+    """
+    One row per topic in a contiguous float32 matrix, mixing the topic vector
+    with the first `content_chars` of its content. A query is a single
+    matrix-vector product followed by argpartition for the top-k rows.
+    """
+
+    def __init__(self, items=(), dim: int = 512, topic_weight: float = 2.0, content_chars: int = 2000):
+        self.dim, self.topic_weight, self.content_chars = dim, topic_weight, content_chars
+        self.matrix = np.zeros((1024, dim), dtype=np.float32)
+        self.rows = {}        # topic -> row
+        self.row_topics = []  # row -> topic (None when free)
+        self._free = []
+        for topic, content in items:
+            self.add(topic, content)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _embed(self, topic, content):
+        vec = self.topic_weight * ngram_vector(topic, self.dim) + ngram_vector(content[:self.content_chars], self.dim)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def add(self, topic: str, content: str):
+        row = self.rows.get(topic)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self.row_topics)
+                self.row_topics.append(None)
+                if row >= len(self.matrix):
+                    grown = np.zeros((len(self.matrix) * 2, self.dim), dtype=np.float32)
+                    grown[:len(self.matrix)] = self.matrix
+                    self.matrix = grown
+            self.rows[topic] = row
+            self.row_topics[row] = topic
+        self.matrix[row] = self._embed(topic, content)
+
+    def remove(self, topic: str):
+        row = self.rows.pop(topic, None)
+        if row is None:
+            return
+        self.matrix[row] = 0.0
+        self.row_topics[row] = None
+        self._free.append(row)
+
+    def search(self, query: str, n_results: int = 2, threshold: float = 0.5):
+        """Returns [(cosine similarity, topic)] best first."""
+        if not self.rows:
+            return []
+        scores = self.matrix[:len(self.row_topics)] @ ngram_vector(query, self.dim)
+        if self._free:
+            scores[self._free] = -np.inf  # freed rows rank last, even with threshold <= 0
+        k = min(n_results, len(self.rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[r]), self.row_topics[r]) for r in top if scores[r] >= threshold]
@@ -0,0 +1,217 @@
+"""Local spelling correction (SymSpell-style symmetric delete) for queries."""
+import json
+import os
+import re
+import threading
+
+WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spelling_words.txt")
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+
+
+def edit_distance(a: str, b: str, max_distance: int):
+    """Damerau-Levenshtein (optimal string alignment) distance, or max_distance + 1 if larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Shared prefix and suffix never change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return len(a) + len(b)
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SpellingCorrector:
+    """
+    Every dictionary word is indexed under all strings reachable by deleting up to
+    `max_distance` characters from its first `prefix_length` letters. A lookup
+    generates the same deletes for the input word, so candidates come from a
+    handful of dict hits instead of a scan, and only those are checked with the
+    real edit distance.
+
+    Words come from a frequency list, the knowledge base topics and corrections
+    accepted earlier (`learn`).
+
+    A word the dictionary doesn't know is as likely a name ("virat kohli", "bts")
+    as a typo, so a rewrite is only confident when the winner both beats the other
+    candidates and is common (`confident_count` occurrences); a lone candidate
+    needs five times that, since nothing but the edit distance says it was meant.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7, history_path: str = None,
+                 confident_count: int = 10**7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.history_path = history_path
+        self.confident_count = confident_count
+        self.counts = {}    # word -> frequency
+        self.deletes = {}   # deleted prefix -> [words]
+        self.learned = {}   # misspelt word -> accepted correction
+        self._lock = threading.Lock()
+        if history_path and os.path.exists(history_path):
+            with open(history_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.learned[entry["typo"]] = entry["correction"]
+                    except (ValueError, KeyError):
+                        continue  # torn last line
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _delete_variants(self, word):
+        word = word[:self.prefix_length]
+        variants, frontier = {word}, {word}
+        for _ in range(self.max_distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def add_word(self, word: str, count: int = 1):
+        word = word.lower()
+        with self._lock:
+            if word in self.counts:
+                self.counts[word] = max(self.counts[word], count)
+                return
+            self.counts[word] = count
+            for variant in self._delete_variants(word):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def add_text(self, text: str, count: int):
+        for word in WORD_RE.findall(text):
+            if len(word) > 2:
+                self.add_word(word, count)
+
+    def load_words(self, path: str = WORDS_FILE, limit: int = None):
+        """Loads a "word count" per line frequency list (lines starting with # are comments)."""
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(line for line in f if not line.startswith("#")):
+                if limit is not None and n >= limit:
+                    break
+                word, _, count = line.partition(" ")
+                self.add_word(word, int(count))
+        return self
+
+    def lookup(self, word: str):
+        """[(candidate, distance, count)] at the smallest distance found, most frequent first."""
+        word = word.lower()
+        if word in self.counts:
+            return [(word, 0, self.counts[word])]
+        # One edit on short words: at two edits, half the 3-4 letter dictionary matches
+        max_distance = min(self.max_distance, 1 if len(word) <= 4 else self.max_distance)
+        best, found = max_distance, {}
+        prefix = word[:self.prefix_length]
+        level, seen = [prefix], {prefix}
+        while level:
+            # Deletes are visited shortest-edit first; once more characters are deleted
+            # than the best distance so far, nothing closer can turn up
+            if len(prefix) - len(level[0]) > best:
+                break
+            for variant in level:
+                for candidate in self.deletes.get(variant, ()):
+                    if candidate in found or abs(len(candidate) - len(word)) > best:
+                        continue
+                    distance = edit_distance(word, candidate, best)
+                    found[candidate] = distance
+                    best = min(best, distance)
+            if len(prefix) - len(level[0]) >= max_distance:
+                break
+            next_level = []
+            for variant in level:
+                for i in range(len(variant)):
+                    shorter = variant[:i] + variant[i + 1:]
+                    if shorter and shorter not in seen:
+                        seen.add(shorter)
+                        next_level.append(shorter)
+            level = next_level
+        matches = [(c, d, self.counts[c]) for c, d in found.items() if d == best]
+        matches.sort(key=lambda m: -m[2])
+        return matches
+
+    def correct_word(self, word: str, proper_noun: bool = False):
+        """
+        (correction, confidence in [0, 1]); confidence 0 means "no idea, ask someone else".
+        An unknown `proper_noun` (capitalized mid-sentence, or all caps) is left as is.
+        """
+        lower = word.lower()
+        if lower in self.learned:
+            return self.learned[lower], 1.0
+        if lower in self.counts or len(lower) < 3 or proper_noun:
+            return word, 1.0
+        matches = self.lookup(lower)
+        if not matches:
+            return word, 0.0
+        best, distance, count = matches[0]
+        runner_up = matches[1][2] if len(matches) > 1 else 0
+        # Close to 1 when the winner clearly dominates the alternatives at the same distance
+        # and is a common word; halved for distance 2 on short words, where many real words
+        # are that close, and capped for 3-letter words, which are mostly acronyms
+        needed = self.confident_count * (5 if runner_up == 0 else 1)
+        confidence = count / (count + runner_up) * min(count / needed, 1.0)
+        if distance > 1 and len(lower) < 6:
+            confidence /= 2
+        if len(lower) <= 3:
+            confidence = min(confidence, 0.5)
+        return best, confidence
+
+    def correct(self, query: str, min_confidence: float = 0.0):
+        """
+        Returns (corrected query, was_corrected, confidence): confidence is that of the
+        least certain word, and words less certain than `min_confidence` are left as they
+        are. Only alphabetic words are touched, digits and punctuation stay.
+        """
+        confidence = 1.0
+        out, last = [], 0
+        for match in WORD_RE.finditer(query):
+            word = match.group(0)
+            proper_noun = (len(word) > 1 and word.isupper()) or (word[0].isupper() and query[:match.start()].strip() != "")
+            fixed, word_confidence = self.correct_word(word, proper_noun)
+            confidence = min(confidence, word_confidence)
+            if word_confidence < min_confidence:
+                continue
+            if fixed.lower() != word.lower():
+                if word[0].isupper():
+                    fixed = fixed[0].upper() + fixed[1:]
+                out.append(query[last:match.start()])
+                out.append(fixed)
+                last = match.end()
+        out.append(query[last:])
+        corrected = "".join(out)
+        return corrected, corrected != query, confidence
+
+    def learn(self, original: str, corrected: str):
+        """
+        Records a correction accepted from elsewhere (e.g. the LLM): words that changed
+        map to their replacement from now on, and new words join the vocabulary.
+        """
+        original_words = [w.lower() for w in WORD_RE.findall(original)]
+        corrected_words = [w.lower() for w in WORD_RE.findall(corrected)]
+        if len(original_words) != len(corrected_words):
+            self.add_text(corrected, 1)
+            return
+        entries = []
+        for typo, fixed in zip(original_words, corrected_words):
+            if typo != fixed and typo not in self.counts:
+                self.learned[typo] = fixed
+                self.add_word(fixed, max(self.counts.get(fixed, 0), 1))
+                entries.append({"typo": typo, "correction": fixed})
+        if entries and self.history_path:
+            with self._lock, open(self.history_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
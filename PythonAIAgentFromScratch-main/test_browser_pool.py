@@ -0,0 +1,187 @@
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from browser_pool import BrowserPool
+
+class FakeDriver:
+    """Just enough of a selenium driver for the pool: tabs, cookies, a startup cost and a crash switch."""
+    startup = 0.05
+    _ids = itertools.count()
+
+    def __init__(self):
+        time.sleep(self.startup)
+        self.handles = [f"tab{next(self._ids)}"]
+        self.current = self.handles[0]
+        self.cookies = {}
+        self.crashed = self.quit_called = False
+        self.switch_to = self
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    @property
+    def window_handles(self):
+        if self.crashed:
+            raise ConnectionError("chrome not reachable")
+        return list(self.handles)
+
+    def new_window(self, kind):
+        self.current = f"tab{next(self._ids)}"
+        self.handles.append(self.current)
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        self.handles.remove(self.current)
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def quit(self):
+        self.quit_called = True
+
+def test_lease_reuses_warm_browsers_in_fresh_tabs():
+    pool = BrowserPool(FakeDriver, size=2)
+    with pool.lease() as driver:
+        first_tab = driver.current_window_handle
+        driver.cookies["session"] = "x"
+        first = driver
+    with pool.lease() as driver:
+        assert driver is first  # warm browser, no second startup
+        assert driver.current_window_handle != first_tab  # but a tab of its own
+        assert driver.cookies == {}
+    assert len(first.handles) == 1  # lease tabs are closed on return
+    assert pool.stats()["created"] == 1 and pool.stats()["leases"] == 2
+    print("✅ Warm browser reused, one fresh tab per lease.")
+
+def test_size_limit_and_concurrency():
+    pool = BrowserPool(FakeDriver, size=3)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def visit(_):
+        with pool.lease() as driver:
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(visit, range(30)))
+    stats = pool.stats()
+    assert peak[0] <= 3 and stats["created"] <= 3 and stats["live"] <= 3
+    assert stats["leases"] == 30
+
+    busy = BrowserPool(FakeDriver, size=1)
+    with busy.lease():
+        try:
+            with busy.lease(timeout=0.1):
+                assert False, "pool should be exhausted"
+        except TimeoutError:
+            pass
+    print(f"✅ 30 visits on {stats['created']} browsers, never more than 3 at once.")
+
+def test_recycles_crashed_and_worn_browsers():
+    pool = BrowserPool(FakeDriver, size=1, max_uses=3)
+    with pool.lease() as driver:
+        driver.crashed = True  # dies mid-lease
+    assert driver.quit_called and pool.stats()["live"] == 0
+    with pool.lease() as healthy:
+        assert healthy is not driver
+
+    with pool.lease() as same:
+        assert same is healthy
+    with pool.lease():
+        pass
+    assert healthy.quit_called  # retired after max_uses leases
+    with pool.lease() as fresh:
+        assert fresh is not healthy
+
+    # Crashed while idle: caught by the health check on the next lease
+    fresh.crashed = True
+    with pool.lease() as replacement:
+        assert replacement is not fresh
+    print("✅ Crashed and worn-out browsers are replaced.")
+
+def test_idle_browsers_are_quit():
+    pool = BrowserPool(FakeDriver, size=2, idle_timeout=0.05)
+    with pool.lease() as driver:
+        pass
+    time.sleep(0.1)
+    with pool.lease() as other:
+        assert other is not driver
+    assert driver.quit_called
+    print("✅ Idle browsers give their memory back.")
+
+def test_quitting_does_not_block_other_borrowers():
+    class SlowQuit(FakeDriver):
+        def quit(self):
+            time.sleep(0.5)  # a real Chrome takes a while to shut down
+            super().quit()
+
+    pool = BrowserPool(SlowQuit, size=2, idle_timeout=0.05)
+    with pool.lease() as expired:
+        pass
+    time.sleep(0.1)
+    def borrow():
+        with pool.lease():  # reaps `expired` on the way in
+            pass
+    reaper = threading.Thread(target=borrow)
+    reaper.start()
+    time.sleep(0.1)  # now quitting the expired browser
+    start = time.perf_counter()
+    pool.stats()
+    with pool.lease():
+        pass
+    assert time.perf_counter() - start < 0.3  # not held up by the 0.5 s quit
+    reaper.join(2)
+    assert expired.quit_called and pool.stats()["recycled"] == 1
+    print("✅ Browsers are quit outside the pool lock.")
+
+def benchmark_chrome(pages: int = 20):
+    """Per-call Chrome vs the pool on local file:// pages (needs Chrome: python test_browser_pool.py --chrome)."""
+    from selenium.webdriver.common.by import By
+    from tools import _browse_driver
+
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = []
+        for i in range(pages):
+            path = os.path.join(tmp, f"page{i}.html")
+            with open(path, "w") as f:
+                f.write(f"<html><body><h1>Page {i}</h1><p>{'text ' * 200}</p></body></html>")
+            urls.append("file://" + path)
+
+        start = time.perf_counter()
+        for url in urls:
+            driver = _browse_driver()
+            driver.get(url)
+            driver.find_element(By.TAG_NAME, "body").text
+            driver.quit()
+        per_call = time.perf_counter() - start
+
+        pool = BrowserPool(_browse_driver, size=4)
+        start = time.perf_counter()
+        for url in urls:
+            with pool.lease() as driver:
+                driver.get(url)
+                driver.find_element(By.TAG_NAME, "body").text
+        pooled = time.perf_counter() - start
+        pool.close()
+    print(f"Chrome per call: {per_call / pages * 1000:.0f} ms/page, pooled: {pooled / pages * 1000:.0f} ms/page")
+
+if __name__ == "__main__":
+    test_lease_reuses_warm_browsers_in_fresh_tabs()
+    test_size_limit_and_concurrency()
+    test_recycles_crashed_and_worn_browsers()
+    test_idle_browsers_are_quit()
+    test_quitting_does_not_block_other_borrowers()
+    if "--chrome" in sys.argv:
+        benchmark_chrome()
@@ -0,0 +1,86 @@
+import io
+import json
+import main
+from main import parse_training_stream, train_agent_bulk
+
+class RecordingStore:
+    """Stands in for main.store_knowledge_many so nothing reaches the real knowledge base."""
+    def __init__(self):
+        self.batches = []
+    def __call__(self, items):
+        self.batches.append(list(items))
+    def __enter__(self):
+        self.original, main.store_knowledge_many = main.store_knowledge_many, self
+        return self
+    def __exit__(self, *exc):
+        main.store_knowledge_many = self.original
+
+def test_parse_ndjson_and_csv():
+    ndjson = io.StringIO('{"topic": "ipl", "content": "Indian Premier League"}\n'
+                         '\n'
+                         '{"topic": "broken", "content": \n'
+                         '["not", "an", "object"]\n'
+                         '{"topic": "gravity", "content": "Mass attracts mass"}')
+    records = list(parse_training_stream(ndjson))
+    assert [line_no for line_no, _ in records] == [1, 3, 4, 5]  # blank line 2 skipped, numbering kept
+    assert records[0][1] == {"topic": "ipl", "content": "Indian Premier League"}
+    assert records[1][1] is None and records[2][1] == ["not", "an", "object"]
+
+    csv_text = io.StringIO('topic,content\n'
+                           'ipl,Indian Premier League\n'
+                           '"newton law","F = ma, and\nits friends"\n'
+                           'only a topic\n')
+    records = list(parse_training_stream(csv_text, "csv"))
+    assert records[0] == (2, {"topic": "ipl", "content": "Indian Premier League"})
+    assert records[1][1]["content"] == "F = ma, and\nits friends"  # quoted newline stays in the field
+    assert records[2][1]["content"] is None
+    print("✅ NDJSON and CSV lines are parsed with their line numbers.")
+
+def test_batches_skips_and_stats():
+    lines = [json.dumps({"topic": f" topic {i} ", "content": f" content {i} "}) for i in range(5)]
+    lines.insert(2, "{not json")
+    lines.insert(4, json.dumps({"topic": "no content"}))
+    lines.insert(5, json.dumps({"topic": "  ", "content": "blank topic"}))
+    progress = []
+    with RecordingStore() as store:
+        stats = train_agent_bulk(parse_training_stream(lines), batch_size=2,
+                                 progress=lambda stored, skipped: progress.append((stored, skipped)))
+    assert [len(batch) for batch in store.batches] == [2, 2, 1]
+    assert store.batches[0][0] == ("topic 0", "content 0")  # trimmed
+    assert (stats['stored'], stats['skipped'], stats['batches']) == (5, 3, 3)
+    assert stats['errors'] == ["line 3: could not be parsed",
+                               "line 5: expected non-empty 'topic' and 'content'",
+                               "line 6: expected non-empty 'topic' and 'content'"]
+    assert progress == [(2, 0), (4, 3), (5, 3)]
+    assert stats['records_per_sec'] > 0 and stats['seconds'] >= 0
+
+    with RecordingStore() as store:
+        stats = train_agent_bulk(parse_training_stream(lines[:2]), batch_size=2)
+    assert [len(batch) for batch in store.batches] == [2]  # exact multiple: no empty last batch
+
+    with RecordingStore() as store:
+        stats = train_agent_bulk(parse_training_stream(["{bad"] * 30 + [""]), batch_size=2)
+    assert store.batches == [] and (stats['stored'], stats['skipped'], stats['batches']) == (0, 30, 0)
+    assert len(stats['errors']) == 20  # capped
+    print("✅ Bulk training batches, skips bad lines and reports stats.")
+
+def test_train_bulk_endpoint():
+    from app import app
+    client = app.test_client()
+    body = "\n".join(json.dumps({"topic": f"t{i}", "content": f"c{i}"}) for i in range(3)) + "\n{oops\n"
+    with RecordingStore() as store:
+        data = client.post("/train/bulk?batch_size=2", data=body, content_type="application/x-ndjson").get_json()
+    assert data['success'] and (data['stored'], data['skipped'], data['batches']) == (3, 1, 2)
+    assert [len(batch) for batch in store.batches] == [2, 1]
+
+    with RecordingStore() as store:
+        data = client.post("/train/bulk", data="topic,content\nipl,cricket\n,missing topic\n",
+                           content_type="text/csv").get_json()
+    assert data['success'] and (data['stored'], data['skipped']) == (1, 1)
+    assert store.batches == [[("ipl", "cricket")]]
+    print("✅ /train/bulk streams NDJSON and CSV bodies.")
+
+if __name__ == "__main__":
+    test_parse_ndjson_and_csv()
+    test_batches_skips_and_stats()
+    test_train_bulk_endpoint()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+from dedup import MinHashLSH, TopicAliases, topics_overlap
+
+REPORT = """**Core AI Insight:**
+Newton's laws of motion are three physical laws that describe the relationship between the motion of an object
+and the forces acting on it. The first law states that an object remains at rest or in uniform motion unless acted
+upon by a net force. The second law states that force equals mass times acceleration. The third law states that for
+every action there is an equal and opposite reaction."""
+
+def test_near_duplicates_are_detected():
+    lsh = MinHashLSH(threshold=0.8)
+    lsh.add("newton law", "### 🧠 Deep Parallel Intelligence Report: Newton Law\n" + REPORT)
+    lsh.add("what is python", "Python is a high-level, general-purpose programming language.")
+    lsh.add("ipl", "The Indian Premier League is a men's Twenty20 cricket league held annually in India.")
+
+    (similarity, topic), = lsh.query("### 🧠 Deep Parallel Intelligence Report: Newtons Laws\n" + REPORT)
+    assert topic == "newton law" and similarity >= 0.8
+    assert lsh.query("Python is a snake found in Africa, Asia and Australia.") == []
+
+    lsh.add("WHAT IS NEWTONS LAW", "### 🧠 Deep Parallel Intelligence Report: What Is Newtons Law\n" + REPORT)
+    assert [sorted(g) for g in lsh.duplicate_groups()] == [["WHAT IS NEWTONS LAW", "newton law"]]
+    lsh.remove("newton law")
+    assert lsh.duplicate_groups() == [] and len(lsh) == 3
+    print("✅ MinHash/LSH finds near-duplicate reports and ignores unrelated content.")
+
+def test_aliases_follow_merges_and_persist():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "aliases.jsonl")
+        aliases = TopicAliases(path)
+        aliases.add("Newtons Laws", "newton law")
+        assert aliases.resolve("newtons laws") == "newton law"
+        aliases.add("newton law", "WHAT IS NEWTONS LAW")  # the canonical topic was merged away later
+        assert aliases.resolve("newtons laws") == "WHAT IS NEWTONS LAW"
+        assert aliases.resolve("newton law") == "WHAT IS NEWTONS LAW"
+        assert aliases.resolve("what is python") is None
+
+        with open(path, "a") as f:
+            f.write('{"alias": "torn')
+        reloaded = TopicAliases(path)
+        assert reloaded.aliases == aliases.aliases and len(reloaded) == 2
+    print("✅ Topic aliases follow chained merges and survive a restart.")
+
+def test_aliases_of_deleted_topics_are_dropped():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "aliases.jsonl")
+        aliases = TopicAliases(path)
+        aliases.add("newtons laws", "newton law")
+        aliases.add("laws of newton", "newton law")
+        aliases.add("python language", "what is python")
+        aliases.remove("newton law")  # the canonical topic was deleted
+        assert aliases.resolve("newtons laws") is None and aliases.resolve("laws of newton") is None
+        aliases.remove("python language")  # so was a query that had been aliased
+        assert aliases.aliases == {}
+        assert TopicAliases(path).aliases == {}
+    print("✅ Deleting a topic drops the aliases to and from it.")
+
+def test_only_topics_sharing_a_word_are_related():
+    assert topics_overlap("Newtons Laws", "what is newtons law")
+    assert not topics_overlap("what is python", "who is hardik pandya")  # stop words don't count
+    assert not topics_overlap("ipl 2019", "ipl2016")
+    print("✅ Topics need a word in common before one is aliased to the other.")
+
+if __name__ == "__main__":
+    test_near_duplicates_are_detected()
+    test_aliases_follow_merges_and_persist()
+    test_aliases_of_deleted_topics_are_dropped()
+    test_only_topics_sharing_a_word_are_related()
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http_pool
+
+class StubGemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = 0
+    calls = 0
+    client_ports = set()
+    paths = []
+    retry_after = None  # sent with the 503s when set
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        cls.calls += 1
+        cls.paths.append(self.path)
+        cls.client_ports.add(self.client_address[1])
+        if cls.failures:
+            cls.failures -= 1
+            status, data = 503, {"error": {"message": "overloaded"}}
+        else:
+            text = json.loads(body)["contents"][0]["parts"][0]["text"]
+            status, data = 200, {"candidates": [{"content": {"parts": [{"text": f"echo: {text}"}]}}]}
+        out = json.dumps(data).encode()
+        self.send_response(status)
+        if status == 503 and cls.retry_after is not None:
+            self.send_header("Retry-After", cls.retry_after)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/stub:generateContent"
+
+def _post(session, url, text):
+    payload = {"contents": [{"role": "user", "parts": [{"text": text}]}]}
+    return session.post(url, json=payload, timeout=http_pool.timeout())
+
+def test_retries_and_keep_alive():
+    server, url = _serve()
+    try:
+        session = http_pool.get_session("test-retry", pool_size=2, retries=3, backoff=0)
+        assert http_pool.get_session("test-retry") is session  # shared, not rebuilt
+
+        StubGemini.failures, StubGemini.calls = 2, 0
+        response = _post(session, url, "hello")
+        assert response.status_code == 200 and StubGemini.calls == 3  # two 503s retried
+        assert response.json()["candidates"][0]["content"]["parts"][0]["text"] == "echo: hello"
+
+        StubGemini.client_ports.clear()
+        for i in range(5):
+            assert _post(session, url, f"q{i}").status_code == 200
+        assert len(StubGemini.client_ports) == 1  # one kept-alive connection served every call
+    finally:
+        server.shutdown()
+    print("✅ Pooled session retries 5xx and reuses one keep-alive connection.")
+
+def test_retries_give_up():
+    server, url = _serve()
+    try:
+        session = http_pool.get_session("test-give-up", retries=1, backoff=0)
+        StubGemini.failures, StubGemini.calls = 5, 0
+        response = _post(session, url, "hello")
+        assert response.status_code == 503 and StubGemini.calls == 2  # caller sees the last error
+    finally:
+        StubGemini.failures = 0
+        server.shutdown()
+    print("✅ Pooled session returns the final 5xx once retries are exhausted.")
+
+def test_concurrent_callers_share_pool():
+    server, url = _serve()
+    try:
+        session = http_pool.get_session("test-threads", pool_size=4, retries=0)
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(_post(session, url, f"t{i}").status_code))
+                   for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [200] * 16
+    finally:
+        server.shutdown()
+    print("✅ Concurrent callers share one thread-safe pool.")
+
+def test_async_post_retries_on_one_client():
+    server, url = _serve()
+
+    async def run():
+        client = http_pool.get_async_client()
+        assert http_pool.get_async_client() is client  # one pool per event loop
+        payload = {"contents": [{"role": "user", "parts": [{"text": "hi"}]}]}
+        StubGemini.failures, StubGemini.calls = 1, 0
+        first = await http_pool.apost(client, url, retries=2, backoff=0, json=payload)
+        assert first.status_code == 200 and StubGemini.calls == 2
+        responses = await asyncio.gather(*[http_pool.apost(client, url, backoff=0, json=payload) for _ in range(20)])
+        await client.aclose()
+        return responses
+
+    try:
+        responses = asyncio.run(run())
+        assert all(r.json()["candidates"][0]["content"]["parts"][0]["text"] == "echo: hi" for r in responses)
+    finally:
+        server.shutdown()
+    print("✅ Async client retries 5xx and serves concurrent calls from one loop.")
+
+def test_long_retry_after_fails_over():
+    server, url = _serve()
+    payload = {"contents": [{"role": "user", "parts": [{"text": "hi"}]}]}
+
+    async def apost(failures):
+        StubGemini.failures, StubGemini.calls = failures, 0
+        async with http_pool.httpx.AsyncClient() as client:
+            return await http_pool.apost(client, url, retries=3, backoff=0, json=payload)
+
+    try:
+        session = http_pool.get_session("test-retry-after", retries=3, backoff=0)
+        StubGemini.retry_after = "3600"
+        start = time.perf_counter()
+        StubGemini.failures, StubGemini.calls = 1, 0
+        assert _post(session, url, "hello").status_code == 503 and StubGemini.calls == 1
+        assert asyncio.run(apost(1)).status_code == 503 and StubGemini.calls == 1
+        assert time.perf_counter() - start < 2  # neither waited the hour
+
+        StubGemini.retry_after = "0"  # short waits are still honoured and retried
+        StubGemini.failures, StubGemini.calls = 1, 0
+        assert _post(session, url, "hello").status_code == 200 and StubGemini.calls == 2
+        assert asyncio.run(apost(1)).status_code == 200 and StubGemini.calls == 2
+    finally:
+        StubGemini.retry_after, StubGemini.failures = None, 0
+        server.shutdown()
+    print("✅ A Retry-After longer than HTTP_MAX_RETRY_AFTER fails over instead of waiting.")
+
+GEMINI_CLIENT = """
+import asyncio, time, main
+llm = main.GeminiRequestsLLM(model="stub-model")
+for text in ("one", "two", "three"):
+    print(llm.invoke([{"role": "user", "content": text}]).content)
+print(asyncio.run(llm.ainvoke([{"role": "user", "content": "async"}])).content)
+start = time.perf_counter()
+try:
+    main.ollama_alive()
+except Exception:
+    pass
+print(time.perf_counter() - start)
+"""
+
+def test_gemini_client_against_stub():
+    server, url = _serve()
+    try:
+        StubGemini.failures, StubGemini.calls = 1, 0
+        StubGemini.client_ports.clear()
+        StubGemini.paths.clear()
+        env = dict(os.environ, GEMINI_API_BASE=url.split("/v1beta")[0], GOOGLE_API_KEY="stub-key", HTTP_BACKOFF="0")
+        out = subprocess.run([sys.executable, "-c", GEMINI_CLIENT], capture_output=True, text=True, env=env,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=120)
+        lines = out.stdout.splitlines()
+        assert lines[-5:-1] == ["echo: one", "echo: two", "echo: three", "echo: async"], out.stderr[-2000:]
+        assert float(lines[-1]) < 0.5  # Ollama is not running here: the probe fails without retry backoff
+        assert StubGemini.calls == 5  # the first 503 was retried by the pooled session
+        assert all(path == "/v1beta/models/stub-model:generateContent?key=stub-key" for path in StubGemini.paths)
+        assert len(StubGemini.client_ports) == 2  # one keep-alive connection for invoke, one for ainvoke
+    finally:
+        StubGemini.failures = 0
+        server.shutdown()
+    print("✅ GeminiRequestsLLM talks to GEMINI_API_BASE over the pooled session; the Ollama probe fails fast.")
+
+if __name__ == "__main__":
+    test_retries_and_keep_alive()
+    test_retries_give_up()
+    test_concurrent_callers_share_pool()
+    test_async_post_retries_on_one_client()
+    test_long_retry_after_fails_over()
+    test_gemini_client_against_stub()
@@ -0,0 +1,125 @@
+import random
+import threading
+from knowledge_index import TopicIndex, BM25Index, query_terms, OVERLAP_THRESHOLD
+from semantic_index import SemanticIndex
+
+def full_scan(knowledge_base, query, n_results=2):
+    """The original O(topics) scan, kept here as the reference result."""
+    query_words = query_terms(query)
+    scored = []
+    for topic, content in knowledge_base.items():
+        intersection = query_words.intersection(set(topic.lower().split()))
+        if intersection:
+            score = len(intersection) / len(query_words)
+            if score >= OVERLAP_THRESHOLD:
+                scored.append((score, content))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return scored[:n_results]
+
+def test_topic_index_matches_full_scan():
+    rng = random.Random(7)
+    vocab = ["python", "newton", "law", "what", "is", "ipl", "ai", "trump", "donald", "machine", "learning", "Basics", "of"]
+    kb = {}
+    index = TopicIndex()
+    for step in range(2000):
+        topic = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.2 and kb:
+            victim = rng.choice(list(kb))
+            del kb[victim]
+            index.remove(victim)
+        else:
+            kb[topic] = f"content {step}"
+            index.add(topic)
+        query = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 3)))
+        expected = full_scan(kb, query)
+        got = [(score, kb[topic]) for score, topic in index.search(query_terms(query))]
+        assert got == expected, (query, got, expected)
+    print("✅ Inverted index returns the same matches as a full scan.")
+
+def test_bm25_ranks_topic_and_content():
+    index = BM25Index([
+        ("newton law", "Force equals mass times acceleration."),
+        ("what is python", "Python is a high-level programming language."),
+        ("ipl", "The Indian Premier League is a cricket tournament."),
+    ])
+    (score, topic), = index.search("cricket premier league", n_results=1, threshold=0.3)
+    assert topic == "ipl" and 0.3 <= score <= 1.0
+    assert index.search("quantum chromodynamics") == []
+    assert index.search("python programming", n_results=2, threshold=0.5)[0][1] == "what is python"
+
+    index.add("ipl", "Updated: IPL is a T20 league.")
+    assert index.search("cricket tournament") == []
+    for i in range(3000):
+        index.add(f"temp {i}", "temporary filler")
+        index.remove(f"temp {i}")
+    assert len(index) == 3 and len(index.topics) < 1100  # deleted docs were compacted away
+    assert index.search("mass acceleration", n_results=1, threshold=0.3)[0][1] == "newton law"
+    print("✅ BM25 ranks topic + content and survives updates and compaction.")
+
+def test_bm25_partial_matches_score_low():
+    fillers = [(f"filler {i}", f"unrelated words number {i}") for i in range(20)]
+    index = BM25Index(fillers + [
+        ("machine learning basics", "Machine learning lets computers learn from data."),
+        ("what is python", "Python is a high-level programming language."),
+    ])
+    assert index.search("what is machine learning")[0][1] == "machine learning basics"
+    # Half the query matching must not look like a confident answer
+    assert index.search("machine learning in healthcare regulation") == []
+    assert index.search("is python a snake") == []
+    print("✅ BM25 scores partial matches by the share of the query they cover.")
+
+def test_bm25_search_during_writes():
+    index = BM25Index((f"topic {i}", f"shared words {i}") for i in range(200))
+    errors, stop = [], threading.Event()
+    def search():
+        while not stop.is_set():
+            try:
+                index.search("shared words topic", n_results=5, threshold=0.0)
+            except Exception as e:
+                errors.append(e)
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(3000):
+            index.add(f"new {i}", f"shared words {i}")
+            if i % 2:
+                index.remove(f"new {i - 1}")
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    # Every live doc sits in every posting of its terms exactly once
+    for term in ("shared", "words"):
+        tid = index.vocab[term]
+        live = [d for d in index.post_ids[tid] if index.alive[d]]
+        assert len(live) == len(set(live)) == len(index)
+    print("✅ BM25 searches run safely alongside writers.")
+
+def test_semantic_index_matches_paraphrases():
+    index = SemanticIndex([
+        ("WHAT IS NEWTONS LAW", "Newton's laws of motion describe force and acceleration."),
+        ("who is hardik pandya", "Hardik Pandya is an Indian cricketer."),
+        ("what is python", "Python is a high-level programming language."),
+    ])
+    assert index.matrix.dtype.name == "float32" and index.matrix.flags["C_CONTIGUOUS"]
+    assert index.search("explain newton laws of motion", n_results=1)[0][1] == "WHAT IS NEWTONS LAW"
+    assert index.search("how to bake a cake") == []
+
+    index.remove("who is hardik pandya")
+    assert index.search("who is hardik") == []
+    index.add("hardik", "Indian all-rounder.")
+    assert index.search("hardik pandya", n_results=1)[0][1] == "hardik"
+    assert len(index) == 3
+    index.remove("what is python")
+    hits = index.search("bake a cake", n_results=5, threshold=-1.0)
+    assert sorted(topic for _, topic in hits) == ["WHAT IS NEWTONS LAW", "hardik"]  # freed rows never returned
+    print("✅ Semantic index finds paraphrases and updates incrementally.")
+
+if __name__ == "__main__":
+    test_topic_index_matches_full_scan()
+    test_bm25_ranks_topic_and_content()
+    test_bm25_partial_matches_score_low()
+    test_bm25_search_during_writes()
+    test_semantic_index_matches_paraphrases()
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import threading
+import time
+from knowledge_index import TopicIndex, query_terms
+from knowledge_store import JournalStore, SQLiteStore, MmapStore, FTSTopicIndex, FTSBM25Index
+
+def test_journal_replay_and_compaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge.json")
+        store = JournalStore(path, compact_every=1000)
+        store.load()
+        store.put("what is python", "Python is a programming language.")
+        store.put("newton law", "F = ma")
+        store.put("what is python", "Python is a high-level language.")
+        assert store.delete("newton law")
+        assert not store.delete("missing topic")
+        assert not os.path.exists(path)  # nothing rewritten yet, only journaled
+
+        # Simulate a crash in the middle of an append
+        with open(store.journal_path, "a") as f:
+            f.write('{"op": "put", "topic": "half writ')
+        reloaded = JournalStore(path)
+        assert reloaded.load() == {"what is python": "Python is a high-level language."}
+        reloaded.put("ipl", "Indian Premier League")
+        assert JournalStore(path).read() == {"what is python": "Python is a high-level language.", "ipl": "Indian Premier League"}
+
+        reloaded.compact()
+        assert os.path.getsize(reloaded.journal_path) == 0
+        assert not os.path.exists(reloaded.compacting_path)
+        assert JournalStore(path).read() == reloaded.data
+    print("✅ Journal replays puts/deletes, survives a torn tail and compacts.")
+
+def test_background_compaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge.json")
+        store = JournalStore(path, compact_every=10)
+        store.load()
+        for i in range(25):
+            store.put(f"topic {i}", f"content {i}")
+        store._compactor.join(10)
+        assert os.path.exists(path)
+        assert JournalStore(path).read() == store.data
+    print("✅ Background compaction keeps snapshot + journal consistent.")
+
+def test_compaction_paused_during_bulk_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge.json")
+        store = JournalStore(path, compact_every=10)
+        store.load()
+        with store.pause_compaction():
+            for i in range(10):
+                store.put_many([(f"topic {i}.{j}", f"content {j}") for j in range(10)])
+            assert store._compactor is None and not os.path.exists(path)
+        store._compactor.join(10)  # exactly one, once the load is done
+        assert JournalStore(path).read() == store.data and len(store.data) == 100
+        assert os.path.getsize(store.journal_path) == 0
+    print("✅ Bulk loads compact once at the end.")
+
+def test_failed_compaction_keeps_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge.json")
+        store = JournalStore(path, compact_every=1000)
+        store.load()
+        store.put("first", "journaled before a failed compaction")
+
+        def disk_full(snapshot):
+            raise OSError("No space left on device")
+        store._write_snapshot = disk_full
+        store.compact()  # leaves the .compacting file behind
+        assert os.path.exists(store.compacting_path)
+        store.put("second", "journaled after it")
+        store.compact()  # fails again, as if the process died before the snapshot was written
+
+        assert JournalStore(path).read() == {"first": "journaled before a failed compaction",
+                                             "second": "journaled after it"}
+        reloaded = JournalStore(path)
+        assert reloaded.load() == store.data
+        assert not os.path.exists(reloaded.compacting_path)
+    print("✅ A failed compaction's records survive the next one.")
+
+def test_sqlite_store_migrates_and_searches():
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "knowledge.json")
+        db_path = os.path.join(tmp, "knowledge.db")
+        journal = JournalStore(json_path)
+        journal.load()
+        journal.put("what is python", "Python is a high-level programming language.")
+        journal.put("newton law", "Force equals mass times acceleration.")
+        journal.put("log(2)", "The result is 0.693.")
+
+        store = SQLiteStore(db_path)
+        kb = store.load(migrate_from=json_path)
+        assert dict(kb) == journal.data
+        assert store.migrate_from_json(json_path) == 0  # one-shot
+        store.put("ipl", "The Indian Premier League is a cricket tournament.")
+        store.put("what is python", "Python is a popular language.")
+        assert store.delete("newton law") and not store.delete("newton law")
+        assert list(kb) == ["what is python", "log(2)", "ipl"]
+        assert store.recent_topics(2) == ["log(2)", "ipl"]
+
+        # A second process sees the same data through its own connection
+        other = SQLiteStore(db_path)
+        assert other.load()["ipl"].startswith("The Indian Premier League")
+
+        reference = TopicIndex(kb)
+        fts = FTSTopicIndex(store)
+        for query in ["what is python", "python language", "log(2)", "ipl cricket", "newton"]:
+            assert fts.search(query_terms(query)) == reference.search(query_terms(query)), query
+        (score, topic), = FTSBM25Index(store).search("cricket premier league", n_results=1, threshold=0.3)
+        assert topic == "ipl" and 0.3 <= score <= 1.0
+    print("✅ SQLite store migrates knowledge.json and serves FTS5 search.")
+
+def test_mmap_store_pages_content_from_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "knowledge.json")
+        journal = JournalStore(json_path)
+        journal.load()
+        journal.put("newton law", "Force equals mass times acceleration.")
+        journal.put("hola amigos", "¡Hola! ¿Qué tal?")
+
+        store = MmapStore(os.path.join(tmp, "knowledge.dat"), compact_every=10**9)
+        kb = store.load(migrate_from=json_path)
+        assert dict(kb) == journal.data
+        assert all(isinstance(loc, tuple) for loc in store.index.values())  # only offsets are resident
+        store.put("report", "x" * 5000)
+        store.put("newton law", "F = ma")
+        assert store.delete("hola amigos")
+        assert dict(MmapStore(store.path).load()) == {"newton law": "F = ma", "report": "x" * 5000}
+
+        for _ in range(300):
+            store.put("report", "y" * 5000)
+        store.compact()
+        assert os.path.getsize(store.path) < 20000  # dead reports were dropped
+        # Torn record after the compaction: ignored on load, cached offsets still valid
+        with open(store.path, "ab") as f:
+            f.write(b"\x01\x05\x00")
+        reopened = MmapStore(store.path)
+        assert dict(reopened.load()) == {"newton law": "F = ma", "report": "y" * 5000}
+        assert reopened.recent_topics(1) == ["report"]
+    print("✅ Memory-mapped store keeps only offsets in RAM and survives compaction.")
+
+def test_mmap_compaction_does_not_block_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MmapStore(os.path.join(tmp, "knowledge.dat"), compact_every=10**9)
+        store.load()
+        store.put("kept", "k" * 100)
+        store.put("dropped", "gone soon")
+        for i in range(300):
+            store.put("report", str(i % 10) * 5000)
+        copy_live = store._copy_live
+        def slow_copy(*args):
+            time.sleep(0.5)  # a big data file
+            return copy_live(*args)
+        store._copy_live = slow_copy
+        compactor = threading.Thread(target=store.compact)
+        compactor.start()
+        time.sleep(0.1)
+        start = time.perf_counter()
+        assert store.content("kept") == "k" * 100
+        store.put("during", "written while the file was copied")
+        store.put("report", "latest")
+        assert store.delete("dropped")
+        assert time.perf_counter() - start < 0.3  # not held up by the rewrite
+        compactor.join(10)
+        expected = {"kept": "k" * 100, "report": "latest", "during": "written while the file was copied"}
+        assert dict(store.data) == expected
+        assert os.path.getsize(store.path) < 20000
+        assert dict(MmapStore(store.path).load()) == expected
+    print("✅ Memory-mapped compaction copies records without blocking readers.")
+
+if __name__ == "__main__":
+    test_journal_replay_and_compaction()
+    test_background_compaction()
+    test_compaction_paused_during_bulk_load()
+    test_failed_compaction_keeps_records()
+    test_sqlite_store_migrates_and_searches()
+    test_mmap_store_pages_content_from_disk()
+    test_mmap_compaction_does_not_block_reads()
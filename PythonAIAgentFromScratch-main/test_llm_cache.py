@@ -0,0 +1,48 @@
+import os
+from collections import namedtuple
+from llm_cache import LLMCache
+from provider_health import ProviderRegistry
+
+Tool = namedtuple("Tool", "name")
+TOOLS = [Tool("search"), Tool("wikipedia")]
+
+def test_clients_and_agents_are_reused():
+    cache = LLMCache()
+    os.environ["TEST_LLM_KEY"] = "key-1"
+    built = []
+    factory = lambda: built.append(os.environ["TEST_LLM_KEY"]) or object()
+
+    llm = cache.client("Groq", factory, ("TEST_LLM_KEY",))
+    assert cache.client("Groq", factory, ("TEST_LLM_KEY",)) is llm and len(built) == 1
+
+    agent = cache.agent("Groq", llm, TOOLS, "prompt", lambda: object())
+    assert cache.agent("Groq", llm, list(reversed(TOOLS)), "prompt", lambda: object()) is agent
+    assert cache.agent("Groq", llm, TOOLS[:1], "prompt", lambda: object()) is not agent       # other tool set
+    assert cache.agent("Groq", llm, TOOLS, "other prompt", lambda: object()) is not agent     # other prompt
+    assert cache.stats() == {"clients": 1, "agents": 3, "client_builds": 1, "agent_builds": 3}
+
+    # Rotating the key rebuilds the client and forgets agents compiled on the old one
+    os.environ["TEST_LLM_KEY"] = "key-2"
+    new_llm = cache.client("Groq", factory, ("TEST_LLM_KEY",))
+    assert new_llm is not llm and built == ["key-1", "key-2"]
+    assert cache.stats()["agents"] == 0
+    assert cache.agent("Groq", new_llm, TOOLS, "prompt", lambda: object()) is not agent
+    del os.environ["TEST_LLM_KEY"]
+    print("✅ LLM clients and compiled agents are reused until the API key changes.")
+
+def test_registry_hands_out_cached_clients():
+    cache = LLMCache()
+    registry = ProviderRegistry(cache=cache)
+    os.environ["TEST_LLM_KEY"] = "key"
+    registry.register("OpenAI", lambda: object(), env_keys=("TEST_LLM_KEY",))
+    registry.register("Missing", lambda: object(), env_keys=("TEST_LLM_UNSET_KEY",))
+    (factory, name), = registry.available()
+    assert name == "OpenAI" and factory() is factory()
+    assert registry.available()[0][0]() is factory()
+    del os.environ["TEST_LLM_KEY"]
+    assert registry.available() == []
+    print("✅ Registry factories return the cached client.")
+
+if __name__ == "__main__":
+    test_clients_and_agents_are_reused()
+    test_registry_hands_out_cached_clients()
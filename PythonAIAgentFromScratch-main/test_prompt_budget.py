@@ -0,0 +1,38 @@
+from prompt_budget import PromptBudget, estimate_tokens, truncate_to_tokens
+
+def test_estimate_and_truncate():
+    assert estimate_tokens("") == 0
+    assert 20 <= estimate_tokens("The quick brown fox jumps over the lazy dog. " * 2) <= 25
+    assert estimate_tokens("日本語") == 3  # one per non-ASCII character
+
+    text = " ".join(f"word{i}" for i in range(2000))
+    cut, dropped = truncate_to_tokens(text, 100, tail_share=0.2)
+    assert dropped > 0 and estimate_tokens(cut) <= 115  # plus the omission marker
+    assert cut.startswith("word0 ") and cut.endswith("word1999")  # head and tail kept
+    assert "tokens omitted" in cut
+    assert truncate_to_tokens("short", 100) == ("short", 0)
+    print("✅ Token estimate and head/tail truncation.")
+
+def test_fit_keeps_question_and_reports_drops():
+    report = "## Research report\n" + "Detailed findings about the topic. " * 500
+    history = [("human", f"question {i}") if i % 2 == 0 else ("ai", report) for i in range(10)]
+    big_file = "Page of the uploaded PDF. " * 20000
+
+    fitted = PromptBudget(3000).fit("What does chapter 3 say?", history, "Known fact.", big_file)
+    assert fitted["tokens"] <= 3000
+    assert len(fitted["history"]) <= 5
+    assert fitted["history"][-1] == ("ai", fitted["history"][-1][1])  # newest turn kept first
+    assert all(estimate_tokens(content) <= 420 for _, content in fitted["history"])
+    assert any(d.startswith("file:") for d in fitted["dropped"])
+    assert "5 older turns" in fitted["dropped"]
+    assert fitted["context"] == "Known fact."
+
+    # Nothing to cut: everything passes through untouched
+    small = PromptBudget(16000).fit("hi", [("human", "hello"), ("ai", "hey")], None, "a short file")
+    assert small["dropped"] == [] and small["file_text"] == "a short file"
+    assert small["history"] == [("human", "hello"), ("ai", "hey")]
+    print(f"✅ Prompt fitted to {fitted['tokens']} tokens, dropped: {fitted['dropped']}")
+
+if __name__ == "__main__":
+    test_estimate_and_truncate()
+    test_fit_keeps_question_and_reports_drops()
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from provider_health import CircuitBreaker, HealthProbe, ProviderRegistry, CLOSED, OPEN, HALF_OPEN, hedged_call, ahedged_call
+
+def test_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+    breaker.record_failure("credit balance too low")
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure("credit balance too low")
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN  # one trial call
+    assert not breaker.allow()                              # ...and only one
+    breaker.record_failure("still failing")
+    assert breaker.state == OPEN and breaker.open_for == 0.1  # backs off for longer
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0 and breaker.allow()
+    print("✅ Circuit breaker opens, half-opens with one trial and closes on success.")
+
+def test_registry_skips_unhealthy_and_tripped():
+    env = {"GOOGLE_API_KEY": "x"}
+    ollama_up = [False]
+    registry = ProviderRegistry(failure_threshold=1, reset_timeout=60)
+    registry.register("Gemini", lambda: "gemini", enabled=lambda: bool(env.get("GOOGLE_API_KEY")))
+    registry.register("Anthropic", lambda: "anthropic", enabled=lambda: bool(env.get("ANTHROPIC_API_KEY")))
+    probe = HealthProbe(lambda: ollama_up[0], interval=3600)
+    registry.register("Ollama", lambda: "ollama", probe=probe)
+    registry.start()
+
+    assert [name for _, name in registry.available()] == ["Gemini"]
+    ollama_up[0] = True
+    assert [name for _, name in registry.available()] == ["Gemini"]  # cached until the next refresh
+    probe.refresh()
+    assert [name for _, name in registry.available()] == ["Gemini", "Ollama"]
+
+    registry.record_failure("Gemini", RuntimeError("429"))
+    assert [name for _, name in registry.available()] == ["Ollama"]
+    status = {p["name"]: p for p in registry.status()}
+    assert status["Gemini"]["state"] == OPEN and "429" in status["Gemini"]["last_error"]
+    assert status["Anthropic"]["configured"] is False and status["Ollama"]["healthy"] is True
+    print("✅ Registry skips unconfigured, unhealthy and tripped providers without blocking.")
+
+def test_probe_failure_is_unhealthy():
+    def down():
+        raise ConnectionError("refused")
+    probe = HealthProbe(down)
+    assert probe.refresh() is False and probe.checked_at is not None
+    print("✅ A probe that raises marks the provider unhealthy.")
+
+def _provider(delay, answer=None):
+    def call():
+        time.sleep(delay)
+        if answer is None:
+            raise RuntimeError("provider down")
+        return answer
+    return call
+
+def _race(providers, hedge_delay, executor):
+    start = time.perf_counter()
+    result = hedged_call(executor, providers, lambda factory, name: factory(), hedge_delay)
+    return result, time.perf_counter() - start
+
+def test_hedged_call():
+    executor = ThreadPoolExecutor(max_workers=8)
+
+    # Slow first provider: the hedge wins long before the first would have answered
+    (result, name, launched), elapsed = _race([(_provider(1.0, "slow"), "Gemini"), (_provider(0.05, "fast"), "Groq")], 0.1, executor)
+    assert (result, name, launched) == ("fast", "Groq", ["Gemini", "Groq"]) and elapsed < 0.5
+
+    # A fast first provider answers before the hedge delay, nothing else is started
+    (result, name, launched), _ = _race([(_provider(0.01, "quick"), "Gemini"), (_provider(0.01, "x"), "Groq")], 0.5, executor)
+    assert (result, name, launched) == ("quick", "Gemini", ["Gemini"])
+
+    # A failure launches the next provider immediately instead of waiting out the delay
+    (result, name, launched), elapsed = _race([(_provider(0.01), "Anthropic"), (_provider(0.01, "ok"), "Ollama")], 5, executor)
+    assert (result, name) == ("ok", "Ollama") and elapsed < 1
+
+    # Sequential failover (no hedging) and every provider failing
+    (result, name, launched), _ = _race([(_provider(0.01), "A"), (_provider(0.01), "B")], None, executor)
+    assert result is None and name is None and launched == ["A", "B"]
+
+    executor.shutdown(wait=False)
+    print("✅ Hedged calls: slow providers are hedged, failures fail over at once, first answer wins.")
+
+def test_async_hedged_call_cancels_losers():
+    cancelled = []
+
+    async def provider(delay, answer, name):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+        if answer is None:
+            raise RuntimeError("provider down")
+        return answer
+
+    async def race(providers, hedge_delay):
+        return await ahedged_call(providers, lambda factory, name: factory(name), hedge_delay)
+
+    slow = lambda name: provider(5, "slow", name)
+    fast = lambda name: provider(0.05, "fast", name)
+    down = lambda name: provider(0.01, None, name)
+
+    start = time.perf_counter()
+    assert asyncio.run(race([(slow, "Gemini"), (fast, "Groq")], 0.05)) == ("fast", "Groq", ["Gemini", "Groq"])
+    assert time.perf_counter() - start < 1 and cancelled == ["Gemini"]  # the slow call was really stopped
+
+    assert asyncio.run(race([(down, "Anthropic"), (fast, "Ollama")], None)) == ("fast", "Ollama", ["Anthropic", "Ollama"])
+    assert asyncio.run(race([(down, "A"), (down, "B")], 1)) == (None, None, ["A", "B"])
+    print("✅ Async hedged calls cancel the losing provider calls.")
+
+if __name__ == "__main__":
+    test_breaker_opens_and_half_opens()
+    test_registry_skips_unhealthy_and_tripped()
+    test_probe_failure_is_unhealthy()
+    test_hedged_call()
+    test_async_hedged_call_cancels_losers()
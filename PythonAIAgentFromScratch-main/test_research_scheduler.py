@@ -0,0 +1,99 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from research_scheduler import ResearchBudget, AsyncResearchBudget
+
+def _sleepy(seconds, value):
+    time.sleep(seconds)
+    return value
+
+def test_budget_bounds_hung_tasks():
+    executor = ThreadPoolExecutor(max_workers=4)
+    start = time.perf_counter()
+    budget = ResearchBudget(executor, budget=0.5)
+    budget.submit("web", _sleepy, 0.05, "results", timeout=7)
+    budget.submit("browser", _sleepy, 5, "never", timeout=8)  # hung Selenium call
+    budget.submit("wiki", _sleepy, 0.3, "summary", timeout=0.1)  # misses its own deadline
+    budget.submit("broken", lambda: 1 / 0, timeout=1)
+    assert budget.result("web") == "results"
+    assert budget.result("wiki", "late") == "late"
+    assert budget.result("browser", "default") == "default"
+    assert budget.result("broken", "oops") == "oops"
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.7  # the global budget, not the 5 s straggler
+    assert budget.report["browser"] == "timed out" and budget.report["wiki"] == "timed out"
+    assert budget.report["broken"] == "failed" and budget.made_the_cut() == ["web"]
+
+    time.sleep(0.3)
+    budget.submit("too late", _sleepy, 0, "x", timeout=1)
+    assert budget.report["too late"] == "skipped"
+    executor.shutdown(wait=False)
+    print(f"✅ Hung task abandoned, response after {elapsed:.2f}s: {budget.summary()}")
+
+def test_queued_stragglers_are_cancelled():
+    executor = ThreadPoolExecutor(max_workers=1)
+    ran = []
+    budget = ResearchBudget(executor, budget=0.2)
+    budget.submit("slow", _sleepy, 0.5, "slow", timeout=1)
+    budget.submit("queued", lambda: ran.append(1), timeout=1)  # stuck behind "slow"
+    budget.result("slow")
+    budget.abandon()
+    time.sleep(0.5)
+    assert ran == [] and budget.report["queued"] == "abandoned"
+    executor.shutdown(wait=False)
+    print("✅ Tasks that never started are cancelled, not run late.")
+
+def test_async_budget_cancels_late_tasks():
+    cancelled = []
+
+    async def hung():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def quick(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        budget = AsyncResearchBudget(budget=0.3)
+        budget.submit("web", quick, "results", timeout=7)
+        budget.submit("browser", hung, timeout=8)
+        results = await asyncio.gather(budget.result("web"), budget.result("browser", ""))
+        await asyncio.sleep(0)
+        return results, budget
+
+    start = time.perf_counter()
+    (web, browser), budget = asyncio.run(main())
+    assert (web, browser) == ("results", "") and cancelled == [True]
+    assert time.perf_counter() - start < 0.5
+    assert budget.made_the_cut() == ["web"] and budget.report["browser"] == "timed out"
+    print("✅ asyncio tasks past the budget are really cancelled.")
+
+def test_run_report_stays_out_of_the_answer():
+    import main
+    executor = ThreadPoolExecutor(max_workers=2)
+    budget = ResearchBudget(executor, budget=0.2)
+    budget.submit("web", _sleepy, 0, "results", timeout=1)
+    budget.submit("browser", _sleepy, 1, "never", timeout=1)
+    budget.result("web"), budget.result("browser")
+    stored, original = [], main.store_knowledge
+    main.store_knowledge = lambda topic, content, **kwargs: stored.append(content)
+    try:
+        ctx = {"query": "what is gravity", "file_content": None, "image_part": None,
+               "correction_note": "", "relevant_knowledge": None}
+        answer, _, _ = main._synthesize_research(ctx, "Title: Gravity", "", "", [], budget)
+    finally:
+        main.store_knowledge = original
+        executor.shutdown(wait=False)
+    assert "timed out" not in answer and "Sources" not in answer  # this run's timings aren't cached with it
+    assert answer == stored[0]
+    print("✅ Per-run source report is logged, not cached in the answer.")
+
+if __name__ == "__main__":
+    test_budget_bounds_hung_tasks()
+    test_queued_stragglers_are_cancelled()
+    test_async_budget_cancels_late_tasks()
+    test_run_report_stays_out_of_the_answer()
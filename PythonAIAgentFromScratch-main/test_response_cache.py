@@ -0,0 +1,42 @@
+import time
+from response_cache import ResponseCache
+
+def test_lru_ttl_and_counters():
+    cache = ResponseCache(max_entries=2, ttls={"Extreme Research Engine": 0.05, "Local Intelligence": 0}, default_ttl=60)
+    key = cache.key("What is Python?", None, False)
+    assert key == cache.key("  what is   python ", None, False)
+    assert key != cache.key("what is python", "file text", False)
+    assert key != cache.key("what is python", None, True)
+
+    cache.put(key, ("Python is...", "", "Gemini (Cloud)"), "Gemini (Cloud)")
+    assert cache.get(key)[2] == "Gemini (Cloud)"
+    cache.put(cache.key("fallback"), ("I remember nothing", "", "Local Intelligence"), "Local Intelligence")
+    assert cache.get(cache.key("fallback")) is None  # failures are never cached
+
+    research = cache.key("newton law")
+    cache.put(research, ("report", "", "Extreme Research Engine"), "Extreme Research Engine")
+    time.sleep(0.06)
+    assert cache.get(research) is None  # short research TTL expired
+
+    cache.put(cache.key("a"), "A", "Math Computation")
+    cache.put(cache.key("b"), "B", "Math Computation")
+    assert cache.get(key) is None  # least recently used entry was evicted
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 3, 1, 2)
+    assert stats["evictions"] == 1
+    print("✅ Response cache evicts LRU entries, honours per-source TTLs and counts hits.")
+
+def test_invalidate_drops_one_query():
+    cache = ResponseCache(max_entries=10)
+    cache.put(cache.key("What is Python?"), "old answer", "Knowledge Base")
+    cache.put(cache.key("what is python", "file text"), "old file answer", "Gemini (Cloud)")
+    cache.put(cache.key("who is newton"), "Newton answer", "Knowledge Base")
+    cache.invalidate("what is python")
+    assert cache.get(cache.key("what is python")) is None
+    assert cache.get(cache.key("what is python", "file text")) is None
+    assert cache.get(cache.key("who is newton")) == "Newton answer"
+    print("✅ Invalidating a query drops only its answers.")
+
+if __name__ == "__main__":
+    test_lru_ttl_and_counters()
+    test_invalidate_drops_one_query()
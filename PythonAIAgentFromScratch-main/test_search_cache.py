@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import search_cache
+from search_cache import SearchCache
+
+def test_hits_normalized_queries_and_skips_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(os.path.join(tmp, "search.db"))
+        calls = []
+        def fetch():
+            calls.append(1)
+            return "Title: Gravity"
+
+        assert cache.cached("search_web", "What is gravity?", 5, fetch) == "Title: Gravity"
+        assert cache.cached("search_web", "  what is GRAVITY ", 5, fetch) == "Title: Gravity"
+        assert len(calls) == 1
+        cache.cached("search_web", "what is gravity", 10, fetch)  # other max_results, other entry
+        cache.cached("search_wikipedia", "what is gravity", 5, fetch)  # other tool, other entry
+        assert len(calls) == 3
+
+        errors = lambda: "Error searching DuckDuckGo: ratelimit"
+        cacheable = lambda result: result.startswith("Title:")
+        cache.cached("search_web", "rate limited", 5, errors, cacheable)
+        assert cache.get("search_web", "rate limited", 5) is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 3
+        print("✅ Normalized queries hit, errors are not cached.")
+
+def test_stale_while_revalidate():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(os.path.join(tmp, "search.db"), ttls={"search_web": 0.2}, stale_ttl=0.5)
+        version = [1]
+        refreshed = threading.Event()
+        def fetch():
+            if version[0] > 1:
+                time.sleep(0.1)  # slow upstream
+                refreshed.set()
+            return f"Title: v{version[0]}"
+
+        cache.cached("search_web", "news", 5, fetch)
+        time.sleep(0.25)  # stale now
+        version[0] = 2
+        start = time.perf_counter()
+        assert cache.cached("search_web", "news", 5, fetch) == "Title: v1"  # served at once
+        assert time.perf_counter() - start < 0.05
+        cache.cached("search_web", "news", 5, fetch)  # refresh already claimed: no second one
+        assert refreshed.wait(2)
+        time.sleep(0.05)
+        assert cache.get("search_web", "news", 5) == ("Title: v2", True)
+        assert cache.stats()["refreshes"] == 1
+
+        time.sleep(0.8)  # past the stale window: a plain miss
+        assert cache.get("search_web", "news", 5) is None
+        print("✅ Stale results are served immediately and refreshed in the background.")
+
+def test_eviction_and_sharing_across_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        cache = SearchCache(path, max_entries=10, touch_interval=0)
+        for i in range(30):
+            cache.put("search_web", f"query {i}", 5, f"Title: {i}")
+            time.sleep(0.001)
+        cache.get("search_web", "query 0", 5)  # recently used, survives
+        cache.evict()
+        assert cache.stats()["entries"] == 10
+        assert cache.get("search_web", "query 29", 5) is not None
+        assert cache.get("search_web", "query 0", 5) is not None
+        assert cache.get("search_web", "query 1", 5) is None
+
+        code = ("import sys; from search_cache import SearchCache; "
+                "c = SearchCache(sys.argv[1]); "
+                "print(c.cached('search_web', 'Query 29', 5, lambda: 'Title: refetched'))")
+        out = subprocess.run([sys.executable, "-c", code, path], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=30)
+        assert out.stdout.strip() == "Title: 29", out.stderr
+        print("✅ Size bounded, and shared with other processes.")
+
+def test_tools_cache_only_real_results():
+    import tools
+    with tempfile.TemporaryDirectory() as tmp:
+        search_cache._cache, original = SearchCache(os.path.join(tmp, "search.db")), search_cache._cache
+        class Wiki:
+            answer = "No good Wikipedia Search Result was found"
+            def run(self, query):
+                return self.answer
+        ddg, wiki = tools._search_ddg, tools.wiki
+        asked = []
+        tools._search_ddg = lambda query, max_results: asked.append(max_results) or f"Title: {query}"
+        tools.wiki = Wiki()
+        try:
+            tools.search_web.invoke({"query": "gravity", "max_results": 500})
+            assert asked == [tools.MAX_SEARCH_RESULTS]  # the LLM's count is capped
+            assert tools.search_wikipedia.invoke({"query": "qwzx"}).startswith("No good")
+            assert search_cache._cache.get("search_wikipedia", "qwzx", 1) is None  # a miss is not remembered
+            tools.wiki.answer = "Page: Gravity\nSummary: Gravity is..."
+            assert tools.search_wikipedia.invoke({"query": "qwzx"}).startswith("Page: Gravity")
+            assert search_cache._cache.get("search_wikipedia", "qwzx", 1) is not None
+        finally:
+            tools._search_ddg, tools.wiki = ddg, wiki
+            search_cache._cache = original
+        print("✅ Tool results are capped and only real answers are cached.")
+
+def test_hits_rarely_write_and_cache_errors_fall_back():
+    import tools
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchCache(os.path.join(tmp, "search.db"))
+        cache.put("search_web", "gravity", 5, "Title: Gravity")
+        conn = cache.conn()
+        writes = conn.total_changes
+        for _ in range(20):
+            assert cache.get("search_web", "gravity", 5) == ("Title: Gravity", True)
+        assert conn.total_changes == writes  # accessed just now: hits don't touch the row
+
+        conn.close()  # every query on this thread now raises sqlite3.ProgrammingError
+        assert cache.cached("search_web", "gravity", 5, lambda: "Title: fetched") == "Title: fetched"
+
+        corrupt = os.path.join(tmp, "corrupt.db")
+        with open(corrupt, "wb") as f:
+            f.write(b"not a database" * 100)
+        os.environ["SEARCH_CACHE_DB"], original = corrupt, search_cache._cache
+        search_cache._cache = None
+        ddg = tools._search_ddg
+        tools._search_ddg = lambda query, max_results: f"Title: {query}"
+        try:
+            assert tools.search_web.invoke({"query": "gravity"}) == "Title: gravity"
+        finally:
+            tools._search_ddg = ddg
+            search_cache._cache = original
+            del os.environ["SEARCH_CACHE_DB"]
+    print("✅ Hits don't write on every read, and a broken cache falls back to searching.")
+
+if __name__ == "__main__":
+    test_hits_normalized_queries_and_skips_errors()
+    test_stale_while_revalidate()
+    test_eviction_and_sharing_across_processes()
+    test_tools_cache_only_real_results()
+    test_hits_rarely_write_and_cache_errors_fall_back()
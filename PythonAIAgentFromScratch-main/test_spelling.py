@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+from spelling import SpellingCorrector, edit_distance
+
+def test_edit_distance():
+    assert edit_distance("gravty", "gravity", 2) == 1
+    assert edit_distance("pyhton", "python", 2) == 1  # transposition counts once
+    assert edit_distance("kitten", "sitting", 2) == 3  # capped at max + 1
+    assert edit_distance("same", "same", 2) == 0
+    print("✅ Damerau-Levenshtein distance with early exit.")
+
+def test_corrects_queries_locally():
+    speller = SpellingCorrector().load_words()
+    assert speller.correct("what is machne lerning")[:2] == ("what is machine learning", True)
+    assert speller.correct("Whta is pyhton?")[:2] == ("What is python?", True)
+    assert speller.correct("recieve the pakage")[:2] == ("receive the package", True)
+    assert speller.correct("explain quantum mechanics") == ("explain quantum mechanics", False, 1.0)
+    assert speller.correct("log(2) + 3")[:2] == ("log(2) + 3", False)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        speller.correct("newton lwa of gravty")
+    assert (time.perf_counter() - start) / 100 < 0.01  # well under a millisecond or two per query
+    print("✅ Local corrector fixes typos without an LLM.")
+
+def test_names_and_acronyms_are_not_rewritten():
+    speller = SpellingCorrector().load_words()
+    # Unknown words close to one common-ish word: unsure, the LLM decides
+    assert speller.correct("who is virat kohli")[2] < 0.8
+    assert speller.correct("what is bts")[2] < 0.8
+    assert speller.correct("tell me about doraemon")[2] < 0.8
+    assert speller.correct("who is virat kohli", min_confidence=0.8)[:2] == ("who is virat kohli", False)
+    # Capitalized mid-sentence or all caps: a name, left alone
+    assert speller.correct("who is Virat Kohli") == ("who is Virat Kohli", False, 1.0)
+    assert speller.correct("what is BTS") == ("what is BTS", False, 1.0)
+    # Clear typos of common words stay confident
+    assert speller.correct("what is machne lerning")[2] >= 0.8
+    assert speller.correct("recieve the pakage")[2] >= 0.8
+
+    # A misspelt stored topic is known, so it is not rewritten, but never the preferred spelling
+    speller.add_text("who is diramon", 1)
+    assert speller.correct("who is diramon")[:2] == ("who is diramon", False)
+    assert speller.correct("doraemon")[2] < 0.8
+    print("✅ Names, acronyms and knowledge base typos are not confidently rewritten.")
+
+def test_confidence_and_learning():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = os.path.join(tmp, "spelling_history.jsonl")
+        speller = SpellingCorrector(history_path=history).load_words(limit=20000)
+        assert speller.correct("zxqwv")[2] == 0.0  # nothing close: ask the LLM
+
+        # Words added with a high count win their edit distance
+        speller.add_text("doraemon cartoon", 10**8)
+        assert speller.correct("doraemn")[:2] == ("doraemon", True)
+
+        # An accepted LLM correction is remembered, also across restarts
+        speller.learn("diramon", "doraemon")
+        assert speller.correct("diramon") == ("doraemon", True, 1.0)
+        reloaded = SpellingCorrector(history_path=history)
+        assert reloaded.learned == {"diramon": "doraemon"}
+    print("✅ Low-confidence words are flagged and accepted corrections are learned.")
+
+if __name__ == "__main__":
+    test_edit_distance()
+    test_corrects_queries_locally()
+    test_names_and_acronyms_are_not_rewritten()
+    test_confidence_and_learning()
@@ -0,0 +1,117 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import web_fetch
+
+ARTICLE = """<!DOCTYPE html><html><head><title>Gravity</title><style>body { color: red }</style>
+<script>var tracking = "x".repeat(100);</script></head><body>
+<header class="masthead"><a href="/">Home</a> <a href="/news">News</a></header>
+<nav><ul><li><a href="/a">Section A</a><li><a href="/b">Section B</a></ul></nav>
+<div class="sidebar">Trending: celebrity gossip</div>
+<article><h1>Newton&#39;s law of gravity</h1>
+<p>Every particle attracts every other particle with a force proportional to the product of their masses.
+<p>The force is inversely proportional to the square of the distance between their centers &amp; acts along the line joining them.
+<div class="share-buttons"><a href="/tw">Tweet</a></div>
+</article>
+<div id="cookie-banner">We use cookies</div>
+<footer>Copyright 2024</footer></body></html>"""
+
+SPA = """<html><head><script src="/app.js"></script><script>""" + "window.__STATE__ = {};" * 100 + """</script></head>
+<body><noscript>You need to enable JavaScript to run this app.</noscript><div id="root"></div></body></html>"""
+
+PLAIN_LISTING = "<html><body>" + "".join(f"<p>Paragraph {i} of a page without article markup.</p>" for i in range(50)) + "</body></html>"
+
+class StubSite(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    big_bytes_sent = 0
+
+    def do_GET(self):
+        if self.path == "/big":
+            return self._big()
+        status, ctype, body = {
+            "/article": (200, "text/html; charset=utf-8", ARTICLE),
+            "/spa": (200, "text/html", SPA),
+            "/listing": (200, "text/html", PLAIN_LISTING),
+            "/notes.txt": (200, "text/plain", "plain notes " * 10),
+            "/paper.pdf": (200, "application/pdf", "%PDF-1.4"),
+            "/blocked": (403, "text/html", "<html><body>Checking your browser...</body></html>"),
+        }.get(self.path, (404, "text/html", "not found"))
+        out = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def _big(self):
+        chunk = ("<p>" + "A long article paragraph about orbital mechanics. " * 20 + "</p>\n").encode()
+        count = 5000  # ~5 MB
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(chunk) * count + len(b"<html><body><main>")))
+        self.end_headers()
+        try:
+            self.wfile.write(b"<html><body><main>")
+            for _ in range(count):
+                self.wfile.write(chunk)
+                type(self).big_bytes_sent += len(chunk)
+                time.sleep(0.0005)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_extracts_main_content():
+    server, base = _serve()
+    try:
+        text = web_fetch.fetch_text(base + "/article")
+        assert text.startswith("Newton's law of gravity\nEvery particle attracts")
+        assert "square of the distance between their centers & acts" in text
+        for noise in ("Home", "Section A", "Trending", "Tweet", "cookies", "Copyright", "tracking", "color"):
+            assert noise not in text, noise
+
+        listing = web_fetch.fetch_text(base + "/listing")  # no <article>: everything but boilerplate
+        assert listing.startswith("Paragraph 0 of a page") and "Paragraph 49" in listing
+        assert web_fetch.fetch_text(base + "/notes.txt").startswith("plain notes")
+        print("✅ Main text extracted without navigation, sidebars or footers.")
+    finally:
+        server.shutdown()
+
+def test_escalates_when_a_browser_is_needed():
+    server, base = _serve()
+    try:
+        assert web_fetch.fetch_text(base + "/spa") is None  # renders client-side
+        assert web_fetch.fetch_text(base + "/blocked") is None  # bot wall
+        assert web_fetch.fetch_text(base + "/paper.pdf") is None
+        try:
+            web_fetch.fetch_text(base + "/missing")
+            assert False, "404 should raise"
+        except Exception as e:
+            assert "404" in str(e)
+        print("✅ Client-rendered, blocked and non-HTML pages go to the browser.")
+    finally:
+        server.shutdown()
+
+def test_stops_reading_once_enough_text():
+    server, base = _serve()
+    try:
+        start = time.perf_counter()
+        text = web_fetch.fetch_text(base + "/big")
+        elapsed = time.perf_counter() - start
+        time.sleep(0.2)  # let the server notice the closed connection
+        assert len(text) > 2000 and text.startswith("A long article paragraph")
+        assert StubSite.big_bytes_sent < 1024 * 1024  # of ~5 MB
+        print(f"✅ Stopped after {StubSite.big_bytes_sent // 1024} KB of a 5 MB page, {elapsed * 1000:.0f} ms.")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_extracts_main_content()
+    test_escalates_when_a_browser_is_needed()
+    test_stops_reading_once_enough_text()
@@ -0,0 +1,77 @@
+import gzip
+import os
+import tempfile
+import time
+from xml.sax.saxutils import escape
+import wiki_index
+from wiki_index import WikiIndex, build
+
+ARTICLES = [
+    ("Gravity", "Gravity is a fundamental interaction which causes mutual attraction between all things with mass or energy."),
+    ("Isaac Newton", "Sir Isaac Newton was an English polymath active as a mathematician, physicist and astronomer."),
+    ("Newton's law of universal gravitation", "Every point mass attracts every other point mass by a force acting along the line intersecting the two points."),
+    ("Python (programming language)", "Python is a high-level, general-purpose programming language emphasizing code readability."),
+    ("Python", "Python may refer to the snake family Pythonidae or the programming language."),
+    ("Doraemon", "Doraemon is a Japanese manga series about a robotic cat who travels back in time from the 22nd century."),
+    ("Photosynthesis", "Photosynthesis is a process used by plants to convert light energy into chemical energy & sugars."),
+] + [(f"Filler article {i}", f"Filler abstract number {i} about topic {i % 17} and nothing else.") for i in range(300)]
+
+def _dump(path):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("<feed>\n")
+        for title, abstract in ARTICLES + [("Gravity", "A duplicate that must not replace the first.")]:
+            f.write(f"<doc><title>Wikipedia: {escape(title)}</title><url>https://en.wikipedia.org/wiki/x</url>"
+                    f"<abstract>{escape(abstract)}</abstract><links><sublink linktype=\"nav\"><anchor>See</anchor></sublink></links></doc>\n")
+        f.write("</feed>\n")
+
+def test_build_and_lookup():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump, out = os.path.join(tmp, "abstract.xml.gz"), os.path.join(tmp, "index")
+        _dump(dump)
+        assert build(dump, out) == len(ARTICLES)
+        index = WikiIndex(out)
+
+        doc = index.find_title("  isaac   NEWTON ")
+        assert index.titles[doc] == "Isaac Newton" and index.abstract(doc).startswith("Sir Isaac Newton")
+        assert index.find_title("Isaac") is None
+        assert index.prefix("python") == ["Python", "Python (programming language)"]
+        assert index.abstract(index.find_title("Gravity")).startswith("Gravity is a fundamental")  # first copy kept
+        assert "energy & sugars" in index.abstract(index.find_title("Photosynthesis"))
+
+        hits = index.search("robotic cat manga")
+        assert index.titles[hits[0][1]] == "Doraemon"
+        assert index.search("quantum chromodynamics") == []
+
+        assert index.run("gravity").startswith("Page: Gravity\nSummary: Gravity is")
+        assert index.run("law of universal gravitation").startswith("Page: Newton's law of universal gravitation")
+        assert len(index.run("Photosynthesis", max_chars=40)) == 40
+        assert index.run("quantum chromodynamics") is None  # miss: the API is asked
+
+        start = time.perf_counter()
+        for _ in range(100):
+            index.run("robotic cat manga")
+        assert (time.perf_counter() - start) / 100 < 0.005
+        print("✅ Title, prefix and BM25 lookups answer in milliseconds.")
+
+def test_get_index_follows_env():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump, out = os.path.join(tmp, "abstract.xml.gz"), os.path.join(tmp, "index")
+        _dump(dump)
+        build(dump, out, limit=10)
+        old = os.environ.pop("WIKI_INDEX_DIR", None)
+        try:
+            assert wiki_index.get_index() is None
+            os.environ["WIKI_INDEX_DIR"] = out
+            assert len(wiki_index.get_index()) == 10
+            os.environ["WIKI_INDEX_DIR"] = os.path.join(tmp, "missing")
+            assert wiki_index.get_index() is None  # unusable: fall back to the API
+        finally:
+            os.environ.pop("WIKI_INDEX_DIR", None)
+            if old is not None:
+                os.environ["WIKI_INDEX_DIR"] = old
+            wiki_index._index = None
+        print("✅ Index opened from WIKI_INDEX_DIR, API used when unset or broken.")
+
+if __name__ == "__main__":
+    test_build_and_lookup()
+    test_get_index_follows_env()
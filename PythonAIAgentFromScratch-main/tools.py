@@ -8,6 +8,11 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from duckduckgo_search import DDGS
+import browser_pool
+import search_cache
+import web_fetch
+import wiki_index
+import sqlite3
 import time
 
 @tool
@@ -23,19 +28,35 @@ def save_text_to_file(data: str, filename: str = "research_output.txt") -> str:
 
 save_tool = save_text_to_file
 
-# DuckDuckGo search
-@tool
-def search_web(query: str) -> str:
-    """Search the web for information using DuckDuckGo."""
+# DuckDuckGo search; max_results comes from the LLM, so it is capped
+MAX_SEARCH_RESULTS = 10
+
+def _search_ddg(query: str, max_results: int) -> str:
     try:
         with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=5)
+            results = ddgs.text(query, max_results=max_results)
             if not results:
                 return "No results found."
             return "\n\n".join([f"Title: {r['title']}\nSnippet: {r['body']}\nSource: {r['href']}" for r in results])
     except Exception as e:
         return f"Error searching DuckDuckGo: {str(e)}"
 
+# Results are cached on disk (search_cache.db) and shared by every server process
+def _cached(tool_name: str, query: str, max_results: int, fetch, cacheable):
+    try:
+        cache = search_cache.get_cache()
+    except sqlite3.Error as e:  # can't be opened (read-only or corrupt file): search without it
+        print(f"⚠️ Search cache unavailable, searching directly: {e}")
+        return fetch()
+    return cache.cached(tool_name, query, max_results, fetch, cacheable)
+
+@tool
+def search_web(query: str, max_results: int = 5) -> str:
+    """Search the web for information using DuckDuckGo."""
+    max_results = max(1, min(max_results, MAX_SEARCH_RESULTS))
+    return _cached("search_web", query, max_results, lambda: _search_ddg(query, max_results),
+                   cacheable=lambda result: result.startswith("Title:"))  # not errors or empty pages
+
 search_tool = search_web
 
 # Wikipedia search
@@ -45,37 +66,66 @@ wiki = WikipediaQueryRun(api_wrapper=api_wrapper)
 @tool
 def search_wikipedia(query: str) -> str:
     """Search Wikipedia for information about a topic."""
-    return wiki.run(query)
+    index = wiki_index.get_index()  # offline abstracts when WIKI_INDEX_DIR is set
+    if index is not None:
+        local = index.run(query, max_chars=api_wrapper.doc_content_chars_max)
+        if local is not None:
+            return local
+    return _cached("search_wikipedia", query, api_wrapper.top_k_results, lambda: wiki.run(query),
+                   cacheable=lambda result: result.startswith("Page:"))  # not "No good ... found"
 
 wiki_tool = search_wikipedia
 
+# Browsers are leased from warm pools instead of started per call (startup dominated latency)
+def _browse_driver():
+    options = Options()
+    options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(20)  # a hung page must not pin a pooled browser
+    return driver
+
+def _chat_driver():
+    options = Options()
+    options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")  # Avoid detection
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(30)
+    return driver
+
 @tool
 def browse_web(url: str) -> str:
     """
     Browse a specific URL and extract the main content.
     Use this tool when you need to read the content from a specific webpage.
     """
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
+    try:
+        # Static pages are read over plain HTTP; Chrome only renders what needs JavaScript
+        text = web_fetch.fetch_text(url)
+        if text is not None:
+            return text[:2000] + "..." if len(text) > 2000 else text
+    except Exception as e:
+        print(f"🌐 Plain fetch of {url} failed ({e}), trying the browser")
 
-    driver = webdriver.Chrome(options=options)
     try:
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(2)  # Wait for dynamic content
+        with browser_pool.get_pool("browse", _browse_driver).lease() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            time.sleep(2)  # Wait for dynamic content
 
-        # Extract text from main content areas
-        body = driver.find_element(By.TAG_NAME, "body")
-        text = body.text
+            # Extract text from main content areas
+            body = driver.find_element(By.TAG_NAME, "body")
+            text = body.text
 
         # Limit to first 2000 characters to avoid too much data
         return text[:2000] + "..." if len(text) > 2000 else text
     except Exception as e:
         return f"Error browsing {url}: {str(e)}"
-    finally:
-        driver.quit()
 
 browse_tool = browse_web
 
@@ -86,56 +136,47 @@ def ai_chat_tool(query: str, site: str = "chatgpt") -> str:
     Navigates to the specified site, inputs the query, waits for the response, and extracts it.
     Assumes the browser is pre-logged in to the site. Use 'chatgpt' for chat.openai.com or 'gemini' for gemini.google.com.
     """
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")  # Avoid detection
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
+    if site == "chatgpt":
+        url = "https://chat.openai.com/"
+    elif site == "gemini":
+        url = "https://gemini.google.com/"
+    else:
+        return f"Unsupported site: {site}. Supported: chatgpt, gemini."
 
-    driver = webdriver.Chrome(options=options)
     try:
-        if site == "chatgpt":
-            url = "https://chat.openai.com/"
-        elif site == "gemini":
-            url = "https://gemini.google.com/"
-        else:
-            return f"Unsupported site: {site}. Supported: chatgpt, gemini."
-
-        driver.get(url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-        # Wait for chat input (adjust selectors based on site; these are placeholders)
-        if site == "chatgpt":
-            input_selector = "textarea[data-testid='prompt-textarea']"  # Example selector for ChatGPT
-            submit_selector = "button[data-testid='send-button']"
-            response_selector = ".markdown"  # Example for response
-        elif site == "gemini":
-            input_selector = "textarea[aria-label='Ask Gemini']"  # Example selector for Gemini
-            submit_selector = "button[aria-label='Send message']"
-            response_selector = ".response-content"  # Example for response
-
-        # Wait for input field
-        input_field = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.CSS_SELECTOR, input_selector)))
-        input_field.send_keys(query)
-
-        # Submit the query
-        submit_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, submit_selector)))
-        submit_button.click()
-
-        # Wait for response (adjust time as needed)
-        WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, response_selector)))
-        time.sleep(5)  # Additional wait for dynamic content
-
-        # Extract the latest response
-        responses = driver.find_elements(By.CSS_SELECTOR, response_selector)
-        if responses:
-            return responses[-1].text[:2000]  # Limit to 2000 chars
-        else:
-            return "No response found on the page."
+        # Cookies are kept in this pool: the browser profile stays logged in
+        with browser_pool.get_pool("chat", _chat_driver, clear_cookies=False).lease() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+
+            # Wait for chat input (adjust selectors based on site; these are placeholders)
+            if site == "chatgpt":
+                input_selector = "textarea[data-testid='prompt-textarea']"  # Example selector for ChatGPT
+                submit_selector = "button[data-testid='send-button']"
+                response_selector = ".markdown"  # Example for response
+            elif site == "gemini":
+                input_selector = "textarea[aria-label='Ask Gemini']"  # Example selector for Gemini
+                submit_selector = "button[aria-label='Send message']"
+                response_selector = ".response-content"  # Example for response
+
+            # Wait for input field
+            input_field = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.CSS_SELECTOR, input_selector)))
+            input_field.send_keys(query)
+
+            # Submit the query
+            submit_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, submit_selector)))
+            submit_button.click()
+
+            # Wait for response (adjust time as needed)
+            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, response_selector)))
+            time.sleep(5)  # Additional wait for dynamic content
+
+            # Extract the latest response
+            responses = driver.find_elements(By.CSS_SELECTOR, response_selector)
+            if responses:
+                return responses[-1].text[:2000]  # Limit to 2000 chars
+            else:
+                return "No response found on the page."
 
     except Exception as e:
         return f"Error interacting with {site}: {str(e)}"
-    finally:
-        driver.quit()
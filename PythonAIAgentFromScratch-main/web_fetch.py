@@ -0,0 +1,162 @@
+"""Plain-HTTP page fetch with streaming HTML-to-text, the fast path before a real browser."""
+from html.parser import HTMLParser
+import re
+import http_pool
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+MAX_BYTES = 2 * 1024 * 1024
+MIN_TEXT_CHARS = 200  # less than this from a script-heavy page: it renders client-side
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe", "canvas", "select", "button", "title"}
+BLOCK_TAGS = {"address", "article", "aside", "blockquote", "body", "br", "dd", "details", "div", "dl", "dt",
+              "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+              "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table", "td", "th", "tr", "ul"}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form"}
+MAIN_TAGS = {"article", "main"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+SELF_CLOSING = {"p", "li", "dt", "dd", "tr", "td", "th"}  # often left unclosed
+BOILERPLATE_RE = re.compile(r"comment|sidebar|footer|masthead|menu|navbar|cookie|banner|promo|share|social|"
+                            r"related|breadcrumb|newsletter|subscribe|advert|popup|modal", re.I)
+SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "svelte"}
+
+
+class PageText(HTMLParser):
+    """
+    Readability-style extraction that works on a stream. Text is collected per
+    block element; blocks inside nav/header/footer/aside/forms, under class or id
+    names like "sidebar" or "cookie", or that are mostly link text (menus) are
+    dropped. If the page marks its content with <article>/<main>, only that is
+    kept. `done` turns true once more than `max_chars` of content are in, so the
+    caller can stop downloading.
+    """
+
+    def __init__(self, max_chars: int = 2000):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self._stack = []  # (tag, skip, boilerplate, main)
+        self._skip = self._boiler = self._main = self._links = 0
+        self._parts, self._link_chars = [], 0
+        self.blocks = []  # (text, in_main, kept)
+        self.main_seen = False
+        self.content_chars = self.main_chars = 0
+        self.script_chars = 0
+        self.js_hints = 0  # noscript "enable JavaScript", empty SPA roots
+
+    @property
+    def done(self):
+        return (self.main_chars if self.main_seen else self.content_chars) > self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in VOID_TAGS:
+            return
+        if tag in SELF_CLOSING and self._stack and self._stack[-1][0] == tag:
+            self._pop()
+        if tag == "body" and any(entry[0] == "head" for entry in self._stack):
+            while self._pop() != "head":  # </head> left out
+                pass
+        attrs = dict(attrs)
+        names = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        if attrs.get("id") in SPA_ROOT_IDS:
+            self.js_hints += 1
+        skip = tag in SKIP_TAGS
+        boiler = tag in BOILERPLATE_TAGS or bool(BOILERPLATE_RE.search(names))
+        main = tag in MAIN_TAGS or attrs.get("role") == "main"
+        if main:
+            self.main_seen = True
+        self._stack.append((tag, skip, boiler, main))
+        self._skip += skip
+        self._boiler += boiler
+        self._main += main
+        self._links += tag == "a"
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if any(entry[0] == tag for entry in self._stack):
+            while self._pop() != tag:
+                pass
+
+    def _pop(self):
+        tag, skip, boiler, main = self._stack.pop()
+        self._skip -= skip
+        self._boiler -= boiler
+        self._main -= main
+        self._links -= tag == "a"
+        return tag
+
+    def handle_data(self, data):
+        if self._skip:
+            tag = self._stack[-1][0] if self._stack else ""
+            if tag == "script":
+                self.script_chars += len(data)
+            elif tag == "noscript" and "javascript" in data.lower():
+                self.js_hints += 1
+            return
+        self._parts.append(data)
+        if self._links:
+            self._link_chars += len(data.strip())
+
+    def _flush(self):
+        text = " ".join("".join(self._parts).split())
+        link_chars, self._parts, self._link_chars = self._link_chars, [], 0
+        if not text:
+            return
+        menu = link_chars > len(text) * 0.5 and len(text) < 200
+        kept = not self._boiler and not menu
+        in_main = self._main > 0
+        self.blocks.append((text, in_main, kept))
+        if kept:
+            self.content_chars += len(text) + 1
+            self.main_chars += (len(text) + 1) if in_main else 0
+
+    def text(self):
+        self._flush()
+        kept = [text for text, _, ok in self.blocks if ok]
+        main = [text for text, in_main, ok in self.blocks if ok and in_main]
+        # A page whose wrapper matches a boilerplate name would come out empty: keep everything then
+        return "\n".join(main or kept or [text for text, _, _ in self.blocks])
+
+    def needs_js(self):
+        return len(self.text()) < MIN_TEXT_CHARS and (self.script_chars > 1000 or self.js_hints > 0)
+
+
+def fetch_text(url: str, max_chars: int = 2000, timeout: float = 10):
+    """
+    Main text of `url` over plain HTTP (more than `max_chars` when the page has it),
+    or None when it needs a real browser: client-rendered pages, bot walls (403/429/503)
+    and content that isn't HTML or text. Network errors are raised.
+    """
+    session = http_pool.get_session("web", retries=0)  # the browser is the retry
+    with session.get(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html,text/plain;q=0.9,*/*;q=0.5"},
+                     timeout=http_pool.timeout(read=timeout), stream=True) as response:
+        if response.status_code in (403, 429, 503):
+            print(f"🌐 {url} answered {response.status_code} to plain HTTP")
+            return None
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if "html" not in content_type and "text/plain" not in content_type:
+            return None
+        if "charset" not in content_type:
+            response.encoding = "utf-8"
+
+        if "text/plain" in content_type:
+            text, size = [], 0
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                text.append(chunk)
+                size += len(chunk)
+                if size > max_chars or size > MAX_BYTES:
+                    break
+            return "".join(text).strip()
+
+        parser, size = PageText(max_chars), 0
+        for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+            parser.feed(chunk)
+            size += len(chunk)
+            if parser.done or size > MAX_BYTES:
+                break  # leaving the block closes the connection, the rest is never downloaded
+        if parser.needs_js():
+            print(f"🌐 {url} renders client-side")
+            return None
+        return parser.text()
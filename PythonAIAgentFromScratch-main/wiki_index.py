@@ -0,0 +1,259 @@
+"""Offline Wikipedia title/abstract index built from an abstracts dump, used by tools.search_wikipedia."""
+from array import array
+from collections import Counter
+import bz2
+import gzip
+import json
+import math
+import mmap
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+import numpy as np
+from knowledge_index import tokenize
+
+FORMAT_VERSION = 1
+BLOCK_SIZE = 64  # abstracts per zlib block: one lookup inflates ~64 abstracts, not the whole file
+
+_index = None
+_lock = threading.Lock()
+
+
+def _key(title: str):
+    return " ".join(title.casefold().split())
+
+
+def iter_abstracts(path: str):
+    """(title, abstract) from an enwiki-*-abstract.xml dump (.gz / .bz2 / plain), streamed."""
+    opener = gzip.open if path.endswith(".gz") else bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rb") as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag != "doc":
+                continue
+            title = (elem.findtext("title") or "").removeprefix("Wikipedia: ").strip()
+            abstract = " ".join((elem.findtext("abstract") or "").split())
+            if title and abstract:
+                yield title, abstract
+            elem.clear()
+
+
+def _write_strings(path, strings):
+    """Concatenated UTF-8 strings plus an (n + 1) offsets array."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.uint64)
+    with open(path, "wb") as f:
+        pos = 0
+        for i, s in enumerate(strings):
+            data = s.encode("utf-8")
+            f.write(data)
+            pos += len(data)
+            offsets[i + 1] = pos
+    return offsets
+
+
+def build(dump_path: str, out_dir: str, limit: int = None, topic_boost: int = 2):
+    """
+    Writes the index files to out_dir: titles sorted for binary search, abstracts
+    in zlib blocks, and BM25 postings as .npy arrays that are memory-mapped on load.
+    Postings are collected in memory, so a full English dump needs a few GB of RAM once.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    docs = {}
+    for title, abstract in iter_abstracts(dump_path):
+        docs.setdefault(_key(title), (title, abstract))  # first of any duplicate titles wins
+        if limit is not None and len(docs) >= limit:
+            break
+    keys = sorted(docs)
+
+    titles = [docs[key][0] for key in keys]
+    np.save(os.path.join(out_dir, "title_offsets.npy"), _write_strings(os.path.join(out_dir, "titles.bin"), titles))
+
+    block_offsets = [0]
+    with open(os.path.join(out_dir, "abstracts.z"), "wb") as f:
+        for start in range(0, len(keys), BLOCK_SIZE):
+            block = "\0".join(docs[key][1] for key in keys[start:start + BLOCK_SIZE])
+            f.write(zlib.compress(block.encode("utf-8"), 6))
+            block_offsets.append(f.tell())
+    np.save(os.path.join(out_dir, "block_offsets.npy"), np.array(block_offsets, dtype=np.uint64))
+
+    postings = {}  # term -> (array of doc ids, array of term frequencies)
+    doc_len = np.zeros(len(keys), dtype=np.uint32)
+    for doc, key in enumerate(keys):
+        title, abstract = docs[key]
+        terms = tokenize(title) * topic_boost + tokenize(abstract)
+        doc_len[doc] = len(terms)
+        for term, tf in Counter(terms).items():
+            ids, tfs = postings.setdefault(term, (array('I'), array('H')))
+            ids.append(doc)
+            tfs.append(min(tf, 65535))
+    terms = sorted(postings)
+    np.save(os.path.join(out_dir, "term_offsets.npy"), _write_strings(os.path.join(out_dir, "terms.bin"), terms))
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    for i, term in enumerate(terms):
+        post_offsets[i + 1] = post_offsets[i] + len(postings[term][0])
+    np.save(os.path.join(out_dir, "post_offsets.npy"), post_offsets)
+    np.save(os.path.join(out_dir, "post_docs.npy"), np.concatenate(
+        [np.frombuffer(postings[t][0], dtype=np.uint32) for t in terms]) if terms else np.empty(0, dtype=np.uint32))
+    np.save(os.path.join(out_dir, "post_tf.npy"), np.concatenate(
+        [np.frombuffer(postings[t][1], dtype=np.uint16) for t in terms]) if terms else np.empty(0, dtype=np.uint16))
+    np.save(os.path.join(out_dir, "doc_len.npy"), doc_len)
+
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"version": FORMAT_VERSION, "docs": len(keys), "terms": len(terms), "block_size": BLOCK_SIZE,
+                   "avgdl": float(doc_len.mean()) if len(keys) else 0.0, "source": os.path.basename(dump_path)}, f)
+    return len(keys)
+
+
+class _Strings:
+    """Read-only view of a strings file written by _write_strings."""
+
+    def __init__(self, data_path, offsets_path):
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        with open(data_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(data_path) else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def lower_bound(self, key, transform=lambda s: s):
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if transform(self[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class WikiIndex:
+    """
+    Exact and prefix title lookups by binary search over the sorted titles, and
+    BM25 over title + abstract scored like knowledge_index.BM25Index. All arrays
+    are memory-mapped, so opening is instant and only touched pages are read.
+    """
+
+    def __init__(self, directory: str, k1: float = 1.5, b: float = 0.75):
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{directory} was built by another version of wiki_index, rebuild it")
+        self.k1, self.b = k1, b
+        path = lambda name: os.path.join(directory, name)
+        self.titles = _Strings(path("titles.bin"), path("title_offsets.npy"))
+        self.terms = _Strings(path("terms.bin"), path("term_offsets.npy"))
+        self.block_offsets = np.load(path("block_offsets.npy"), mmap_mode="r")
+        self.post_offsets = np.load(path("post_offsets.npy"), mmap_mode="r")
+        self.post_docs = np.load(path("post_docs.npy"), mmap_mode="r")
+        self.post_tf = np.load(path("post_tf.npy"), mmap_mode="r")
+        self.doc_len = np.load(path("doc_len.npy"), mmap_mode="r")
+        with open(path("abstracts.z"), "rb") as f:
+            self.abstracts = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path("abstracts.z")) else b""
+        self.block_size = self.meta["block_size"]
+
+    def __len__(self):
+        return len(self.titles)
+
+    def abstract(self, doc: int):
+        block = doc // self.block_size
+        data = self.abstracts[int(self.block_offsets[block]):int(self.block_offsets[block + 1])]
+        return zlib.decompress(data).decode("utf-8").split("\0")[doc % self.block_size]
+
+    def find_title(self, title: str):
+        """Doc id of the title (case and spacing ignored), or None."""
+        key = _key(title)
+        doc = self.titles.lower_bound(key, _key)
+        return doc if doc < len(self) and _key(self.titles[doc]) == key else None
+
+    def prefix(self, prefix: str, limit: int = 10):
+        key = _key(prefix)
+        found = []
+        doc = self.titles.lower_bound(key, _key)
+        while doc < len(self) and len(found) < limit and _key(self.titles[doc]).startswith(key):
+            found.append(self.titles[doc])
+            doc += 1
+        return found
+
+    def _postings(self, term):
+        tid = self.terms.lower_bound(term)
+        if tid >= len(self.terms) or self.terms[tid] != term:
+            return None
+        start, end = int(self.post_offsets[tid]), int(self.post_offsets[tid + 1])
+        return self.post_docs[start:end], self.post_tf[start:end].astype(np.float32)
+
+    def search(self, query: str, n_results: int = 3, threshold: float = 0.3):
+        """
+        [(score, doc id)] best first, scores normalized to [0, 1] as in BM25Index.search.
+        Titles get no boost here, so an abstract with every query term once scores
+        about 1 / (k1 + 1) = 0.4; the default threshold sits below that.
+        """
+        terms = set(tokenize(query))
+        n_docs = len(self)
+        if not terms or not n_docs:
+            return []
+        avgdl = max(self.meta["avgdl"], 1.0)
+        norm = 0.0
+        ids_parts, score_parts = [], []
+        for term in terms:
+            found = self._postings(term)
+            df = len(found[0]) if found is not None else 0
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm += idf * (self.k1 + 1)
+            if df:
+                ids, tf = found
+                dl = self.doc_len[ids].astype(np.float32)
+                ids_parts.append(ids)
+                score_parts.append(idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl)))
+        if not ids_parts:
+            return []
+        docs, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)) / norm
+        hits = np.flatnonzero(scores >= threshold)
+        if len(hits) > n_results:
+            hits = hits[np.argpartition(-scores[hits], n_results - 1)[:n_results]]
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        return [(float(scores[h]), int(docs[h])) for h in hits]
+
+    def run(self, query: str, max_chars: int = 500):
+        """
+        Answer in WikipediaQueryRun's "Page: ...\\nSummary: ..." shape: the exact
+        title if there is one, else the best BM25 match; None on a miss.
+        """
+        doc = self.find_title(query)
+        if doc is None:
+            hits = self.search(query, n_results=1)
+            if not hits:
+                return None
+            doc = hits[0][1]
+        return f"Page: {self.titles[doc]}\nSummary: {self.abstract(doc)}"[:max_chars]
+
+
+def get_index():
+    """The index in WIKI_INDEX_DIR, opened on first use; None when unset or unreadable."""
+    global _index
+    directory = os.getenv('WIKI_INDEX_DIR')
+    if not directory:
+        return None
+    if _index is None or _index[0] != directory:
+        with _lock:
+            if _index is None or _index[0] != directory:
+                try:
+                    _index = (directory, WikiIndex(directory))
+                    print(f"✅ Offline Wikipedia index: {len(_index[1])} articles from {directory}")
+                except Exception as e:
+                    print(f"⚠️ Offline Wikipedia index in {directory} unusable ({e}), using the API")
+                    _index = (directory, None)
+    return _index[1]
+
+
+if __name__ == "__main__":
+    # python wiki_index.py enwiki-latest-abstract.xml.gz wiki_index [limit]
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python wiki_index.py <enwiki-*-abstract.xml[.gz|.bz2]> <output dir> [max articles]")
+        sys.exit(1)
+    count = build(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) == 4 else None)
+    print(f"✅ Indexed {count} articles into {sys.argv[2]}")